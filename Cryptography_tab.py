@@ -12,6 +12,7 @@ from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import padding as sym_padding
 from cryptography.hazmat.backends import default_backend
 import secrets
+from hash_cache import get_hash_cache
 
 class CryptographyTab(QWidget):
     def __init__(self):
@@ -740,18 +741,26 @@ class CryptographyTab(QWidget):
             return
 
         try:
-            digest = hashes.Hash(hashes.SHA256(), backend=default_backend())
-            total_size = os.path.getsize(input_filename)
-            processed_size = 0
-            with open(input_filename, "rb") as input_file:
-                while True:
-                    chunk = input_file.read(4096)
-                    if not chunk:
-                        break
-                    digest.update(chunk)
-                    processed_size += len(chunk)
-                    self.progress_bar.setValue(int((processed_size / total_size) * 100))
-            hash_value = digest.finalize().hex()
+            cache = get_hash_cache()
+            # یک stat پیش از هش کردن؛ اگر فایل حین هش کردن تغییر کند هش در کش ذخیره نمی‌شود
+            st = os.stat(input_filename)
+            hash_value = cache.lookup(input_filename, "sha256", st)
+            if hash_value is None:
+                digest = hashes.Hash(hashes.SHA256(), backend=default_backend())
+                total_size = st.st_size
+                processed_size = 0
+                with open(input_filename, "rb") as input_file:
+                    while True:
+                        chunk = input_file.read(65536)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        processed_size += len(chunk)
+                        self.progress_bar.setValue(int((processed_size / total_size) * 100))
+                hash_value = digest.finalize().hex()
+                cache.store(input_filename, "sha256", hash_value, st)
+            # هش از کش (یا فایل خالی) بدون خواندن فایل آماده است
+            self.progress_bar.setValue(100)
 
             file_info = {
                 "نام فایل": os.path.basename(input_filename),
@@ -11,6 +11,7 @@ from reportlab.lib.styles import getSampleStyleSheet
 from PIL import Image
 import piexif
 from piexif import TAGS
+from hash_cache import cached_file_hash
 
 try:
     from mutagen.easyid3 import EasyID3
@@ -304,11 +305,13 @@ class GenericMetadataHandler(MetadataHandler):
             self.exif_data = {}
 
     def calculate_checksum(self, algorithm='md5'):
-        hash_algo = hashlib.md5()
-        with open(self.file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_algo.update(chunk)
-        return hash_algo.hexdigest()
+        def _checksum(path):
+            hash_algo = hashlib.new(algorithm)
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(65536), b""):
+                    hash_algo.update(chunk)
+            return hash_algo.hexdigest()
+        return cached_file_hash(self.file_path, algorithm, _checksum)
 
     def get_file_info(self):
         stat_info = os.stat(self.file_path)
@@ -16,6 +16,7 @@ import math
 import threading
 import subprocess
 import logging
+from file_walker import iter_paths
 
 logging.basicConfig(filename="app.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -79,12 +80,9 @@ class MediaClassificationThread(QThread):
 
     def get_media_files(self, folder):
         """جمع‌آوری تمامی تصاویر و ویدیوها در پوشه و زیرپوشه‌ها"""
-        media_files = []
-        for root, _, files in os.walk(folder):
-            for file in files:
-                if file.lower().endswith(('.png', '.jpg', '.jpeg', '.mp4', '.avi', '.mov', '.mkv', '.wmv')):
-                    media_files.append(os.path.join(root, file))
-        return media_files
+        extensions = ('.png', '.jpg', '.jpeg', '.mp4', '.avi', '.mov', '.mkv', '.wmv')
+        return list(iter_paths(folder, accept_name=lambda name: name.lower().endswith(extensions),
+                               with_stat=False, should_stop=self.cancel_event.is_set))
 
     def process_with_cpu(self, media_files, total_media, source_folder):
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
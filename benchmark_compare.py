@@ -0,0 +1,54 @@
+import os, sys, time, tempfile
+from duplicate_engine import group_files_by_byte_to_byte, HASH_BLOCK_SIZE, format_throughput
+
+# مقایسه سرعت روش قبلی مقایسه بایت به بایت (خواندن بلوک‌های ۶۴ کیلوبایتی به bytes تازه)
+# با مقایسه هم‌گام مبتنی بر نگاشت حافظه روی یک جفت فایل یکسان.
+# اجرا: python benchmark_compare.py [حجم به مگابایت، پیش‌فرض 1024]
+
+def legacy_files_identical(file1, file2, block_size=HASH_BLOCK_SIZE):
+    """پیاده‌سازی قبلی are_files_identical برای مقایسه"""
+    with open(file1, "rb") as f1, open(file2, "rb") as f2:
+        while True:
+            b1 = f1.read(block_size)
+            b2 = f2.read(block_size)
+            if b1 != b2:
+                return False
+            if not b1:
+                return True
+
+def write_pair(directory, size_mb):
+    block = os.urandom(1024 * 1024)
+    paths = [os.path.join(directory, "a.bin"), os.path.join(directory, "b.bin")]
+    for file_path in paths:
+        with open(file_path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(block)
+    return paths
+
+def run(label, fn, size_bytes, repeats=3):
+    # بهترین زمان از چند اجرا؛ اجرای اول کش صفحات را گرم می‌کند
+    best = None
+    best_cpu = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        assert fn()
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        best = elapsed if best is None else min(best, elapsed)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+    print(f"{label}: {best:.2f} s ({format_throughput(2 * size_bytes, best)})، زمان پردازنده: {best_cpu:.2f} s")
+    return best
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    with tempfile.TemporaryDirectory() as directory:
+        file1, file2 = write_pair(directory, size_mb)
+        size_bytes = size_mb * 1024 * 1024
+        print(f"جفت فایل {size_mb} مگابایتی")
+        legacy = run("read + bytes (قبلی)", lambda: legacy_files_identical(file1, file2), size_bytes)
+        mapped = run("mmap + memoryview", lambda: bool(group_files_by_byte_to_byte([file1, file2])), size_bytes)
+        print(f"بهبود: {legacy / mapped:.1f}x")
+
+if __name__ == "__main__":
+    main()
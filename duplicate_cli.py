@@ -0,0 +1,219 @@
+import os, sys, csv, json, signal, argparse
+from duplicate_engine import DEFAULT_DEVICE_WORKERS, DEFAULT_FILTER_ALGORITHM, available_hash_algorithms, ScanFilter
+from image_similarity import image_similarity_available, DEFAULT_SIMILARITY_THRESHOLD
+from video_similarity import video_similarity_available
+from scan_checkpoint import (ScanCheckpoint, scan_signature, CHECKPOINT_FILE, CHECKPOINT_GROUPS_FILE,
+                             CHECKPOINT_JOURNAL_FILE)
+from duplicate_scan import DuplicateScan, CRITERIA
+from scan_metrics import format_metrics, METRICS_LOG_FILE
+from hash_cache import set_hash_cache_file, HASH_CACHE_FILE
+
+# اجرای اسکن فایل‌های تکراری از خط فرمان و بدون رابط گرافیکی (برای cron روی سرور)
+# PyQt5 بارگذاری نمی‌شود؛ گروه‌ها به محض تأیید به صورت NDJSON یا CSV در stdout نوشته می‌شوند
+# و پیام‌ها و گزارش مراحل در stderr. کش هش، عکس پیمایش، نقطه ادامه و گزارش عملکرد به جای پوشه جاری
+# در پوشه وضعیت کاربر (--state-dir) نگه داشته می‌شوند و این پوشه هیچ‌گاه اسکن نمی‌شود.
+# مثال: python duplicate_cli.py /srv/data --criteria md5 --format csv > duplicates.csv
+
+# کدهای خروج
+EXIT_NO_DUPLICATES = 0
+EXIT_DUPLICATES_FOUND = 1
+EXIT_USAGE = 2
+EXIT_ERROR = 3
+EXIT_INTERRUPTED = 130
+
+EPILOG = f"""کدهای خروج:
+  {EXIT_NO_DUPLICATES}    اسکن کامل شد و فایل تکراری یافت نشد
+  {EXIT_DUPLICATES_FOUND}    اسکن کامل شد و فایل تکراری یافت شد
+  {EXIT_USAGE}    خطای آرگومان‌ها
+  {EXIT_ERROR}    خطای اجرا (مسیر نامعتبر، کتابخانه ناموجود، خطای نوشتن خروجی)
+  {EXIT_INTERRUPTED}  اسکن با SIGINT یا SIGTERM متوقف شد"""
+
+def default_state_dir():
+    """پوشه وضعیت هر کاربر: %LOCALAPPDATA% در ویندوز و $XDG_CACHE_HOME (پیش‌فرض ~/.cache) در بقیه"""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "filemaster_pro")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="یافتن فایل‌های تکراری بدون رابط گرافیکی",
+        epilog=EPILOG, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("roots", nargs="+", help="مسیرهای اسکن")
+    parser.add_argument("--criteria", choices=CRITERIA, default="md5", help="معیار تشخیص تکراری (پیش‌فرض: md5)")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson", help="قالب خروجی (پیش‌فرض: ndjson)")
+    parser.add_argument("--settings", metavar="FILE",
+                        help="فایل تنظیمات JSON با کلیدهای config_duplicate_files_tab.json؛ آرگومان‌ها بر آن مقدم‌اند")
+    parser.add_argument("--exclude", action="append", default=None, metavar="DIR", help="پوشه مستثنی (قابل تکرار)")
+    parser.add_argument("--type", action="append", default=None, dest="allowed_file_types", metavar="PATTERN",
+                        help="الگو یا پسوند مجاز مانند *.jpg یا .pdf (قابل تکرار)")
+    parser.add_argument("--ext", action="append", default=None, metavar="EXT",
+                        help="فقط این پسوندها اسکن شوند (قابل تکرار)")
+    parser.add_argument("--min-size", type=int, metavar="MB", help="فقط فایل‌های بزرگتر از این اندازه (مگابایت)")
+    parser.add_argument("--hash-algorithm", choices=available_hash_algorithms(), help="الگوریتم هش جزئی")
+    parser.add_argument("--confirm-algorithm", choices=available_hash_algorithms(), help="الگوریتم هش کامل")
+    parser.add_argument("--similarity", type=int, metavar="BITS", help="حداکثر فاصله همینگ در معیارهای visual و video")
+    parser.add_argument("--ssd-workers", type=int, metavar="N", help="تعداد نخ‌های هش برای هر SSD")
+    parser.add_argument("--hdd-workers", type=int, metavar="N", help="تعداد نخ‌های هش برای هر دیسک چرخان")
+    parser.add_argument("--unknown-workers", type=int, metavar="N", help="تعداد نخ‌های هش برای دستگاه‌های نامشخص")
+    parser.add_argument("--no-incremental", action="store_true", help="همه پوشه‌ها دوباره فهرست شوند")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="ذخیره نقطه ادامه و ادامه خودکار اسکن نیمه‌کاره با همین آرگومان‌ها")
+    parser.add_argument("--state-dir", metavar="DIR",
+                        help="پوشه کش هش، عکس پیمایش، نقطه ادامه و گزارش عملکرد (پیش‌فرض: " + default_state_dir() + ")")
+    parser.add_argument("-q", "--quiet", action="store_true", help="بدون پیام و گزارش در stderr و بدون فایل گزارش")
+    parser.add_argument("-v", "--verbose", action="store_true", help="نمایش پیام‌های وضعیت و پیشرفت در stderr")
+    return parser
+
+def load_settings(args):
+    """تنظیمات اسکن: فایل تنظیمات (در صورت وجود) و سپس آرگومان‌های خط فرمان"""
+    settings = {}
+    if args.settings:
+        with open(args.settings, "r", encoding="utf-8") as f:
+            settings.update(json.load(f))
+    overrides = {
+        "exclude_list": args.exclude,
+        "allowed_file_types": args.allowed_file_types,
+        "scan_extensions_only": args.ext,
+        "only_scan_larger_than": args.min_size,
+        "hash_algorithm": args.hash_algorithm,
+        "confirm_algorithm": args.confirm_algorithm,
+        "similarity_threshold": args.similarity,
+    }
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    hash_workers = dict(DEFAULT_DEVICE_WORKERS)
+    hash_workers.update(settings.get("hash_workers") or {})
+    for key, value in (("ssd", args.ssd_workers), ("hdd", args.hdd_workers), ("unknown", args.unknown_workers)):
+        if value is not None:
+            hash_workers[key] = max(1, value)
+    settings["hash_workers"] = hash_workers
+    if args.no_incremental:
+        settings["incremental_scan"] = False
+    return settings
+
+class GroupWriter:
+    """نوشتن دسته‌های گروه در stdout؛ پس از هر دسته flush می‌شود تا خروجی در pipe جریان داشته باشد"""
+
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        self.csv = csv.writer(stream) if output_format == "csv" else None
+        self.group_count = 0
+        self.broken = False
+        if self.csv:
+            self.csv.writerow(["group", "key", "path"])
+
+    def write(self, groups):
+        if self.broken:
+            return
+        try:
+            for key, files in groups.items():
+                self.group_count += 1
+                if self.csv:
+                    for file_path in files:
+                        self.csv.writerow([self.group_count, key, file_path])
+                else:
+                    self.stream.write(json.dumps({"group": self.group_count, "key": key, "files": files},
+                                                 ensure_ascii=False) + "\n")
+            self.stream.flush()
+        except BrokenPipeError:
+            # گیرنده خروجی (مثلاً head) بسته شده است
+            self.broken = True
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def log(message):
+        if not args.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+    try:
+        settings = load_settings(args)
+    except (OSError, ValueError) as e:
+        log(f"خطا در خواندن فایل تنظیمات: {e}")
+        return EXIT_ERROR
+    roots = [os.path.abspath(root) for root in args.roots]
+    missing = [root for root in roots if not os.path.isdir(root)]
+    if missing:
+        log("مسیر یافت نشد: " + "، ".join(missing))
+        return EXIT_ERROR
+    if args.criteria == "visual" and not image_similarity_available():
+        log("برای مقایسه تصویری نصب numpy و Pillow لازم است.")
+        return EXIT_ERROR
+    if args.criteria == "video" and not video_similarity_available():
+        log("برای مقایسه ویدیویی نصب opencv-python و numpy لازم است.")
+        return EXIT_ERROR
+
+    state_dir = os.path.abspath(args.state_dir or default_state_dir())
+    try:
+        os.makedirs(state_dir, exist_ok=True)
+        set_hash_cache_file(os.path.join(state_dir, HASH_CACHE_FILE))
+    except OSError as e:
+        log(f"خطا در ایجاد پوشه وضعیت: {e}")
+        return EXIT_ERROR
+    # فایل‌های وضعیت خود برنامه نباید در نتایج بیایند یا خروجی اجراهای پشت سر هم را تغییر دهند
+    settings["exclude_list"] = list(settings.get("exclude_list") or []) + [state_dir]
+    scan_filter = ScanFilter.from_settings(settings)
+    hash_algorithm = settings.get("hash_algorithm", DEFAULT_FILTER_ALGORITHM)
+    confirm_algorithm = settings.get("confirm_algorithm")
+    similarity_threshold = settings.get("similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD)
+    checkpoint = resume_state = None
+    if args.checkpoint:
+        # همان شناسه تب فایل‌های تکراری؛ نقطه ادامه فقط برای همین مسیرها و تنظیمات معتبر است
+        checkpoint = ScanCheckpoint(scan_signature(roots, args.criteria, {
+            "filter": scan_filter.signature(),
+            "hash_algorithm": hash_algorithm,
+            "confirm_algorithm": confirm_algorithm,
+            "similarity_threshold": similarity_threshold,
+        }), os.path.join(state_dir, CHECKPOINT_FILE), os.path.join(state_dir, CHECKPOINT_GROUPS_FILE),
+            os.path.join(state_dir, CHECKPOINT_JOURNAL_FILE))
+        resume_state = checkpoint.load()
+        if resume_state is None:
+            checkpoint.clear()
+
+    writer = GroupWriter(sys.stdout, args.format)
+    summary = {}
+    last_progress = [-1]
+
+    def on_progress(percent):
+        if args.verbose and percent // 10 != last_progress[0] // 10:
+            log(f"پیشرفت: {percent}%")
+        last_progress[0] = percent
+
+    def on_groups(groups):
+        writer.write(groups)
+        if writer.broken:
+            scan.request_stop()
+
+    scan = DuplicateScan(
+        roots, args.criteria, settings["hash_workers"], hash_algorithm, confirm_algorithm, scan_filter,
+        similarity_threshold, checkpoint, resume_state, settings.get("incremental_scan", True), state_dir,
+        None if args.quiet else os.path.join(state_dir, METRICS_LOG_FILE), progress_callback=on_progress, status_callback=log if args.verbose else None,
+        report_callback=log, groups_callback=on_groups, result_callback=summary.update,
+        metrics_callback=(lambda record: log(format_metrics(record))) if args.verbose else None
+    )
+
+    def on_signal(signum, frame):
+        scan.request_stop()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+    try:
+        scan.run()
+    except OSError as e:
+        log(f"خطا در اسکن: {e}")
+        return EXIT_ERROR
+    if writer.broken:
+        # جلوگیری از خطای دوباره هنگام بستن stdout در پایان برنامه
+        sys.stdout = open(os.devnull, "w")
+        return EXIT_ERROR
+    if summary.get("cancelled"):
+        log(f"اسکن متوقف شد؛ {summary.get('groups', 0)} گروه تا این لحظه نوشته شد.")
+        return EXIT_INTERRUPTED
+    log(f"{summary.get('groups', 0)} گروه تکراری شامل {summary.get('files', 0)} فایل یافت شد.")
+    return EXIT_DUPLICATES_FOUND if summary.get("groups") else EXIT_NO_DUPLICATES
+
+if __name__ == "__main__":
+    sys.exit(main())
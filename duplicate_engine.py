@@ -0,0 +1,752 @@
+import os, sys, math, time, mmap, shutil, fnmatch, hashlib, psutil
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from hash_cache import get_hash_cache, cache_stat
+from file_walker import iter_files
+
+# الگوریتم‌های هش سریع اختیاری هستند
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# موتور تشخیص فایل‌های تکراری (بدون وابستگی به PyQt5)
+
+# تعداد بایت‌هایی که از ابتدا و انتهای هر فایل در مرحله هش جزئی خوانده می‌شود
+PARTIAL_HASH_SIZE = 4096
+HASH_BLOCK_SIZE = 65536
+# حداکثر تعداد فایل‌های باز هم‌زمان در مقایسه بایت به بایت
+MAX_OPEN_FILES = 64
+# سقف حافظه بلوک‌های خوانده‌شده برای گروه‌های بزرگ‌تر از MAX_OPEN_FILES
+COMPARE_MEMORY_BUDGET = 64 * 1024 * 1024
+# اندازه پنجره مقایسه هم‌گام روی فایل‌های نگاشت‌شده؛ اگر فایلی قابل نگاشت نباشد پنجره
+# به اندازه بافر readinto کوچک می‌شود تا حافظه گروه از COMPARE_MEMORY_BUDGET بیشتر نشود
+COMPARE_WINDOW = 8 * 1024 * 1024
+READINTO_WINDOW = 1024 * 1024
+# تعداد نخ‌های هش هم‌زمان برای هر دستگاه بر اساس نوع دیسک؛ "devices" تنظیم اختصاصی هر دستگاه است
+DEFAULT_DEVICE_WORKERS = {"ssd": 8, "hdd": 1, "unknown": 2, "devices": {}}
+
+# الگوریتم‌های هش قابل انتخاب و اندازه بلوک خواندن متناسب با سرعت هر کدام
+HASH_ALGORITHMS = {
+    "xxh3_128": {"title": "xxHash3 (128 بیت، غیررمزنگاری)", "block_size": 1024 * 1024, "cryptographic": False},
+    "xxh3_64": {"title": "xxHash3 (64 بیت، غیررمزنگاری)", "block_size": 1024 * 1024, "cryptographic": False},
+    "blake3": {"title": "BLAKE3", "block_size": 1024 * 1024, "cryptographic": True},
+    "blake2b": {"title": "BLAKE2b", "block_size": 256 * 1024, "cryptographic": True},
+    "sha256": {"title": "SHA-256", "block_size": 256 * 1024, "cryptographic": True},
+    "md5": {"title": "MD5", "block_size": HASH_BLOCK_SIZE, "cryptographic": False},
+}
+DEFAULT_FILTER_ALGORITHM = "md5"
+
+def format_size(size_bytes):
+    try:
+        if size_bytes == 0:
+            return "0 بایت"
+        size_name = ("بایت", "کیلوبایت", "مگابایت", "گیگابایت", "ترابایت")
+        i = int(math.floor(math.log(size_bytes, 1024)))
+        p = math.pow(1024, i)
+        s = round(size_bytes / p, 2)
+        return f"{s} {size_name[i]}"
+    except Exception:
+        return f"{size_bytes} بایت"
+
+def available_hash_algorithms():
+    """الگوریتم‌هایی که کتابخانه لازم آن‌ها نصب است"""
+    available = []
+    for name in HASH_ALGORITHMS:
+        if name.startswith("xxh3") and xxhash is None:
+            continue
+        if name == "blake3" and blake3 is None:
+            continue
+        available.append(name)
+    return available
+
+def resolve_hash_algorithm(algorithm, default=DEFAULT_FILTER_ALGORITHM):
+    """بازگشت به الگوریتم پیش‌فرض وقتی الگوریتم انتخاب‌شده در این سیستم در دسترس نیست"""
+    if not algorithm:
+        return None
+    return algorithm if algorithm in available_hash_algorithms() else default
+
+def new_hasher(algorithm):
+    if algorithm == "xxh3_128":
+        return xxhash.xxh3_128()
+    if algorithm == "xxh3_64":
+        return xxhash.xxh3_64()
+    if algorithm == "blake3":
+        return blake3.blake3()
+    return hashlib.new(algorithm)
+
+def get_file_hash(file_path, algorithm=DEFAULT_FILTER_ALGORITHM, block_size=None):
+    hasher = new_hasher(algorithm)
+    if block_size is None:
+        block_size = HASH_ALGORITHMS.get(algorithm, {}).get("block_size", HASH_BLOCK_SIZE)
+    try:
+        with open(file_path, "rb") as f:
+            while True:
+                data = f.read(block_size)
+                if not data:
+                    break
+                hasher.update(data)
+        return hasher.hexdigest()
+    except Exception:
+        return None
+
+def get_file_partial_hash(file_path, size, algorithm=DEFAULT_FILTER_ALGORITHM, partial_size=PARTIAL_HASH_SIZE):
+    """هش ابتدا و انتهای فایل؛ خروجی: (هش، تعداد بایت خوانده‌شده)"""
+    hasher = new_hasher(algorithm)
+    try:
+        with open(file_path, "rb") as f:
+            if size <= 2 * partial_size:
+                data = f.read()
+                hasher.update(data)
+                return hasher.hexdigest(), len(data)
+            head = f.read(partial_size)
+            f.seek(-partial_size, os.SEEK_END)
+            tail = f.read(partial_size)
+            hasher.update(head)
+            hasher.update(tail)
+            return hasher.hexdigest(), len(head) + len(tail)
+    except Exception:
+        return None, 0
+
+def get_mount_devices():
+    """نگاشت نقطه اتصال ← دستگاه از psutil.disk_partitions"""
+    mounts = {}
+    try:
+        for part in psutil.disk_partitions():
+            mounts[os.path.normcase(os.path.abspath(part.mountpoint))] = part.device
+    except Exception:
+        pass
+    return mounts
+
+def device_for_path(file_path, mounts):
+    """دستگاه ذخیره‌سازی فایل بر اساس طولانی‌ترین نقطه اتصال منطبق"""
+    path = os.path.normcase(os.path.abspath(file_path))
+    best = None
+    for mountpoint in mounts:
+        prefix = mountpoint if mountpoint.endswith(os.sep) else mountpoint + os.sep
+        if path == mountpoint or path.startswith(prefix):
+            if best is None or len(mountpoint) > len(best):
+                best = mountpoint
+    return mounts.get(best, "")
+
+_rotational_cache = {}
+
+def is_rotational(device):
+    """True برای دیسک چرخان، False برای SSD و None وقتی نوع دیسک قابل تشخیص نیست (مثلاً ویندوز)"""
+    if device in _rotational_cache:
+        return _rotational_cache[device]
+    result = None
+    try:
+        name = os.path.basename(os.path.realpath(device))
+        sys_path = os.path.realpath(os.path.join("/sys/class/block", name))
+        if os.path.exists(os.path.join(sys_path, "partition")):
+            sys_path = os.path.dirname(sys_path)
+        with open(os.path.join(sys_path, "queue", "rotational")) as f:
+            result = f.read().strip() == "1"
+    except Exception:
+        result = None
+    _rotational_cache[device] = result
+    return result
+
+def workers_for_device(device, device_workers=None):
+    """تعداد نخ‌های هش مجاز برای یک دستگاه: تنظیم اختصاصی دستگاه، سپس پیش‌فرض بر اساس نوع دیسک"""
+    settings = dict(DEFAULT_DEVICE_WORKERS)
+    settings.update(device_workers or {})
+    per_device = settings.get("devices") or {}
+    if device in per_device:
+        return max(1, int(per_device[device]))
+    rotational = is_rotational(device)
+    if rotational is True:
+        return max(1, int(settings["hdd"]))
+    if rotational is False:
+        return max(1, int(settings["ssd"]))
+    return max(1, int(settings["unknown"]))
+
+class DevicePool:
+    """یک استخر نخ برای هر دستگاه ذخیره‌سازی؛ هر دستگاه از سقف هم‌زمانی خود تجاوز نمی‌کند"""
+
+    def __init__(self, device_workers=None, mounts=None):
+        self.device_workers = device_workers
+        self.mounts = mounts if mounts is not None else get_mount_devices()
+        self.executors = {}
+
+    def submit(self, file_path, fn, *args):
+        device = device_for_path(file_path, self.mounts)
+        executor = self.executors.get(device)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=workers_for_device(device, self.device_workers))
+            self.executors[device] = executor
+        return executor.submit(fn, *args)
+
+    def shutdown(self, cancel=False):
+        for executor in self.executors.values():
+            executor.shutdown(wait=True, cancel_futures=cancel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(cancel=exc_type is not None)
+
+def run_per_device(items, job, device_workers=None, mounts=None):
+    """
+    اجرای job(item) برای هر آیتم (مسیر در item[0]) با یک استخر نخ برای هر دستگاه.
+    درایوهای مستقل به صورت موازی پردازش می‌شوند.
+    نتایج به ترتیب اتمام به صورت (item، نتیجه) برگردانده می‌شوند.
+    """
+    with DevicePool(device_workers, mounts) as pool:
+        futures = {pool.submit(item[0], job, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures.pop(future), future.result()
+
+def new_stage_stats(name):
+    return {"stage": name, "files": 0, "candidates": 0, "bytes_read": 0, "seconds": 0.0}
+
+def collapse_hardlinks(paths):
+    """
+    حذف مسیرهایی که به همان فایل فیزیکی (st_dev، st_ino) اشاره می‌کنند؛ فقط اولین مسیر هر inode
+    باقی می‌ماند. خروجی: (مسیرهای یکتا، تعداد مسیرهای حذف‌شده)
+    """
+    seen = set()
+    unique = []
+    for file_path in paths:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        # روی سیستم‌فایل‌هایی که inode ندارند st_ino صفر است و مسیر همیشه یکتا فرض می‌شود
+        key = (st.st_dev, st.st_ino) if st.st_ino else None
+        if key is not None and key in seen:
+            continue
+        if key is not None:
+            seen.add(key)
+        unique.append(file_path)
+    return unique, len(paths) - len(unique)
+
+def group_files_by_size(records, stats=None, collapse_links=True):
+    """
+    گروه‌بندی رکوردهای (مسیر، اندازه) بر اساس اندازه و حذف اندازه‌های یکتا.
+    هاردلینک‌های یک فایل پیش از هر هش در یک مسیر ادغام می‌شوند.
+    """
+    size_groups = {}
+    count = 0
+    for file_path, size in records:
+        size_groups.setdefault(size, []).append(file_path)
+        count += 1
+    candidates = {}
+    hardlinks = 0
+    for size, paths in size_groups.items():
+        if len(paths) < 2:
+            continue
+        if collapse_links:
+            paths, collapsed = collapse_hardlinks(paths)
+            hardlinks += collapsed
+            if len(paths) < 2:
+                continue
+        candidates[size] = paths
+    if stats is not None:
+        stats["files"] = count
+        stats["candidates"] = sum(len(paths) for paths in candidates.values())
+        stats["hardlinks"] = hardlinks
+    return candidates
+
+def files_identical(file1, file2):
+    return bool(group_files_by_byte_to_byte([file1, file2]))
+
+def replace_with_hardlink(target, keep):
+    """جایگزینی target با هاردلینک به keep؛ محتوا پیش از جایگزینی بایت به بایت بررسی می‌شود"""
+    if not files_identical(keep, target):
+        raise ValueError("محتوای فایل‌ها یکسان نیست")
+    temp_path = f"{target}.fmp-link.tmp"
+    os.link(keep, temp_path)
+    try:
+        os.replace(temp_path, target)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+# ioctl کپی reflink در لینوکس (Btrfs، XFS و ...)
+FICLONE = 0x40049409
+
+def reflink_supported():
+    return sys.platform.startswith("linux") and fcntl is not None
+
+def replace_with_reflink(target, keep):
+    """جایگزینی target با کپی reflink از keep (اشتراک بلوک‌ها بدون جابجایی داده)"""
+    if not reflink_supported():
+        raise OSError("reflink در این سیستم پشتیبانی نمی‌شود")
+    if not files_identical(keep, target):
+        raise ValueError("محتوای فایل‌ها یکسان نیست")
+    temp_path = f"{target}.fmp-link.tmp"
+    try:
+        with open(keep, "rb") as src, open(temp_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copystat(target, temp_path)
+        os.replace(temp_path, target)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class ScanFilter:
+    """فیلترهای تنظیمات تب (مسیرهای مستثنی، پسوندها و حداقل اندازه) که حین پیمایش اعمال می‌شوند"""
+
+    def __init__(self, exclude_list=None, allowed_file_types=None, scan_extensions_only=None,
+                 only_scan_larger_than=None):
+        self.excluded_dirs = {os.path.normcase(os.path.abspath(p)) for p in (exclude_list or [])}
+        self.patterns = []
+        self.extensions = set()
+        for item in allowed_file_types or []:
+            item = item.strip().lower()
+            if not item or item in ("*", "*.*"):
+                # "*.*" یعنی همه فایل‌ها
+                self.patterns = []
+                self.extensions = set()
+                break
+            if "*" in item or "?" in item:
+                self.patterns.append(item)
+            else:
+                self.extensions.add(item if item.startswith(".") else "." + item)
+        self.only_extensions = {
+            (e.strip().lower() if e.strip().startswith(".") else "." + e.strip().lower())
+            for e in (scan_extensions_only or []) if e.strip()
+        }
+        # مقدار تنظیمات بر حسب مگابایت است
+        self.min_size = int(only_scan_larger_than) * 1024 * 1024 if only_scan_larger_than else 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            settings.get("exclude_list"),
+            settings.get("allowed_file_types"),
+            settings.get("scan_extensions_only"),
+            settings.get("only_scan_larger_than"),
+        )
+
+    def signature(self):
+        """نمایش قابل ذخیره فیلترها برای مقایسه دو اسکن"""
+        return {
+            "excluded_dirs": sorted(self.excluded_dirs),
+            "patterns": sorted(self.patterns),
+            "extensions": sorted(self.extensions),
+            "only_extensions": sorted(self.only_extensions),
+            "min_size": self.min_size,
+        }
+
+    def is_excluded_dir(self, path):
+        return bool(self.excluded_dirs) and os.path.normcase(os.path.abspath(path)) in self.excluded_dirs
+
+    def accepts_name(self, name):
+        lower = name.lower()
+        ext = os.path.splitext(lower)[1]
+        if self.only_extensions and ext not in self.only_extensions:
+            return False
+        if self.patterns or self.extensions:
+            if ext in self.extensions:
+                return True
+            return any(fnmatch.fnmatchcase(lower, pattern) for pattern in self.patterns)
+        return True
+
+    def accepts_size(self, size):
+        return size > self.min_size if self.min_size else True
+
+def walk_filtered(root, scan_filter=None, on_directory=None, stack=None, should_stop=None, with_stat=False,
+                  snapshot=None, timings=None):
+    """
+    پیمایش درخت با file_walker و اعمال فیلترهای تنظیمات حین پیمایش:
+    پوشه‌های مستثنی پیش از ورود حذف می‌شوند و فایل‌ها ابتدا بر اساس پسوند و سپس با
+    stat همان DirEntry بر اساس اندازه رد می‌شوند. خروجی: رکوردهای (مسیر، اندازه)
+    با with_stat رکوردها (مسیر، اندازه، زمان تغییر، inode) هستند.
+    on_directory، stack، should_stop، snapshot و timings همان پارامترهای iter_files هستند.
+    """
+    scan_filter = scan_filter or ScanFilter()
+    for directory, name, size, mtime, inode in iter_files(
+            root, scan_filter.accepts_name, scan_filter.accepts_size, scan_filter.is_excluded_dir,
+            should_stop=should_stop, on_directory=on_directory, stack=stack, snapshot=snapshot, timings=timings):
+        file_path = os.path.join(directory, name)
+        if with_stat:
+            yield file_path, size, mtime, inode
+        else:
+            yield file_path, size
+
+def _cached_partial_hash(cache, file_path, size, algorithm, partial_size):
+    # برای فایل‌های کوچک هش جزئی همان هش کامل است
+    cache_algorithm = algorithm if size <= 2 * partial_size else f"{algorithm}_partial_{partial_size}"
+    st = cache_stat(file_path) if cache else None
+    digest = cache.lookup(file_path, cache_algorithm, st) if st else None
+    if digest is not None:
+        return digest, 0
+    digest, read = get_file_partial_hash(file_path, size, algorithm, partial_size)
+    if digest and st:
+        cache.store(file_path, cache_algorithm, digest, st)
+    return digest, read
+
+def _cached_full_hash(cache, file_path, size, algorithm):
+    st = cache_stat(file_path) if cache else None
+    digest = cache.lookup(file_path, algorithm, st) if st else None
+    if digest is not None:
+        return digest, 0
+    digest = get_file_hash(file_path, algorithm)
+    if not digest:
+        return None, 0
+    if st:
+        cache.store(file_path, algorithm, digest, st)
+    return digest, size
+
+# حداکثر تعداد کارهای هش در صف استخرها؛ سطل‌های اندازه به تدریج وارد صف می‌شوند
+MAX_IN_FLIGHT = 1024
+
+def find_hash_duplicates(records, progress_callback=None, partial_size=PARTIAL_HASH_SIZE, use_cache=True,
+                         device_workers=None, filter_algorithm=DEFAULT_FILTER_ALGORITHM, confirm_algorithm=None,
+                         group_callback=None, should_stop=None, bucket_callback=None):
+    """
+    موتور مرحله‌ای: اندازه ← هش جزئی ← هش کامل.
+    فقط فایل‌هایی که در هر مرحله هنوز هم‌تا دارند به مرحله بعد می‌روند.
+    هش جزئی با الگوریتم سریع filter_algorithm محاسبه می‌شود؛ هش کامل با confirm_algorithm
+    (در صورت انتخاب، معمولاً رمزنگاری) و در غیر این صورت با همان filter_algorithm.
+    هش فایل‌های تغییرنکرده از کش دائمی خوانده می‌شود و هش‌ها برای هر دستگاه ذخیره‌سازی
+    با استخر نخ جداگانه (با سقف هم‌زمانی همان دستگاه) محاسبه می‌شوند.
+    مراحل به صورت خط لوله اجرا می‌شوند: به محض کامل شدن هش جزئی یک سطل اندازه، هش کامل
+    آن شروع می‌شود و گروه‌های تأییدشده هر سطل بلافاصله به group_callback داده می‌شوند.
+    خروجی: (گروه‌های تکراری، آمار مراحل)؛ در صورت وجود group_callback گروه‌ها نگه داشته نمی‌شوند.
+    bucket_callback(size) پس از تأیید همه گروه‌های یک سطل اندازه فراخوانی می‌شود (برای ذخیره نقطه ادامه)
+    و با should_stop کارهای در صف لغو و اسکن متوقف می‌شود.
+    """
+    filter_algorithm = resolve_hash_algorithm(filter_algorithm) or DEFAULT_FILTER_ALGORITHM
+    full_algorithm = resolve_hash_algorithm(confirm_algorithm, "sha256") or filter_algorithm
+    size_stats = new_stage_stats("size")
+    partial_stats = new_stage_stats("partial_hash")
+    full_stats = new_stage_stats("full_hash")
+    cache = get_hash_cache() if use_cache else None
+    duplicate_groups = {}
+
+    # مرحله ۱: اندازه
+    size_groups = group_files_by_size(records, size_stats)
+    partial_stats["files"] = size_stats["candidates"]
+    if progress_callback:
+        progress_callback(0, 1, 1)
+
+    pending = {}
+    partial_state = {}
+    full_state = {}
+    # تعداد گروه‌های هش کامل باز در هر سطل اندازه
+    open_full = {}
+    partial_done = 0
+    full_done = 0
+    started = time.perf_counter()
+    full_started = None
+
+    def confirm(groups):
+        if group_callback:
+            group_callback(groups)
+        else:
+            for digest, paths in groups.items():
+                duplicate_groups.setdefault(digest, []).extend(paths)
+
+    def bucket_done(size):
+        if bucket_callback:
+            bucket_callback(size)
+
+    def resolve_partial(size):
+        nonlocal full_started
+        open_full[size] = 0
+        for digest, paths in partial_state.pop(size)["groups"].items():
+            if len(paths) < 2:
+                continue
+            partial_stats["candidates"] += len(paths)
+            if size <= 2 * partial_size and full_algorithm == filter_algorithm:
+                # کل فایل در مرحله قبل خوانده شده و هش جزئی همان هش کامل است
+                confirm({digest: paths})
+                continue
+            if full_started is None:
+                full_started = time.perf_counter()
+            key = (size, digest)
+            full_state[key] = {"remaining": len(paths), "groups": {}}
+            open_full[size] += 1
+            full_stats["files"] += len(paths)
+            for file_path in paths:
+                future = pool.submit(file_path, _cached_full_hash, cache, file_path, size, full_algorithm)
+                pending[future] = ("full", key, file_path)
+        if not open_full[size]:
+            del open_full[size]
+            bucket_done(size)
+
+    def resolve_full(key):
+        groups = {d: g for d, g in full_state.pop(key)["groups"].items() if len(g) > 1}
+        full_stats["candidates"] += sum(len(g) for g in groups.values())
+        if groups:
+            confirm(groups)
+        size = key[0]
+        open_full[size] -= 1
+        if not open_full[size]:
+            del open_full[size]
+            bucket_done(size)
+
+    buckets = iter(size_groups.items())
+    exhausted = False
+    with DevicePool(device_workers) as pool:
+        while True:
+            # مرحله ۲: ورود تدریجی سطل‌های اندازه به صف هش جزئی
+            while not exhausted and len(pending) < MAX_IN_FLIGHT:
+                try:
+                    size, paths = next(buckets)
+                except StopIteration:
+                    exhausted = True
+                    break
+                partial_state[size] = {"remaining": len(paths), "groups": {}}
+                for file_path in paths:
+                    future = pool.submit(file_path, _cached_partial_hash, cache, file_path, size,
+                                         filter_algorithm, partial_size)
+                    pending[future] = ("partial", size, file_path)
+            if not pending:
+                break
+            if should_stop and should_stop():
+                pool.shutdown(cancel=True)
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key, file_path = pending.pop(future)
+                digest, read = future.result()
+                state = partial_state[key] if stage == "partial" else full_state[key]
+                state["remaining"] -= 1
+                if digest:
+                    state["groups"].setdefault(digest, []).append(file_path)
+                if stage == "partial":
+                    partial_stats["bytes_read"] += read
+                    partial_done += 1
+                    if progress_callback:
+                        progress_callback(1, partial_done, partial_stats["files"])
+                    if state["remaining"] == 0:
+                        resolve_partial(key)
+                    if partial_done == partial_stats["files"]:
+                        partial_stats["seconds"] = time.perf_counter() - started
+                else:
+                    full_stats["bytes_read"] += read
+                    full_done += 1
+                    # مجموع هش کامل فقط پس از پایان هش جزئی مشخص است
+                    if progress_callback and partial_done == partial_stats["files"]:
+                        progress_callback(2, full_done, full_stats["files"])
+                    if state["remaining"] == 0:
+                        resolve_full(key)
+    if full_started is not None:
+        full_stats["seconds"] = time.perf_counter() - full_started
+    return duplicate_groups, [size_stats, partial_stats, full_stats]
+
+def _split_by_reopen(paths, offset, chunk_size, stats=None):
+    """خواندن یک بلوک از هر فایل با باز و بسته کردن تک‌تک آن‌ها (برای گروه‌های بزرگ)"""
+    parts = {}
+    for file_path in paths:
+        try:
+            with open(file_path, "rb") as f:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+        except Exception:
+            continue
+        if stats is not None:
+            stats["bytes_read"] += len(chunk)
+        parts.setdefault(chunk, []).append(file_path)
+    return parts
+
+def _advise_sequential(fd):
+    # راهنمای خواندن ترتیبی برای هسته (فقط در سیستم‌های POSIX)
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+class _CompareReader:
+    """
+    خواننده پنجره‌ای یک فایل برای مقایسه هم‌گام: در صورت امکان فایل نگاشت حافظه می‌شود و پنجره‌ها
+    memoryview بدون کپی روی همان نگاشت هستند؛ در غیر این صورت با readinto در یک bytearray ثابت خوانده می‌شود.
+    """
+
+    def __init__(self, file_path, offset):
+        self.path = file_path
+        self.file = open(file_path, "rb", buffering=0)
+        self.offset = offset
+        self.map = None
+        self.view = None
+        self.buffer = None
+        _advise_sequential(self.file.fileno())
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self.map, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                self.map.madvise(mmap.MADV_SEQUENTIAL)
+            self.view = memoryview(self.map)
+        except (OSError, ValueError):
+            # فایل خالی یا غیرقابل نگاشت (مثلاً روی برخی سیستم‌فایل‌های شبکه)
+            self.map = None
+            self.file.seek(offset)
+
+    def read(self, length):
+        if self.view is not None:
+            chunk = self.view[self.offset:self.offset + length]
+            self.offset += len(chunk)
+            return chunk
+        if self.buffer is None:
+            self.buffer = bytearray(length)
+        got = 0
+        with memoryview(self.buffer) as view:
+            while got < len(view):
+                n = self.file.readinto(view[got:])
+                if not n:
+                    break
+                got += n
+        if got < len(self.buffer):
+            # فقط در انتهای فایل
+            del self.buffer[got:]
+        self.offset += got
+        return self.buffer
+
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # پنجره‌ای هنوز آزاد نشده (مثلاً پس از خطا)؛ نگاشت با آزاد شدن آن بسته می‌شود
+                pass
+            self.map = None
+        self.file.close()
+
+def _same_window(reader, chunk, other):
+    """مقایسه پنجره reader با پنجره دیگر بدون کپی داده"""
+    if len(chunk) != len(other):
+        return False
+    if isinstance(chunk, bytearray):
+        return chunk == other
+    if isinstance(other, bytearray):
+        return other == chunk
+    # هر دو پنجره روی نگاشت حافظه هستند؛ جستجوی پنجره دیگر دقیقاً در همان بازه نگاشت reader
+    # با memcmp انجام می‌شود (مقایسه مستقیم دو memoryview بایت به بایت و چند برابر کندتر است)
+    start = reader.offset - len(chunk)
+    return reader.map.find(other, start, start + len(chunk)) == start
+
+def _lockstep_compare(paths, offset, window, stats=None):
+    """باز کردن هم‌زمان همه فایل‌ها و مقایسه پنجره به پنجره؛ گروه در اولین تفاوت شکسته می‌شود"""
+    members = []
+    results = []
+    try:
+        for file_path in paths:
+            try:
+                members.append(_CompareReader(file_path, offset))
+            except Exception:
+                continue
+        # همه اعضا باید پنجره‌های هم‌اندازه بخوانند
+        if any(reader.map is None for reader in members):
+            window = min(window, READINTO_WINDOW)
+        active = [members]
+        while active:
+            next_active = []
+            for group in active:
+                # هر بخش: (پنجره نماینده، اعضا)؛ در حالت معمول همه فایل‌ها در یک بخش می‌مانند
+                # و نماینده هر بخش اولین عضو آن است
+                parts = []
+                for reader in group:
+                    try:
+                        chunk = reader.read(window)
+                    except Exception:
+                        reader.close()
+                        continue
+                    if stats is not None:
+                        stats["bytes_read"] += len(chunk)
+                    for part in parts:
+                        if _same_window(part[1][0], part[0], chunk):
+                            part[1].append(reader)
+                            break
+                    else:
+                        parts.append((chunk, [reader]))
+                for chunk, part in parts:
+                    # پنجره پیش از بستن نگاشت آزاد می‌شود
+                    ended = not len(chunk)
+                    if isinstance(chunk, memoryview):
+                        chunk.release()
+                    if len(part) < 2:
+                        for reader in part:
+                            reader.close()
+                    elif ended:
+                        results.append([reader.path for reader in part])
+                        for reader in part:
+                            reader.close()
+                    else:
+                        next_active.append(part)
+            active = next_active
+    finally:
+        for reader in members:
+            reader.close()
+    return results
+
+def group_files_by_byte_to_byte(files, block_size=COMPARE_WINDOW, max_open_files=MAX_OPEN_FILES,
+                                memory_budget=COMPARE_MEMORY_BUDGET, stats=None):
+    """
+    مقایسه چندطرفه هم‌گام: هر فایل حداکثر یک بار خوانده می‌شود.
+    گروه‌های بزرگ‌تر از max_open_files با باز و بسته کردن نوبتی فایل‌ها و بلوک‌های کوچک‌تر
+    شکسته می‌شوند تا به سقف فایل‌های باز برسند، سپس به صورت هم‌گام مقایسه می‌شوند.
+    """
+    groups = {}
+    pending = [(list(files), 0)]
+    while pending:
+        paths, offset = pending.pop()
+        if len(paths) < 2:
+            continue
+        if len(paths) > max_open_files:
+            chunk_size = max(PARTIAL_HASH_SIZE, min(block_size, memory_budget // len(paths)))
+            for chunk, part in _split_by_reopen(paths, offset, chunk_size, stats).items():
+                if len(part) < 2:
+                    continue
+                if not chunk:
+                    groups[part[0]] = part
+                else:
+                    pending.append((part, offset + len(chunk)))
+        else:
+            for group in _lockstep_compare(paths, offset, block_size, stats):
+                groups[group[0]] = group
+    return groups
+
+STAGE_TITLES = {
+    "size": "اندازه",
+    "partial_hash": "هش جزئی",
+    "full_hash": "هش کامل",
+    "byte_compare": "مقایسه بایت به بایت",
+    "image_hash": "هش تصویری",
+    "similarity": "گروه‌بندی شباهت",
+    "video_hash": "امضای ویدیو",
+    "video_match": "گروه‌بندی ویدیوها",
+}
+
+def format_throughput(bytes_read, seconds):
+    if seconds <= 0:
+        return "-"
+    return f"{bytes_read / seconds / (1024 * 1024):.1f} MB/s"
+
+def format_stage_report(stage_stats, total_seconds=None):
+    """متن خلاصه تعداد نامزدها، حجم خوانده‌شده و سرعت خواندن در هر مرحله"""
+    parts = []
+    total_bytes = 0
+    stage_seconds = 0.0
+    for stats in stage_stats:
+        title = STAGE_TITLES.get(stats["stage"], stats["stage"])
+        text = (f"{title}: {stats['files']} ← {stats['candidates']} فایل، "
+                f"خوانده‌شده: {format_size(stats['bytes_read'])}")
+        if stats.get("hardlinks"):
+            text += f"، هاردلینک ادغام‌شده: {stats['hardlinks']}"
+        if stats.get("seconds"):
+            text += f" ({format_throughput(stats['bytes_read'], stats['seconds'])})"
+            stage_seconds += stats["seconds"]
+        total_bytes += stats["bytes_read"]
+        parts.append(text)
+    # مراحل خط لوله هم‌پوشانی دارند؛ در صورت وجود، زمان کل واقعی ملاک سرعت کل است
+    total_seconds = total_seconds or stage_seconds
+    if total_seconds:
+        parts.append(f"سرعت کل: {format_throughput(total_bytes, total_seconds)}")
+    return " | ".join(parts)
@@ -1,11 +1,26 @@
-import os, json, math, psutil, hashlib, time
+import os, json, math, psutil, time
+from array import array
+from bisect import bisect_right
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QMessageBox,
     QLabel, QListWidget, QListWidgetItem, QSlider, QTabWidget, QGroupBox, QCheckBox,
-    QRadioButton, QTreeWidget, QTreeWidgetItem, QDialog, QProgressBar, QSystemTrayIcon, QComboBox, QScrollArea
+    QRadioButton, QTableView, QHeaderView, QDialog, QProgressBar, QSystemTrayIcon, QComboBox, QScrollArea,
+    QSpinBox, QFormLayout, QTableWidget, QTableWidgetItem
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QThread
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QAbstractItemModel, QModelIndex
 from PyQt5.QtGui import QFont
+from duplicate_engine import (
+    DEFAULT_DEVICE_WORKERS, get_mount_devices, is_rotational, HASH_ALGORITHMS, DEFAULT_FILTER_ALGORITHM,
+    available_hash_algorithms, ScanFilter, replace_with_hardlink, replace_with_reflink, reflink_supported
+)
+from image_similarity import image_similarity_available, DEFAULT_SIMILARITY_THRESHOLD
+from video_similarity import video_similarity_available
+from scan_checkpoint import ScanCheckpoint, scan_signature
+from duplicate_scan import DuplicateScan
+from file_deletion import DeletionJournal, delete_files
+from scan_metrics import format_metrics
+from fs_watcher import SharedWatch, WatchedPaths
+from scan_cache import get_scan_cache
 
 # مسیر فایل پیکربندی این تب
 CONFIG_FILE = "config_duplicate_files_tab.json"
@@ -24,8 +39,13 @@ default_config = {
     "allowed_file_types": ["*.*"],
     "only_scan_larger_than": None,
     "scan_extensions_only": [],
-    "duplicate_criteria": "name_size",  # گزینه‌ها: name_size, md5, byte_by_byte
-    "delete_method": "recycle_bin"      # گزینه‌ها: recycle_bin, permanent
+    "duplicate_criteria": "name_size",  # گزینه‌ها: name_size, md5, byte_by_byte, visual, video
+    "delete_method": "recycle_bin",     # گزینه‌ها: recycle_bin, permanent
+    "hash_workers": DEFAULT_DEVICE_WORKERS,  # تعداد نخ‌های هش برای هر دستگاه
+    "hash_algorithm": DEFAULT_FILTER_ALGORITHM,  # الگوریتم هش جزئی (فیلتر نامزدها)
+    "confirm_algorithm": None,  # الگوریتم هش کامل برای تأیید نهایی؛ None یعنی همان hash_algorithm
+    "similarity_threshold": DEFAULT_SIMILARITY_THRESHOLD,  # حداکثر فاصله همینگ dHash در معیار شباهت تصویری
+    "incremental_scan": True  # پوشه‌های بدون تغییر (بر اساس زمان تغییر پوشه) دوباره فهرست نمی‌شوند
 }
 
 # ایجاد فایل پیکربندی در صورت عدم وجود و مخفی‌سازی آن
@@ -37,6 +57,16 @@ if not os.path.exists(CONFIG_FILE):
     except Exception as e:
         print(f"خطا در مخفی‌سازی فایل پیکربندی: {e}")
 
+def load_settings():
+    """خواندن تنظیمات ذخیره‌شده و تکمیل کلیدهای ناموجود با مقادیر پیش‌فرض"""
+    settings = dict(default_config)
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            settings.update(json.load(f))
+    except Exception as e:
+        print(f"خطا در بارگذاری تنظیمات فایل‌های تکراری: {e}")
+    return settings
+
 def format_size(size_bytes):
     try:
         if size_bytes == 0:
@@ -65,128 +95,375 @@ def get_file_category(file_path):
             return category
     return "سایر"
 
-# توابع کمکی برای تشخیص فایل‌های تکراری
-def get_file_md5(file_path, block_size=65536):
-    md5 = hashlib.md5()
-    try:
-        with open(file_path, "rb") as f:
-            while True:
-                data = f.read(block_size)
-                if not data:
-                    break
-                md5.update(data)
-        return md5.hexdigest()
-    except Exception:
-        return None
-
-def are_files_identical(file1, file2, block_size=65536):
-    try:
-        with open(file1, "rb") as f1, open(file2, "rb") as f2:
-            while True:
-                b1 = f1.read(block_size)
-                b2 = f2.read(block_size)
-                if b1 != b2:
-                    return False
-                if not b1:
-                    return True
-    except Exception:
-        return False
-
-def group_files_by_byte_to_byte(files):
-    groups = {}
-    processed = set()
-    for i in range(len(files)):
-        file1 = files[i]
-        if file1 in processed:
-            continue
-        group = [file1]
-        processed.add(file1)
-        for j in range(i + 1, len(files)):
-            file2 = files[j]
-            if file2 in processed:
-                continue
-            if are_files_identical(file1, file2):
-                group.append(file2)
-                processed.add(file2)
-        if len(group) > 1:
-            groups[file1] = group
-    return groups
-
-# کلاس رشته‌ای برای اسکن و گروه‌بندی فایل‌های تکراری
+# کلاس رشته‌ای برای اسکن و گروه‌بندی فایل‌های تکراری؛ روند اسکن در DuplicateScan (بدون Qt) است
 class DuplicateScanWorker(QThread):
     progress_changed = pyqtSignal(int)
     status_update = pyqtSignal(str)
-    result = pyqtSignal(dict)
+    report = pyqtSignal(str)
+    groups_found = pyqtSignal(dict)
+    result = pyqtSignal(dict)  # خلاصه پایانی: {"groups": تعداد گروه‌ها, "files": تعداد فایل‌ها, "cancelled": توقف توسط کاربر}
+    metrics = pyqtSignal(dict)  # رکورد عملکرد اسکن (زمان مراحل، سرعت، کش و حافظه)
 
-    def __init__(self, paths, criteria):
+    def __init__(self, paths, criteria, device_workers=None, hash_algorithm=DEFAULT_FILTER_ALGORITHM,
+                 confirm_algorithm=None, scan_filter=None, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD,
+                 checkpoint=None, resume_state=None, incremental=True):
+        super().__init__()
+        self.scan = DuplicateScan(
+            paths, criteria, device_workers, hash_algorithm, confirm_algorithm, scan_filter,
+            similarity_threshold, checkpoint, resume_state, incremental,
+            progress_callback=self.progress_changed.emit, status_callback=self.status_update.emit,
+            report_callback=self.report.emit, groups_callback=self.groups_found.emit,
+            result_callback=self.result.emit, metrics_callback=self.metrics.emit
+        )
+
+    def request_stop(self):
+        self.scan.request_stop()
+
+    def run(self):
+        self.scan.run()
+
+# حذف فایل‌های انتخاب‌شده در پس‌زمینه به صورت دسته‌ای و با ثبت در دفترچه حذف
+class DeletionWorker(QThread):
+    progress_changed = pyqtSignal(object, object, int)  # بایت آزادشده، کل بایت‌ها، تعداد فایل‌های پردازش‌شده
+    result = pyqtSignal(dict)  # {"deleted": مسیرها, "errors": [(مسیر، خطا)], "bytes": بایت آزادشده, "cancelled": ...}
+
+    def __init__(self, paths, deletion_method):
         super().__init__()
         self.paths = paths
-        self.criteria = criteria
+        self.deletion_method = deletion_method
+        self.stop_requested = False
+
+    def request_stop(self):
+        self.stop_requested = True
 
     def run(self):
-        all_found_files = []
-        total_paths = len(self.paths)
-        count = 0
-        for path in self.paths:
-            self.status_update.emit(f"اسکن مسیر: {path}")
-            for root, dirs, files in os.walk(path):
-                for file in files:
-                    all_found_files.append(os.path.join(root, file))
-            count += 1
-            self.progress_changed.emit(int(count/total_paths*50))
-        duplicate_groups = {}
-        total_files = len(all_found_files)
-        processed_count = 0
-        if self.criteria == "name_size":
-            temp = {}
-            for file_path in all_found_files:
-                try:
-                    key = (os.path.basename(file_path), os.path.getsize(file_path))
-                except Exception:
-                    continue
-                temp.setdefault(key, []).append(file_path)
-                processed_count += 1
-                self.progress_changed.emit(50 + int(processed_count/total_files*25))
-            duplicate_groups = {str(k): v for k, v in temp.items() if len(v) > 1}
-        elif self.criteria == "md5":
-            temp = {}
-            for file_path in all_found_files:
-                key = get_file_md5(file_path)
-                if key:
-                    temp.setdefault(key, []).append(file_path)
-                processed_count += 1
-                self.progress_changed.emit(50 + int(processed_count/total_files*25))
-            duplicate_groups = {key: v for key, v in temp.items() if len(v) > 1}
-        elif self.criteria == "byte_by_byte":
-            size_groups = {}
-            for file_path in all_found_files:
+        deleted, errors, reclaimed, cancelled = delete_files(
+            self.paths, self.deletion_method, DeletionJournal(), self.progress_changed.emit,
+            lambda: self.stop_requested
+        )
+        self.result.emit({"deleted": deleted, "errors": errors, "bytes": reclaimed, "cancelled": cancelled})
+
+# مدل مجازی نتایج: همه گروه‌ها و فایل‌ها در آرایه‌های فشرده نگه داشته می‌شوند و هر سطر
+# فقط هنگام نمایش ساخته می‌شود. هر گروه یک سطر عنوان و پس از آن سطرهای فایل‌های خود را دارد.
+class DuplicateGroupsModel(QAbstractItemModel):
+    HEADERS = ["فایل", "حجم", "تاریخ دسترسی", "تاریخ ایجاد"]
+    # حداکثر تعداد نتایج stat نگه‌داشته‌شده برای سطرهای نمایش داده شده
+    STAT_CACHE_SIZE = 20000
+
+    def __init__(self):
+        super().__init__()
+        self.category = "همه فایل‌ها"
+        self.group_font = QFont("Tahoma", 10, QFont.Bold)
+        self.clear_data()
+
+    def clear_data(self):
+        # داده کامل: مسیر همه فایل‌ها و شروع فایل‌های هر گروه در paths
+        self.group_keys = []
+        self.paths = []
+        self.group_offsets = array("q", [0])
+        # بیت انتخاب هر فایل و هر گروه (انتخاب گروه یعنی حذف همه فایل‌های آن)
+        self.checked = bytearray()
+        self.group_checked = bytearray()
+        self.stat_cache = {}
+        self.clear_view()
+
+    def clear_view(self):
+        # داده نمایش پس از فیلتر دسته: گروه‌های قابل نمایش، سطر عنوان هر گروه و فایل‌های قابل نمایش
+        self.view_groups = array("q")
+        self.view_rows = array("q")
+        self.view_file_offsets = array("q", [0])
+        self.view_files = array("q")
+        self.row_count = 0
+        # سطرهای داده قبلی که حین remove_paths حذفشان اعلام شده است
+        self.hidden_rows = None
+
+    def _add_view_groups(self, first_group):
+        """افزودن گروه‌های first_group به بعد به داده نمایش؛ خروجی: تعداد سطرهای افزوده‌شده"""
+        first_row = self.row_count
+        last_group = len(self.group_keys)
+        if self.category == "همه فایل‌ها":
+            # بدون فیلتر، نما همان داده کامل است و بدون حلقه روی فایل‌ها ساخته می‌شود
+            offsets = self.group_offsets
+            first_file = offsets[first_group]
+            self.view_groups.extend(range(first_group, last_group))
+            self.view_rows.extend(first_row - first_file + offsets[g] + g - first_group
+                                  for g in range(first_group, last_group))
+            self.view_files.extend(range(first_file, len(self.paths)))
+            base = self.view_file_offsets[-1] - first_file
+            self.view_file_offsets.extend(base + offsets[g] for g in range(first_group + 1, last_group + 1))
+            self.row_count += (len(self.paths) - first_file) + (last_group - first_group)
+            return self.row_count - first_row
+        for group in range(first_group, last_group):
+            start, end = self.group_offsets[group], self.group_offsets[group + 1]
+            files = [i for i in range(start, end) if get_file_category(self.paths[i]) == self.category]
+            if not files:
+                continue
+            self.view_groups.append(group)
+            self.view_rows.append(self.row_count)
+            self.view_files.extend(files)
+            self.view_file_offsets.append(len(self.view_files))
+            self.row_count += len(files) + 1
+        return self.row_count - first_row
+
+    def set_category(self, category):
+        self.beginResetModel()
+        self.category = category
+        self.clear_view()
+        self._add_view_groups(0)
+        self.endResetModel()
+
+    def append_groups(self, groups):
+        """افزودن گروه‌ها به انتهای مدل؛ خروجی: شماره گروه‌های افزوده‌شده در نما"""
+        first_group = len(self.group_keys)
+        first_file = len(self.paths)
+        for group_key, files in groups.items():
+            if len(files) < 2:
+                continue
+            self.group_keys.append(group_key)
+            self.paths.extend(files)
+            self.group_offsets.append(len(self.paths))
+        self.checked.extend(bytes(len(self.paths) - first_file))
+        self.group_checked.extend(bytes(len(self.group_keys) - first_group))
+        first_row = self.row_count
+        view_start = len(self.view_groups)
+        added_rows = self._add_view_groups(first_group)
+        if added_rows:
+            # سطرها پیش از اعلام به نما اضافه شده‌اند؛ اعلام یکجا کافی است چون نما هنوز آن‌ها را ندیده است
+            self.row_count = first_row
+            self.beginInsertRows(QModelIndex(), first_row, first_row + added_rows - 1)
+            self.row_count = first_row + added_rows
+            self.endInsertRows()
+        return range(view_start, len(self.view_groups))
+
+    def group_count(self):
+        return len(self.group_keys)
+
+    def locate(self, row):
+        """(شماره گروه در نما، شماره فایل در paths یا None برای سطر عنوان)"""
+        if self.hidden_rows:
+            for first, last in self.hidden_rows:
+                if row < first:
+                    break
+                row += last - first + 1
+        view_group = bisect_right(self.view_rows, row) - 1
+        offset = row - self.view_rows[view_group]
+        if offset == 0:
+            return view_group, None
+        return view_group, self.view_files[self.view_file_offsets[view_group] + offset - 1]
+
+    def visible_files(self, view_group):
+        return self.view_files[self.view_file_offsets[view_group]:self.view_file_offsets[view_group + 1]]
+
+    def file_stat(self, file_index):
+        info = self.stat_cache.get(file_index)
+        if info is None:
+            if len(self.stat_cache) >= self.STAT_CACHE_SIZE:
+                self.stat_cache.clear()
+            try:
+                st = os.stat(self.paths[file_index])
+                info = (format_size(st.st_size), time.ctime(st.st_atime), time.ctime(st.st_ctime))
+            except Exception:
+                info = (format_size(0), "نامشخص", "نامشخص")
+            self.stat_cache[file_index] = info
+        return info
+
+    # رابط QAbstractItemModel؛ مدل تخت است و فرزند ندارد
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row >= self.row_count:
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        view_group, file_index = self.locate(index.row())
+        column = index.column()
+        if file_index is None:
+            group = self.view_groups[view_group]
+            if role == Qt.DisplayRole and column == 0:
+                count = self.view_file_offsets[view_group + 1] - self.view_file_offsets[view_group]
+                return f"گروه: {self.group_keys[group]} ({count} فایل)"
+            if role == Qt.CheckStateRole and column == 0:
+                return Qt.Checked if self.group_checked[group] else Qt.Unchecked
+            if role == Qt.FontRole:
+                return self.group_font
+            return None
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return self.paths[file_index]
+            return self.file_stat(file_index)[column - 1]
+        if role == Qt.CheckStateRole and column == 0:
+            return Qt.Checked if self.checked[file_index] else Qt.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole or index.column() != 0:
+            return False
+        view_group, file_index = self.locate(index.row())
+        state = 1 if value == Qt.Checked else 0
+        if file_index is None:
+            self.group_checked[self.view_groups[view_group]] = state
+        else:
+            self.checked[file_index] = state
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def apply_selection(self, selection_mode, view_groups=None):
+        """تنظیم بیت‌های انتخاب بر اساس تاریخ ایجاد بدون ساختن هیچ سطری"""
+        if view_groups is None:
+            view_groups = range(len(self.view_groups))
+        for view_group in view_groups:
+            files = self.visible_files(view_group)
+            if selection_mode == "انتخاب دستی":
+                for file_index in files:
+                    self.checked[file_index] = 0
+                continue
+            ctimes = []
+            for file_index in files:
                 try:
-                    size = os.path.getsize(file_path)
+                    ctimes.append(os.path.getctime(self.paths[file_index]))
                 except Exception:
-                    continue
-                size_groups.setdefault(size, []).append(file_path)
-                processed_count += 1
-                self.progress_changed.emit(50 + int(processed_count/total_files*15))
-            for size, files in size_groups.items():
-                if len(files) > 1:
-                    groups = group_files_by_byte_to_byte(files)
-                    for k, v in groups.items():
-                        duplicate_groups[k] = v
-            self.progress_changed.emit(75)
-        self.progress_changed.emit(100)
-        self.result.emit(duplicate_groups)
+                    ctimes.append(float('inf') if "قدیمی‌ترین" in selection_mode else float('-inf'))
+            if selection_mode == "نگهداری قدیمی‌ترین ایجاد شده":
+                keep_ctime = min(ctimes)
+            elif selection_mode == "نگهداری جدیدترین ایجاد شده":
+                keep_ctime = max(ctimes)
+            else:
+                continue
+            for file_index, ctime in zip(files, ctimes):
+                self.checked[file_index] = 1 if ctime == keep_ctime else 0
+        if self.row_count:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.row_count - 1, 0), [Qt.CheckStateRole])
+
+    def iter_visible_groups(self):
+        """(انتخاب گروه، فهرست (مسیر، انتخاب) فایل‌های قابل نمایش) برای هر گروه"""
+        for view_group, group in enumerate(self.view_groups):
+            files = [(self.paths[i], bool(self.checked[i])) for i in self.visible_files(view_group)]
+            yield bool(self.group_checked[group]), files
+
+    def remove_paths(self, paths):
+        """
+        حذف فایل‌های حذف یا جایگزین‌شده از مدل؛ گروه‌هایی که کمتر از دو فایل برایشان می‌ماند کامل حذف
+        می‌شوند. بیت‌های انتخاب بقیه فایل‌ها و گروه‌ها حفظ می‌شوند و فقط سطرهای حذف‌شده با beginRemoveRows
+        اعلام می‌شوند تا موقعیت پیمایش و انتخاب نما بماند. خروجی: شماره گروه‌های نمای تازه که فایلی از
+        آن‌ها کم شده است
+        """
+        paths = set(paths)
+        gone = [i for i, file_path in enumerate(self.paths) if file_path in paths]
+        if not gone:
+            return []
+        offsets = self.group_offsets
+        counts = {}
+        for i in gone:
+            group = bisect_right(offsets, i) - 1
+            counts[group] = counts.get(group, 0) + 1
+        dropped_groups = sorted(g for g, n in counts.items() if offsets[g + 1] - offsets[g] - n < 2)
+        removed = set(gone)
+        for group in dropped_groups:
+            removed.update(range(offsets[group], offsets[group + 1]))
+        removed = sorted(removed)
+        dropped = set(dropped_groups)
+
+        # داده کامل تازه با همان بیت‌های انتخاب
+        paths_kept, checked = [], bytearray()
+        start = 0
+        for i in removed + [len(self.paths)]:
+            paths_kept.extend(self.paths[start:i])
+            checked += self.checked[start:i]
+            start = i + 1
+        group_keys, group_checked, group_offsets = [], bytearray(), array("q", [0])
+        for group, group_key in enumerate(self.group_keys):
+            if group in dropped:
+                continue
+            group_keys.append(group_key)
+            group_checked.append(self.group_checked[group])
+            end = offsets[group + 1]
+            group_offsets.append(end - bisect_right(removed, end - 1))
+
+        # سطرهای حذف‌شده نما و نمای تازه؛ گروهی که فایل قابل نمایشی برایش نماند از نما کنار می‌رود
+        removed_set = set(removed)
+        rows = []
+        view_groups, view_rows, view_file_offsets, view_files = array("q"), array("q"), array("q", [0]), array("q")
+        changed, row_count = [], 0
+        for view_group, group in enumerate(self.view_groups):
+            header = self.view_rows[view_group]
+            files = self.visible_files(view_group)
+            kept = [i for i in files if i not in removed_set]
+            if not kept:
+                rows.append((header, header + len(files)))
+                continue
+            if len(kept) < len(files):
+                changed.append(len(view_groups))
+                rows.extend((header + offset, header + offset)
+                            for offset, i in enumerate(files, 1) if i in removed_set)
+            view_groups.append(group - bisect_right(dropped_groups, group))
+            view_rows.append(row_count)
+            view_files.extend(i - bisect_right(removed, i) for i in kept)
+            view_file_offsets.append(len(view_files))
+            row_count += len(kept) + 1
+
+        # اعلام بازه‌های پیوسته از پایین به بالا؛ میان اعلام‌ها سطرهای اعلام‌شده از داده قبلی پنهان
+        # می‌شوند (hidden_rows) تا مدل در هر لحظه با تعداد سطرها هم‌خوان باشد، سپس داده تازه جایگزین می‌شود
+        ranges = []
+        for first, last in rows:
+            if ranges and ranges[-1][1] + 1 == first:
+                ranges[-1] = (ranges[-1][0], last)
+            else:
+                ranges.append((first, last))
+        self.hidden_rows = []
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self.hidden_rows.insert(0, (first, last))
+            self.row_count -= last - first + 1
+            self.endRemoveRows()
+        self.hidden_rows = None
+        self.group_keys, self.paths, self.group_offsets = group_keys, paths_kept, group_offsets
+        self.checked, self.group_checked = checked, group_checked
+        self.view_groups, self.view_rows = view_groups, view_rows
+        self.view_file_offsets, self.view_files = view_file_offsets, view_files
+        self.row_count = row_count
+        self.stat_cache = {}
+        if row_count:
+            # تعداد فایل سطر عنوان گروه‌ها و شماره فایل سطرهای پایین‌تر عوض شده است
+            self.dataChanged.emit(self.index(0, 0), self.index(row_count - 1, len(self.HEADERS) - 1))
+        return changed
 
 # دیالوگ نمایش فایل‌های گروه‌بندی شده
 class DuplicateFilesGroupDialog(QDialog):
     def __init__(self, duplicate_groups, deletion_method, status_callback, tray):
         super().__init__()
         self.setWindowTitle("نتایج اسکن فایل‌های تکراری")
-        self.duplicate_groups = duplicate_groups
+        self.model = DuplicateGroupsModel()
         self.deletion_method = deletion_method
         self.status_callback = status_callback
         self.tray = tray
+        self.scan_running = False
+        self.deletion_worker = None
         self.resize(1000, 700)
         self.init_ui()
+        self.append_groups(duplicate_groups)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -223,21 +500,41 @@ class DuplicateFilesGroupDialog(QDialog):
         category_layout.addWidget(self.category_combo)
         layout.addLayout(category_layout)
 
-        # درخت فایل‌ها
-        self.tree = QTreeWidget()
-        self.tree.setColumnCount(4)
-        self.tree.setHeaderLabels(["فایل", "حجم", "تاریخ دسترسی", "تاریخ ایجاد"])
-        self.tree.header().setDefaultSectionSize(300)
+        # نمای فایل‌ها؛ QTableView برخلاف QTreeView سطرها را پیش از نمایش پیمایش نمی‌کند و
+        # با ارتفاع ثابت سطرها فقط سطرهای قابل مشاهده از مدل خوانده می‌شوند
+        self.tree = QTableView()
+        self.tree.setModel(self.model)
+        self.tree.setShowGrid(False)
+        self.tree.setSelectionBehavior(QTableView.SelectRows)
+        self.tree.verticalHeader().hide()
+        self.tree.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.tree.verticalHeader().setDefaultSectionSize(24)
+        self.tree.horizontalHeader().setDefaultSectionSize(300)
+        self.tree.horizontalHeader().setStretchLastSection(True)
         font = QFont("Tahoma", 10)
         self.tree.setFont(font)
-        self.update_tree()
         layout.addWidget(self.tree)
 
+        # پیشرفت حذف بر اساس حجم آزادشده
+        self.deleteProgress = QProgressBar()
+        self.deleteProgress.setRange(0, 1000)
+        self.deleteProgress.hide()
+        layout.addWidget(self.deleteProgress)
+
         # دکمه‌ها
         action_layout = QHBoxLayout()
         self.delete_button = QPushButton("حذف فایل‌های انتخاب شده")
         self.delete_button.clicked.connect(self.delete_selected_files)
         action_layout.addWidget(self.delete_button)
+        self.hardlink_button = QPushButton("جایگزینی با هاردلینک")
+        self.hardlink_button.setToolTip("فایل‌های انتخاب شده با هاردلینک به فایل باقی‌مانده گروه جایگزین می‌شوند؛ همه مسیرها معتبر می‌مانند.")
+        self.hardlink_button.clicked.connect(lambda: self.link_selected_files("hardlink"))
+        action_layout.addWidget(self.hardlink_button)
+        self.reflink_button = QPushButton("جایگزینی با reflink")
+        self.reflink_button.setToolTip("کپی reflink (FICLONE) روی سیستم‌فایل‌هایی مانند Btrfs و XFS؛ بلوک‌ها مشترک می‌شوند.")
+        self.reflink_button.setEnabled(reflink_supported())
+        self.reflink_button.clicked.connect(lambda: self.link_selected_files("reflink"))
+        action_layout.addWidget(self.reflink_button)
         self.cancel_button = QPushButton("انصراف")
         self.cancel_button.clicked.connect(self.reject)
         action_layout.addWidget(self.cancel_button)
@@ -246,80 +543,40 @@ class DuplicateFilesGroupDialog(QDialog):
         self.setLayout(layout)
 
     def update_tree(self):
-        self.tree.clear()
-        selected_category = self.category_combo.currentText()
-        for group_key, files in self.duplicate_groups.items():
-            if len(files) < 2:
-                continue
-            group_files = []
-            for file_path in files:
-                category = get_file_category(file_path)
-                if selected_category == "همه فایل‌ها" or category == selected_category:
-                    group_files.append(file_path)
-            if not group_files:
-                continue
-            group_title = f"گروه: {group_key} ({len(group_files)} فایل)"
-            group_item = QTreeWidgetItem(self.tree, [group_title, "", "", ""])
-            group_item.setFlags(group_item.flags() | Qt.ItemIsUserCheckable)
-            group_item.setCheckState(0, Qt.Unchecked)
-            for file_path in group_files:
-                try:
-                    size = os.path.getsize(file_path)
-                    atime = time.ctime(os.path.getatime(file_path))
-                    ctime = time.ctime(os.path.getctime(file_path))
-                except Exception:
-                    size = 0
-                    atime = "نامشخص"
-                    ctime = "نامشخص"
-                file_item = QTreeWidgetItem(group_item, [file_path, format_size(size), atime, ctime])
-                file_item.setFlags(file_item.flags() | Qt.ItemIsUserCheckable)
-                file_item.setCheckState(0, Qt.Unchecked)
-        self.tree.expandAll()
+        self.model.set_category(self.category_combo.currentText())
+
+    def append_groups(self, groups):
+        """افزودن گروه‌های تازه رسیده از اسکن در حال اجرا بدون بازسازی کل نما"""
+        view_groups = self.model.append_groups(groups)
+        selection_mode = self.select_combo.currentText()
+        if view_groups and selection_mode != "انتخاب دستی":
+            self.model.apply_selection(selection_mode, view_groups)
+
+    def set_scan_running(self, running):
+        self.scan_running = running
+        if running:
+            self.setWindowTitle("نتایج اسکن فایل‌های تکراری (اسکن در حال انجام...)")
+        else:
+            self.setWindowTitle("نتایج اسکن فایل‌های تکراری")
+
+    def remove_paths(self, paths):
+        # حذف فایل‌های پردازش‌شده از نما تا نتایج اسکن در حال اجرا از دست نرود؛ انتخاب خودکار فقط برای
+        # گروه‌هایی که فایلی از آن‌ها کم شده دوباره اعمال می‌شود و انتخاب‌های دستی بقیه می‌ماند
+        changed = self.model.remove_paths(paths)
+        selection_mode = self.select_combo.currentText()
+        if changed and selection_mode != "انتخاب دستی":
+            self.model.apply_selection(selection_mode, changed)
 
     def apply_selection(self, selection_mode):
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            group_item = root.child(i)
-            files = []
-            for j in range(group_item.childCount()):
-                file_item = group_item.child(j)
-                file_path = file_item.text(0)
-                try:
-                    ctime = os.path.getctime(file_path)
-                except Exception:
-                    ctime = float('inf') if "قدیمی‌ترین" in selection_mode else float('-inf')
-                files.append((file_path, ctime))
-            if not files:
-                continue
-            if selection_mode == "انتخاب دستی":
-                for j in range(group_item.childCount()):
-                    group_item.child(j).setCheckState(0, Qt.Unchecked)
-            elif selection_mode == "نگهداری قدیمی‌ترین ایجاد شده":
-                oldest_ctime = min(f[1] for f in files)
-                for j in range(group_item.childCount()):
-                    file_item = group_item.child(j)
-                    file_ctime = files[j][1]
-                    file_item.setCheckState(0, Qt.Unchecked if file_ctime != oldest_ctime else Qt.Checked)
-            elif selection_mode == "نگهداری جدیدترین ایجاد شده":
-                latest_ctime = max(f[1] for f in files)
-                for j in range(group_item.childCount()):
-                    file_item = group_item.child(j)
-                    file_ctime = files[j][1]
-                    file_item.setCheckState(0, Qt.Unchecked if file_ctime != latest_ctime else Qt.Checked)
+        self.model.apply_selection(selection_mode)
 
     def delete_selected_files(self):
         files_to_delete = []
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            group_item = root.child(i)
-            if group_item.checkState(0) == Qt.Checked:
-                for j in range(group_item.childCount()):
-                    files_to_delete.append(group_item.child(j).text(0))
+        for group_checked, files in self.model.iter_visible_groups():
+            if group_checked:
+                files_to_delete.extend(file_path for file_path, _ in files)
             else:
-                for j in range(group_item.childCount()):
-                    file_item = group_item.child(j)
-                    if file_item.checkState(0) == Qt.Checked:
-                        files_to_delete.append(file_item.text(0))
+                files_to_delete.extend(file_path for file_path, checked in files if checked)
         if not files_to_delete:
             self.status_callback("هیچ فایلی برای حذف انتخاب نشده است!")
             return
@@ -330,34 +587,140 @@ class DuplicateFilesGroupDialog(QDialog):
         )
         if confirm != QMessageBox.Yes:
             return
+        self.set_actions_enabled(False)
+        self.cancel_button.setText("توقف حذف")
+        self.deleteProgress.setValue(0)
+        self.deleteProgress.setFormat(f"در حال حذف {len(files_to_delete)} فایل...")
+        self.deleteProgress.show()
+        self.deletion_worker = DeletionWorker(files_to_delete, self.deletion_method)
+        self.deletion_worker.progress_changed.connect(self.update_deletion_progress)
+        self.deletion_worker.result.connect(self.handle_deletion_result)
+        self.deletion_worker.start()
+
+    def set_actions_enabled(self, enabled):
+        self.delete_button.setEnabled(enabled)
+        self.hardlink_button.setEnabled(enabled)
+        self.reflink_button.setEnabled(enabled and reflink_supported())
+        self.select_combo.setEnabled(enabled)
+        self.category_combo.setEnabled(enabled)
+
+    def update_deletion_progress(self, reclaimed, total_bytes, done):
+        if total_bytes:
+            self.deleteProgress.setValue(int(reclaimed / total_bytes * 1000))
+        self.deleteProgress.setFormat(
+            f"{done} فایل پردازش شد، {format_size(reclaimed)} از {format_size(total_bytes)} آزاد شد"
+        )
+
+    def handle_deletion_result(self, result):
+        self.deletion_worker = None
+        self.deleteProgress.hide()
+        self.cancel_button.setText("انصراف")
+        self.set_actions_enabled(True)
+        deleted, errors = result["deleted"], result["errors"]
+        summary = f"{len(deleted)} فایل حذف شد و {format_size(result['bytes'])} آزاد شد."
+        if errors:
+            # نمایش فقط چند خطای اول؛ فهرست کامل در دفترچه حذف ثبت شده است
+            lines = [f"{file_path}: {error}" for file_path, error in errors[:20]]
+            if len(errors) > 20:
+                lines.append(f"... و {len(errors) - 20} خطای دیگر")
+            self.status_callback(summary + "\nبرخی فایل‌ها حذف نشدند:\n" + "\n".join(lines))
+        elif result["cancelled"]:
+            self.status_callback("حذف متوقف شد. " + summary)
+        else:
+            self.status_callback(summary)
+            self.tray.showMessage("حذف فایل", "فایل‌های انتخاب شده حذف شدند.", QSystemTrayIcon.Information, 3000)
+        if self.scan_running or result["cancelled"] or errors:
+            # به‌روزرسانی یکجای نما پس از پایان حذف
+            self.remove_paths(deleted)
+        else:
+            self.accept()
+
+    def reject(self):
+        # تا پایان حذف دیالوگ بسته نمی‌شود؛ دکمه انصراف حذف را متوقف می‌کند
+        if self.deletion_worker is not None:
+            self.deletion_worker.request_stop()
+            return
+        super().reject()
+
+    def closeEvent(self, event):
+        if self.deletion_worker is not None:
+            self.deletion_worker.request_stop()
+            event.ignore()
+            return
+        super().closeEvent(event)
+
+    def link_selected_files(self, mode):
+        # برای هر گروه، فایل‌های انتخاب شده به اولین فایل انتخاب نشده همان گروه لینک می‌شوند
+        plan = []
+        skipped = 0
+        for group_checked, files in self.model.iter_visible_groups():
+            targets = [file_path for file_path, checked in files if checked]
+            keeps = [file_path for file_path, checked in files if not checked]
+            if not targets:
+                continue
+            if group_checked or not keeps:
+                skipped += 1
+                continue
+            plan.extend((target, keeps[0]) for target in targets)
+        if not plan:
+            self.status_callback("هیچ فایلی برای جایگزینی انتخاب نشده است (در هر گروه حداقل یک فایل باید انتخاب نشده بماند).")
+            return
+        title = "هاردلینک" if mode == "hardlink" else "reflink"
+        confirm = QMessageBox.question(
+            self, "تایید جایگزینی",
+            f"آیا از جایگزینی {len(plan)} فایل با {title} مطمئن هستید؟",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if confirm != QMessageBox.Yes:
+            return
+        replace = replace_with_hardlink if mode == "hardlink" else replace_with_reflink
         errors = []
-        for file_path in files_to_delete:
+        for target, keep in plan:
             try:
-                normalized_path = os.path.normpath(file_path)
-                if self.deletion_method == "recycle_bin":
-                    from send2trash import send2trash
-                    send2trash(normalized_path)
-                else:
-                    os.remove(normalized_path)
+                replace(os.path.normpath(target), os.path.normpath(keep))
             except Exception as e:
-                errors.append(f"{file_path}: {e}")
+                errors.append(f"{target}: {e}")
+        if skipped:
+            errors.append(f"{skipped} گروه که همه فایل‌های آن انتخاب شده بود نادیده گرفته شد.")
         if errors:
-            self.status_callback("برخی فایل‌ها حذف نشدند:\n" + "\n".join(errors))
+            self.status_callback("برخی فایل‌ها جایگزین نشدند:\n" + "\n".join(errors))
         else:
-            self.status_callback("فایل‌های انتخاب شده با موفقیت حذف شدند.")
-            self.tray.showMessage("حذف فایل", "فایل‌های انتخاب شده حذف شدند.", QSystemTrayIcon.Information, 3000)
-        self.accept()
+            self.status_callback(f"{len(plan)} فایل با {title} جایگزین شدند.")
+            self.tray.showMessage("جایگزینی فایل", f"فایل‌های انتخاب شده با {title} جایگزین شدند.", QSystemTrayIcon.Information, 3000)
+        if self.scan_running:
+            self.remove_paths(target for target, _ in plan)
+        else:
+            self.accept()
 
 # صفحه اصلی تب فایل‌های تکراری
 class DuplicateFilesMainPage(QWidget):
+    # تعداد پوشه‌های تغییرکرده مسیرهای اسکن‌شده و فایل‌های ازدست‌رفته نتایج (از نخ پیگیری)
+    watchChanges = pyqtSignal(int, object)
+
     def __init__(self, status_callback, tray):
         super().__init__()
         self.status_callback = status_callback
         self.tray = tray
-        self.deletion_method = default_config.get("delete_method", "recycle_bin")
-        self.duplicate_criteria = default_config.get("duplicate_criteria", "name_size")
+        settings = load_settings()
+        self.deletion_method = settings.get("delete_method", "recycle_bin")
+        self.duplicate_criteria = settings.get("duplicate_criteria", "name_size")
+        self.hash_workers = settings.get("hash_workers", DEFAULT_DEVICE_WORKERS)
+        self.hash_algorithm = settings.get("hash_algorithm", DEFAULT_FILTER_ALGORITHM)
+        self.confirm_algorithm = settings.get("confirm_algorithm")
+        self.similarity_threshold = settings.get("similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD)
+        self.incremental_scan = settings.get("incremental_scan", True)
+        self.scan_filter = ScanFilter.from_settings(settings)
         self.worker = None
+        self.dialog = None
+        self.missed_groups = False
+        self.watcher = None
+        self.watched_paths = None
+        self.watchChanges.connect(self.handle_watch_changes)
         self.init_ui()
+        # حذف نیمه‌کاره قبلی (بسته شدن برنامه وسط حذف) در دفترچه بسته و گزارش می‌شود
+        recovered = DeletionJournal().recover()
+        if recovered:
+            self.status_callback(f"حذف قبلی نیمه‌کاره مانده بود؛ {recovered} فایل حذف‌شده در دفترچه حذف ثبت شد.")
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -377,6 +740,25 @@ class DuplicateFilesMainPage(QWidget):
         self.startScanButton = QPushButton("شروع اسکن عمیق")
         self.startScanButton.clicked.connect(self.start_deep_scan)
         layout.addWidget(self.startScanButton)
+        self.stopScanButton = QPushButton("توقف اسکن")
+        self.stopScanButton.setToolTip("اسکن متوقف و پیشرفت آن ذخیره می‌شود تا بعداً از همین نقطه ادامه یابد.")
+        self.stopScanButton.setEnabled(False)
+        self.stopScanButton.clicked.connect(self.stop_scan)
+        layout.addWidget(self.stopScanButton)
+        # خلاصه مراحل و سرعت خواندن آخرین اسکن
+        self.reportLabel = QLabel()
+        self.reportLabel.setWordWrap(True)
+        layout.addWidget(self.reportLabel)
+        # خلاصه عملکرد آخرین اسکن؛ همین اطلاعات در app.log نیز ثبت می‌شود
+        self.metricsGroup = QGroupBox("خلاصه عملکرد اسکن")
+        metrics_layout = QVBoxLayout()
+        self.metricsLabel = QLabel()
+        self.metricsLabel.setWordWrap(True)
+        self.metricsLabel.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        metrics_layout.addWidget(self.metricsLabel)
+        self.metricsGroup.setLayout(metrics_layout)
+        self.metricsGroup.hide()
+        layout.addWidget(self.metricsGroup)
         self.setLayout(layout)
 
     def scan_drives(self):
@@ -431,26 +813,123 @@ class DuplicateFilesMainPage(QWidget):
         if not selected_paths:
             self.status_callback("هیچ مسیر انتخاب نشده است!")
             return
+        checkpoint = ScanCheckpoint(scan_signature(selected_paths, self.duplicate_criteria, {
+            "filter": self.scan_filter.signature(),
+            "hash_algorithm": self.hash_algorithm,
+            "confirm_algorithm": self.confirm_algorithm,
+            "similarity_threshold": self.similarity_threshold,
+        }))
+        resume_state = checkpoint.load()
+        if resume_state is not None:
+            confirm = QMessageBox.question(
+                self, "ادامه اسکن",
+                f"اسکن نیمه‌کاره‌ای از همین مسیرها ({time.ctime(resume_state.get('saved_at', 0))}) ذخیره شده است.\n"
+                "آیا اسکن از همان نقطه ادامه یابد؟",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if confirm != QMessageBox.Yes:
+                resume_state = None
+        if resume_state is None:
+            checkpoint.clear()
         self.scanButton.setEnabled(False)
         self.addFolderButton.setEnabled(False)
         self.startScanButton.setEnabled(False)
         self.progressBar.setValue(0)
+        self.reportLabel.clear()
+        if self.dialog is not None:
+            self.dialog.close()
+            self.dialog = None
+        self.stop_watching()
+        self.scan_paths = selected_paths
         self.status_callback("شروع اسکن عمیق...")
-        self.worker = DuplicateScanWorker(selected_paths, self.duplicate_criteria)
+        self.worker = DuplicateScanWorker(
+            selected_paths, self.duplicate_criteria, self.hash_workers,
+            self.hash_algorithm, self.confirm_algorithm, self.scan_filter, self.similarity_threshold,
+            checkpoint, resume_state, self.incremental_scan
+        )
         self.worker.progress_changed.connect(self.progressBar.setValue)
         self.worker.status_update.connect(self.status_callback)
+        self.worker.report.connect(self.show_scan_report)
+        self.worker.groups_found.connect(self.handle_groups_batch)
         self.worker.result.connect(self.handle_scan_result)
+        self.worker.metrics.connect(self.show_scan_metrics)
         self.worker.start()
+        self.stopScanButton.setEnabled(True)
+
+    def stop_scan(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.request_stop()
+            self.stopScanButton.setEnabled(False)
+            self.status_callback("در حال توقف اسکن و ذخیره پیشرفت...")
+
+    def show_scan_report(self, report):
+        self.reportLabel.setText(report)
+        self.status_callback(report, 10000)
 
-    def handle_scan_result(self, duplicate_groups):
+    def show_scan_metrics(self, record):
+        self.metricsLabel.setText(format_metrics(record))
+        self.metricsGroup.show()
+
+    def handle_groups_batch(self, groups):
+        # دیالوگ نتایج با اولین دسته باز می‌شود و دسته‌های بعدی به آن اضافه می‌شوند
+        if self.dialog is None:
+            self.dialog = DuplicateFilesGroupDialog({}, self.deletion_method, self.status_callback, self.tray)
+            self.dialog.set_scan_running(True)
+            self.dialog.show()
+            self.missed_groups = False
+        elif not self.dialog.isVisible():
+            # کاربر دیالوگ را بسته است؛ در پایان اسکن دوباره نمایش داده می‌شود
+            self.missed_groups = True
+        self.dialog.append_groups(groups)
+
+    def handle_scan_result(self, summary):
         self.scanButton.setEnabled(True)
         self.addFolderButton.setEnabled(True)
         self.startScanButton.setEnabled(True)
-        if duplicate_groups:
-            dlg = DuplicateFilesGroupDialog(duplicate_groups, self.deletion_method, self.status_callback, self.tray)
-            dlg.exec_()
-        else:
+        self.stopScanButton.setEnabled(False)
+        if summary.get("cancelled"):
+            self.status_callback("اسکن متوقف شد؛ اسکن بعدی همین مسیرها می‌تواند از همین نقطه ادامه یابد.", 10000)
+            if self.dialog is not None:
+                self.dialog.set_scan_running(False)
+            return
+        if self.dialog is None:
             self.status_callback("هیچ فایل تکراری یافت نشد.")
+            return
+        self.dialog.set_scan_running(False)
+        if self.missed_groups and not self.dialog.isVisible() and self.dialog.model.group_count():
+            self.dialog.show()
+        self.status_callback(f"{summary['groups']} گروه تکراری شامل {summary['files']} فایل یافت شد.")
+        # فایل‌هایی که پس از اسکن حذف یا جابه‌جا شوند بدون اسکن دوباره از نتایج کنار گذاشته می‌شوند
+        self.watched_paths = WatchedPaths(self.dialog.model.paths)
+        self.watcher = SharedWatch(self.scan_paths, self.on_watch_changes, self.scan_filter.is_excluded_dir)
+        self.watcher.start()
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def on_watch_changes(self, dirs, trees):
+        # در نخ پیگیری: فقط فایل‌های نتایج در پوشه‌های تغییرکرده بررسی و فایل‌های ازدست‌رفته فرستاده می‌شوند
+        watched_paths = self.watched_paths
+        # نتایج پیمایش این پوشه‌ها در کش اسکن مشترک دیگر معتبر نیستند
+        cache = get_scan_cache()
+        for path in dirs | trees:
+            cache.invalidate(path)
+        self.watchChanges.emit(len(dirs) + len(trees), watched_paths.missing(dirs, trees))
+
+    def handle_watch_changes(self, changed, gone):
+        # حذف‌های خود دیالوگ پس از پایان حذف یکجا اعمال می‌شوند
+        if self.dialog is None or self.dialog.deletion_worker is not None:
+            return
+        if gone:
+            self.watched_paths.discard(gone)
+            self.dialog.remove_paths(gone)
+            self.status_callback(f"{len(gone)} فایل پس از اسکن حذف یا جابه‌جا شده بود و از نتایج کنار گذاشته شد.")
+        elif self.incremental_scan:
+            # فایل‌های تازه فقط با اسکن دوباره گروه‌بندی می‌شوند؛ اسکن افزایشی فقط همین پوشه‌ها را می‌خواند
+            self.status_callback(f"{changed} پوشه پس از اسکن تغییر کرده است؛ "
+                                 "اسکن دوباره فقط پوشه‌های تغییرکرده را فهرست می‌کند.")
 
 # صفحه تنظیمات تب فایل‌های تکراری
 class DuplicateFilesSettingsPage(QWidget):
@@ -546,15 +1025,63 @@ class DuplicateFilesSettingsPage(QWidget):
         dc_label = QLabel("معیاری را که بر اساس آن فایل‌های تکراری شناسایی می‌شوند مشخص کنید:")
         dc_layout.addWidget(dc_label)
         self.radioNameSize = QRadioButton("نام فایل و اندازه فایل")
-        self.radioMD5 = QRadioButton("MD5")
+        self.radioMD5 = QRadioButton("هش محتوا")
         self.radioByte = QRadioButton("بایت به بایت")
+        self.radioVisual = QRadioButton("شباهت تصویری (تصاویر با اندازه یا فشرده‌سازی متفاوت)")
+        self.radioVisual.setEnabled(image_similarity_available())
+        self.radioVideo = QRadioButton("شباهت ویدیویی (ویدیوهای با ظرف، کدک یا نرخ بیت متفاوت)")
+        self.radioVideo.setEnabled(video_similarity_available())
         self.radioNameSize.setChecked(True)
         dc_layout.addWidget(self.radioNameSize)
         dc_layout.addWidget(self.radioMD5)
         dc_layout.addWidget(self.radioByte)
+        dc_layout.addWidget(self.radioVisual)
+        dc_layout.addWidget(self.radioVideo)
+        algo_form = QFormLayout()
+        self.hashAlgoCombo = QComboBox()
+        self.confirmAlgoCombo = QComboBox()
+        self.confirmAlgoCombo.addItem("بدون تأیید جداگانه", None)
+        for name in available_hash_algorithms():
+            self.hashAlgoCombo.addItem(HASH_ALGORITHMS[name]["title"], name)
+            if HASH_ALGORITHMS[name]["cryptographic"]:
+                self.confirmAlgoCombo.addItem(HASH_ALGORITHMS[name]["title"], name)
+        algo_form.addRow("الگوریتم فیلتر نامزدها (هش جزئی):", self.hashAlgoCombo)
+        algo_form.addRow("الگوریتم تأیید نهایی (هش کامل):", self.confirmAlgoCombo)
+        self.similaritySpin = QSpinBox()
+        self.similaritySpin.setRange(0, 32)
+        self.similaritySpin.setValue(DEFAULT_SIMILARITY_THRESHOLD)
+        self.similaritySpin.setToolTip("حداکثر تعداد بیت‌های متفاوت از ۶۴ بیت هش تصویر یا هر فریم ویدیو؛ عدد کمتر یعنی سخت‌گیرانه‌تر")
+        algo_form.addRow("آستانه شباهت تصویری و ویدیویی (فاصله همینگ):", self.similaritySpin)
+        dc_layout.addLayout(algo_form)
         self.dupCriteriaGroup.setLayout(dc_layout)
         layout.addWidget(self.dupCriteriaGroup)
 
+        self.hashWorkersGroup = QGroupBox("هش موازی")
+        hw_layout = QVBoxLayout()
+        hw_label = QLabel("تعداد نخ‌های هم‌زمان هش برای هر دستگاه (SSD مقدار بالا، دیسک چرخان ۱ تا ۲):")
+        hw_layout.addWidget(hw_label)
+        hw_form = QFormLayout()
+        self.ssdWorkersSpin = QSpinBox()
+        self.ssdWorkersSpin.setRange(1, 64)
+        hw_form.addRow("SSD:", self.ssdWorkersSpin)
+        self.hddWorkersSpin = QSpinBox()
+        self.hddWorkersSpin.setRange(1, 8)
+        hw_form.addRow("دیسک چرخان (HDD):", self.hddWorkersSpin)
+        self.unknownWorkersSpin = QSpinBox()
+        self.unknownWorkersSpin.setRange(1, 64)
+        hw_form.addRow("نوع نامشخص:", self.unknownWorkersSpin)
+        hw_layout.addLayout(hw_form)
+        self.deviceWorkersTable = QTableWidget(0, 3)
+        self.deviceWorkersTable.setHorizontalHeaderLabels(["دستگاه", "نوع", "تعداد نخ (۰ = پیش‌فرض)"])
+        self.deviceWorkersTable.horizontalHeader().setStretchLastSection(True)
+        self.deviceWorkersTable.setMinimumHeight(120)
+        hw_layout.addWidget(self.deviceWorkersTable)
+        self.incrementalCheck = QCheckBox("اسکن افزایشی (پوشه‌های بدون تغییر دوباره فهرست نشوند)")
+        self.incrementalCheck.setChecked(True)
+        hw_layout.addWidget(self.incrementalCheck)
+        self.hashWorkersGroup.setLayout(hw_layout)
+        layout.addWidget(self.hashWorkersGroup)
+
         self.deleteMethodGroup = QGroupBox("روش حذف")
         dm_layout = QVBoxLayout()
         self.radioRecycle = QRadioButton("انتقال به سطل بازیافت")
@@ -575,6 +1102,21 @@ class DuplicateFilesSettingsPage(QWidget):
         main_layout.addWidget(scroll)
         self.setLayout(main_layout)
 
+    def populate_device_workers(self, device_workers):
+        self.deviceWorkersTable.setRowCount(0)
+        devices = list(dict.fromkeys(list(get_mount_devices().values()) + list(device_workers.keys())))
+        for device in devices:
+            row = self.deviceWorkersTable.rowCount()
+            self.deviceWorkersTable.insertRow(row)
+            self.deviceWorkersTable.setItem(row, 0, QTableWidgetItem(device))
+            rotational = is_rotational(device)
+            disk_type = "HDD" if rotational is True else ("SSD" if rotational is False else "نامشخص")
+            self.deviceWorkersTable.setItem(row, 1, QTableWidgetItem(disk_type))
+            spin = QSpinBox()
+            spin.setRange(0, 64)
+            spin.setValue(int(device_workers.get(device, 0)))
+            self.deviceWorkersTable.setCellWidget(row, 2, spin)
+
     def add_exclude(self):
         path = QFileDialog.getExistingDirectory(self, "انتخاب مسیر برای اضافه کردن")
         if path:
@@ -618,8 +1160,22 @@ class DuplicateFilesSettingsPage(QWidget):
             "allowed_file_types": [self.fileTypeList.item(i).text() for i in range(self.fileTypeList.count())],
             "only_scan_larger_than": self.sizeSlider.value() if self.sizeCheck.isChecked() else None,
             "scan_extensions_only": [self.extList.item(i).text() for i in range(self.extList.count())],
-            "duplicate_criteria": "name_size" if self.radioNameSize.isChecked() else ("md5" if self.radioMD5.isChecked() else "byte_by_byte"),
-            "delete_method": "recycle_bin" if self.radioRecycle.isChecked() else "permanent"
+            "duplicate_criteria": "name_size" if self.radioNameSize.isChecked() else ("md5" if self.radioMD5.isChecked() else ("visual" if self.radioVisual.isChecked() else ("video" if self.radioVideo.isChecked() else "byte_by_byte"))),
+            "delete_method": "recycle_bin" if self.radioRecycle.isChecked() else "permanent",
+            "hash_algorithm": self.hashAlgoCombo.currentData(),
+            "confirm_algorithm": self.confirmAlgoCombo.currentData(),
+            "similarity_threshold": self.similaritySpin.value(),
+            "incremental_scan": self.incrementalCheck.isChecked(),
+            "hash_workers": {
+                "ssd": self.ssdWorkersSpin.value(),
+                "hdd": self.hddWorkersSpin.value(),
+                "unknown": self.unknownWorkersSpin.value(),
+                "devices": {
+                    self.deviceWorkersTable.item(row, 0).text(): self.deviceWorkersTable.cellWidget(row, 2).value()
+                    for row in range(self.deviceWorkersTable.rowCount())
+                    if self.deviceWorkersTable.cellWidget(row, 2).value() > 0
+                }
+            }
         }
         try:
             # حذف فایل کانفیگ قبلی در صورت وجود
@@ -670,12 +1226,28 @@ class DuplicateFilesSettingsPage(QWidget):
                     self.radioNameSize.setChecked(True)
                 elif crit == "md5":
                     self.radioMD5.setChecked(True)
+                elif crit == "visual":
+                    self.radioVisual.setChecked(True)
+                elif crit == "video":
+                    self.radioVideo.setChecked(True)
                 else:
                     self.radioByte.setChecked(True)
                 if settings.get("delete_method", "recycle_bin") == "recycle_bin":
                     self.radioRecycle.setChecked(True)
                 else:
                     self.radioPermanent.setChecked(True)
+                index = self.hashAlgoCombo.findData(settings.get("hash_algorithm", DEFAULT_FILTER_ALGORITHM))
+                self.hashAlgoCombo.setCurrentIndex(max(index, 0))
+                index = self.confirmAlgoCombo.findData(settings.get("confirm_algorithm"))
+                self.confirmAlgoCombo.setCurrentIndex(max(index, 0))
+                self.similaritySpin.setValue(settings.get("similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD))
+                self.incrementalCheck.setChecked(settings.get("incremental_scan", True))
+                hash_workers = dict(DEFAULT_DEVICE_WORKERS)
+                hash_workers.update(settings.get("hash_workers", {}))
+                self.ssdWorkersSpin.setValue(hash_workers["ssd"])
+                self.hddWorkersSpin.setValue(hash_workers["hdd"])
+                self.unknownWorkersSpin.setValue(hash_workers["unknown"])
+                self.populate_device_workers(hash_workers.get("devices") or {})
                 self.status_callback("تنظیمات قبلی فایل‌های تکراری بارگذاری شدند.")
             except Exception as e:
                 self.status_callback(f"خطا در بارگذاری تنظیمات: {e}")
@@ -702,4 +1274,10 @@ class DuplicateFilesTab(QWidget):
     def update_settings(self, new_settings):
         self.main_page.deletion_method = new_settings.get("delete_method", "recycle_bin")
         self.main_page.duplicate_criteria = new_settings.get("duplicate_criteria", "name_size")
+        self.main_page.hash_workers = new_settings.get("hash_workers", DEFAULT_DEVICE_WORKERS)
+        self.main_page.hash_algorithm = new_settings.get("hash_algorithm", DEFAULT_FILTER_ALGORITHM)
+        self.main_page.confirm_algorithm = new_settings.get("confirm_algorithm")
+        self.main_page.similarity_threshold = new_settings.get("similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD)
+        self.main_page.incremental_scan = new_settings.get("incremental_scan", True)
+        self.main_page.scan_filter = ScanFilter.from_settings(new_settings)
         self.status_callback("تنظیمات تب فایل‌های تکراری به‌روزرسانی شدند.")
\ No newline at end of file
@@ -0,0 +1,346 @@
+import os, time
+from duplicate_engine import (
+    find_hash_duplicates, group_files_by_size, group_files_by_byte_to_byte, new_stage_stats,
+    format_stage_report, DEFAULT_FILTER_ALGORITHM, ScanFilter, walk_filtered, collapse_hardlinks
+)
+from image_similarity import find_similar_images, DEFAULT_SIMILARITY_THRESHOLD
+from video_similarity import find_similar_videos
+from hash_cache import get_hash_cache
+from file_records import FileRecordStore
+from scan_snapshot import ScanSnapshot, SNAPSHOT_FILE
+from scan_metrics import ScanMetrics, log_metrics, METRICS_LOG_FILE
+from parallel_walker import walk_roots
+from scan_cache import get_scan_cache
+
+# روند کامل اسکن فایل‌های تکراری (پیمایش، گروه‌بندی، نقطه ادامه و ارسال دسته‌ای گروه‌ها)
+# بدون وابستگی به PyQt5؛ تب فایل‌های تکراری و خط فرمان هر دو از همین کلاس استفاده می‌کنند.
+
+# ارسال گروه‌های تأییدشده به صورت دسته‌ای تا گیرنده با هر گروه جداگانه درگیر نشود
+STREAM_BATCH_SIZE = 200
+STREAM_INTERVAL = 0.5
+
+# معیارهایی که گروه‌ها را سطل به سطل (بر اساس اندازه) تأیید می‌کنند و نقطه ادامه آن‌ها سطل‌های کامل‌شده است
+BUCKET_CRITERIA = ("md5", "byte_by_byte")
+CRITERIA = ("name_size", "md5", "byte_by_byte", "visual", "video")
+
+def _ignore(*args):
+    pass
+
+class DuplicateScan:
+    """
+    اسکن فایل‌های تکراری با فراخوانی‌های بازگشتی به جای سیگنال‌های Qt:
+    progress_callback(درصد)، status_callback(متن)، report_callback(متن گزارش مراحل)،
+    groups_callback(دسته گروه‌ها)، result_callback(خلاصه پایانی) و metrics_callback(رکورد عملکرد اسکن).
+    رکورد عملکرد هر اسکن در metrics_log (پیش‌فرض app.log) نیز ثبت می‌شود؛ None یعنی بدون فایل گزارش.
+    state_dir: پوشه عکس پیمایش افزایشی به جای پوشه جاری.
+    """
+
+    def __init__(self, paths, criteria, device_workers=None, hash_algorithm=DEFAULT_FILTER_ALGORITHM,
+                 confirm_algorithm=None, scan_filter=None, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD,
+                 checkpoint=None, resume_state=None, incremental=True, state_dir=None, metrics_log=METRICS_LOG_FILE,
+                 progress_callback=None, status_callback=None, report_callback=None,
+                 groups_callback=None, result_callback=None, metrics_callback=None):
+        self.paths = paths
+        self.criteria = criteria
+        self.scan_filter = scan_filter or ScanFilter()
+        self.device_workers = device_workers
+        self.hash_algorithm = hash_algorithm
+        self.confirm_algorithm = confirm_algorithm
+        self.similarity_threshold = similarity_threshold
+        self.checkpoint = checkpoint
+        self.resume_state = resume_state
+        self.incremental = incremental
+        self.state_dir = state_dir
+        self.metrics_log = metrics_log
+        self.progress_callback = progress_callback or _ignore
+        self.status_callback = status_callback or _ignore
+        self.report_callback = report_callback or _ignore
+        self.groups_callback = groups_callback or _ignore
+        self.result_callback = result_callback or _ignore
+        self.metrics_callback = metrics_callback or _ignore
+        self.metrics = None
+        self.snapshot = None
+        self.stop_requested = False
+        self.pending_groups = {}
+        self.last_emit = 0
+        self.group_count = 0
+        self.file_count = 0
+        self.records = FileRecordStore()
+        self.roots_done = []
+        self.completed_sizes = set()
+        # تعداد رکوردها و اندازه‌های کامل‌شده‌ای که هنوز در فایل رکوردهای نقطه ادامه نیستند
+        self.journaled = 0
+        self.new_sizes = []
+
+    def request_stop(self):
+        self.stop_requested = True
+
+    def is_stopped(self):
+        return self.stop_requested
+
+    def emit_groups(self, groups, flush=False, record=True):
+        """جمع‌آوری گروه‌های تأییدشده و ارسال آن‌ها به groups_callback در دسته‌های کوچک"""
+        if groups and record and self.checkpoint and self.criteria in BUCKET_CRITERIA:
+            self.checkpoint.append_groups(groups)
+        self.pending_groups.update(groups)
+        now = time.monotonic()
+        if self.pending_groups and (flush or len(self.pending_groups) >= STREAM_BATCH_SIZE
+                                    or now - self.last_emit >= STREAM_INTERVAL):
+            batch, self.pending_groups = self.pending_groups, {}
+            self.group_count += len(batch)
+            self.file_count += sum(len(v) for v in batch.values())
+            self.last_emit = now
+            self.groups_callback(batch)
+
+    def save_checkpoint(self, phase, current_root=None, frontier=None):
+        if not self.checkpoint:
+            return
+        # هش‌های محاسبه‌شده تا این لحظه نیز در کش دائمی نوشته می‌شوند
+        get_hash_cache().flush()
+        if self.snapshot:
+            self.snapshot.flush()
+        # فقط رکوردها و اندازه‌های تازه به فایل رکوردها افزوده می‌شوند، نه کل مخزن
+        count, sizes = len(self.records), len(self.new_sizes)
+        try:
+            offset = self.checkpoint.append_journal(self.records, self.journaled, count, self.new_sizes[:sizes])
+            self.checkpoint.save({
+                "phase": phase,
+                "roots_done": self.roots_done,
+                "current_root": current_root,
+                "frontier": frontier or [],
+                "journal_offset": offset,
+            })
+            self.journaled = count
+            del self.new_sizes[:sizes]
+        except OSError as e:
+            self.status_callback(f"خطا در ذخیره نقطه ادامه اسکن: {e}")
+
+    def on_bucket_done(self, size):
+        self.completed_sizes.add(size)
+        self.new_sizes.append(size)
+        if self.checkpoint and self.checkpoint.due():
+            self.save_checkpoint("group")
+
+    def pending_records(self):
+        """نمای رکوردهایی که سطل اندازه آن‌ها هنوز کامل نشده است"""
+        if not self.completed_sizes:
+            return self.records
+        sizes = self.records.sizes
+        return self.records.view(i for i in range(len(sizes)) if sizes[i] not in self.completed_sizes)
+
+    def finish(self, cancelled=False):
+        self.emit_groups({}, flush=True)
+        if cancelled:
+            self.status_callback("اسکن متوقف شد؛ پیشرفت آن ذخیره شد." if self.checkpoint else "اسکن متوقف شد.")
+        else:
+            self.progress_callback(100)
+            if self.checkpoint:
+                self.checkpoint.clear()
+        record = self.metrics.record(self.group_count, self.file_count, cancelled, self.snapshot)
+        if self.metrics_log:
+            log_metrics(record, self.metrics_log)
+        self.metrics_callback(record)
+        self.result_callback({"groups": self.group_count, "files": self.file_count, "cancelled": cancelled})
+
+    def restore_checkpoint(self):
+        state = self.resume_state or {}
+        # نقطه ادامه قالب قبلی همه رکوردها را در خود وضعیت داشت؛ در اولین ذخیره کامل به فایل رکوردها می‌رود
+        self.records = state.get("record_store") or FileRecordStore.from_state(state.get("records"))
+        self.roots_done = list(state.get("roots_done", []))
+        self.completed_sizes = set(state.get("completed_sizes", []))
+        if "journal_offset" in state:
+            self.journaled, self.new_sizes = len(self.records), []
+        else:
+            self.journaled, self.new_sizes = 0, sorted(self.completed_sizes)
+        if state and self.checkpoint and self.criteria in BUCKET_CRITERIA and self.completed_sizes:
+            # فقط گروه‌های سطل‌های کامل‌شده معتبرند؛ بقیه دوباره محاسبه می‌شوند
+            sizes = dict(self.records)
+            groups = {k: v for k, v in self.checkpoint.load_groups().items()
+                      if sizes.get(v[0]) in self.completed_sizes}
+            self.emit_groups(groups, record=False)
+            self.status_callback(f"ادامه اسکن از نقطه ذخیره‌شده ({len(groups)} گروه قبلی)")
+        return state
+
+    def run(self):
+        self.last_emit = time.monotonic()
+        self.metrics = ScanMetrics(self.criteria, self.paths, {
+            "device_workers": self.device_workers,
+            "hash_algorithm": self.hash_algorithm,
+            "confirm_algorithm": self.confirm_algorithm,
+            "incremental": self.incremental,
+        }, get_hash_cache())
+        state = self.restore_checkpoint()
+        if self.incremental:
+            self.snapshot = ScanSnapshot(os.path.join(self.state_dir, SNAPSHOT_FILE) if self.state_dir
+                                         else SNAPSHOT_FILE)
+        try:
+            self.scan(state)
+        finally:
+            if self.snapshot:
+                self.snapshot.close()
+
+    def scan(self, state):
+        # رکوردهای فایل پس از اعمال فیلترهای تنظیمات در مخزن ستونی
+        all_found_files = self.records
+        self.metrics.start("walk")
+        pending = [path for path in self.paths if path not in self.roots_done]
+        # ریشه نیمه‌کاره اسکن قبلی از همان نقطه ادامه پیمایش می‌شود، بقیه ریشه‌ها با هم
+        if state.get("current_root") in pending:
+            pending.remove(state["current_root"])
+            if not self.walk_root(state["current_root"], list(state.get("frontier", []))):
+                return
+        # ریشه‌هایی که به تازگی در همین تب یا تب دیگری پیمایش شده‌اند دوباره پیمایش نمی‌شوند
+        for path in list(pending):
+            cached = get_scan_cache().get(path, self.scan_filter)
+            if cached is not None:
+                pending.remove(path)
+                self.records.extend(cached)
+                self.root_done(path)
+                self.status_callback(f"نتیجه اسکن اخیر مسیر {path} استفاده شد ({len(cached)} فایل)")
+        if len(pending) == 1:
+            path = pending[0]
+            if not self.walk_root(path, [] if self.scan_filter.is_excluded_dir(path) else [path]):
+                return
+        elif pending and not self.walk_parallel(pending):
+            return
+        self.metrics.stop("walk")
+        self.metrics.files = len(all_found_files)
+        self.metrics.bytes_scanned = sum(all_found_files.sizes)
+        self.save_checkpoint("group")
+        self.status_callback(all_found_files.memory_report())
+        if self.snapshot and self.snapshot.report():
+            self.status_callback(self.snapshot.report())
+        total_files = len(all_found_files)
+        processed_count = 0
+        self.metrics.start("group")
+        if self.criteria == "name_size":
+            temp = {}
+            for file_path, size in all_found_files:
+                key = (os.path.basename(file_path), size)
+                temp.setdefault(key, []).append(file_path)
+                processed_count += 1
+                self.progress_callback(50 + int(processed_count/total_files*25))
+            for k, v in temp.items():
+                if len(v) > 1:
+                    v, _ = collapse_hardlinks(v)
+                    if len(v) > 1:
+                        self.emit_groups({str(k): v})
+        elif self.criteria == "md5":
+            # سطل‌های اندازه کامل‌شده در اسکن قبلی دوباره پردازش نمی‌شوند
+            records = self.pending_records()
+            # گروه‌ها به محض تأیید هر دسته اندازه ارسال می‌شوند، نه پس از پایان کل اسکن
+            started = time.perf_counter()
+            _, stage_stats = find_hash_duplicates(
+                records, self.on_stage_progress, device_workers=self.device_workers,
+                filter_algorithm=self.hash_algorithm, confirm_algorithm=self.confirm_algorithm,
+                group_callback=self.emit_groups, should_stop=self.is_stopped, bucket_callback=self.on_bucket_done
+            )
+            self.metrics.add_stages(stage_stats)
+            self.report_callback(format_stage_report(stage_stats, time.perf_counter() - started))
+        elif self.criteria == "byte_by_byte":
+            size_stats = new_stage_stats("size")
+            compare_stats = new_stage_stats("byte_compare")
+            records = self.pending_records()
+            size_groups = group_files_by_size(records, size_stats)
+            compare_stats["files"] = size_stats["candidates"]
+            self.progress_callback(65)
+            started = time.perf_counter()
+            for size, files in size_groups.items():
+                if self.stop_requested:
+                    break
+                groups = group_files_by_byte_to_byte(files, stats=compare_stats)
+                for v in groups.values():
+                    compare_stats["candidates"] += len(v)
+                self.emit_groups(groups)
+                self.on_bucket_done(size)
+                processed_count += len(files)
+                self.progress_callback(65 + int(processed_count/compare_stats["files"]*35))
+            compare_stats["seconds"] = time.perf_counter() - started
+            self.metrics.add_stages([size_stats, compare_stats])
+            self.report_callback(format_stage_report([size_stats, compare_stats]))
+        elif self.criteria in ("visual", "video"):
+            find_similar = find_similar_images if self.criteria == "visual" else find_similar_videos
+            try:
+                _, stage_stats = find_similar(
+                    all_found_files, self.similarity_threshold, self.on_stage_progress,
+                    device_workers=self.device_workers, group_callback=self.emit_groups,
+                    should_stop=self.is_stopped
+                )
+                self.metrics.add_stages(stage_stats)
+                self.report_callback(format_stage_report(stage_stats))
+            except RuntimeError as e:
+                self.status_callback(str(e))
+        self.metrics.stop("group")
+        if self.stop_requested:
+            self.save_checkpoint("group")
+            self.finish(cancelled=True)
+            return
+        self.finish()
+
+    def walk_root(self, path, stack):
+        """پیمایش یک ریشه با نقطه ادامه در سطح پوشه؛ در صورت توقف False"""
+        self.status_callback(f"اسکن مسیر: {path}")
+        start = len(self.records)
+        fresh = stack == [path]
+
+        def on_directory(current):
+            # پوشه جاری هنوز پردازش نشده و جزو نقطه ادامه است
+            if self.checkpoint and self.checkpoint.due():
+                self.save_checkpoint("walk", path, stack + [current])
+
+        for file_path, size, mtime, inode in walk_filtered(path, self.scan_filter, on_directory, stack,
+                                                           self.is_stopped, True, self.snapshot,
+                                                           self.metrics.walk_timings):
+            self.records.append(file_path, size, mtime, inode)
+        if self.stop_requested:
+            self.save_checkpoint("walk", path, stack)
+            self.finish(cancelled=True)
+            return False
+        if fresh:
+            # فقط پیمایش کامل از ریشه در کش اسکن مشترک قرار می‌گیرد، نه ادامه از نقطه ذخیره‌شده
+            root_store = FileRecordStore()
+            for i in range(start, len(self.records)):
+                root_store.add(self.records.directory(i), self.records.name(i), self.records.sizes[i],
+                               self.records.mtimes[i], self.records.inodes[i])
+            get_scan_cache().put(path, root_store, self.scan_filter)
+        self.root_done(path)
+        return True
+
+    def walk_parallel(self, paths):
+        """
+        پیمایش هم‌زمان چند ریشه (یک گروه نخ برای هر دستگاه). رکوردهای هر ریشه تا پایان آن جدا
+        نگه داشته می‌شوند تا نقطه ادامه فقط ریشه‌های کامل را داشته باشد؛ در صورت توقف False
+        """
+        self.status_callback("اسکن هم‌زمان مسیرها: " + "، ".join(paths))
+        root_records = {path: FileRecordStore() for path in paths}
+        for root, batch in walk_roots(paths, self.device_workers, should_stop=self.is_stopped,
+                                      timings=self.metrics.walk_timings, accept_name=self.scan_filter.accepts_name,
+                                      accept_size=self.scan_filter.accepts_size,
+                                      exclude_dir=self.scan_filter.is_excluded_dir, snapshot=self.snapshot):
+            if batch is not None:
+                store = root_records[root]
+                for record in batch:
+                    store.add(*record)
+                continue
+            root_store = root_records.pop(root)
+            get_scan_cache().put(root, root_store, self.scan_filter)
+            self.records.extend(root_store)
+            self.root_done(root)
+            self.status_callback(f"پایان اسکن مسیر: {root}")
+            if self.checkpoint and self.checkpoint.due():
+                self.save_checkpoint("walk")
+        if self.stop_requested:
+            self.save_checkpoint("walk")
+            self.finish(cancelled=True)
+            return False
+        return True
+
+    def root_done(self, path):
+        self.roots_done.append(path)
+        self.progress_callback(int(len(self.roots_done)/len(self.paths)*50))
+
+    def on_stage_progress(self, stage, done, total):
+        # مرحله اندازه: ۵۰٪، هش جزئی: ۵۰ تا ۶۵٪، هش کامل: ۶۵ تا ۱۰۰٪
+        start, span = [(50, 0), (50, 15), (65, 35)][stage]
+        if total:
+            self.progress_callback(start + int(done/total*span))
@@ -0,0 +1,179 @@
+import os, time, sqlite3
+from file_records import FileRecordStore
+
+# فهرست دائمی فایل‌های پوشه‌های اسکن‌شده در تب فایل‌ها (بدون وابستگی به PyQt5)
+# برای هر ریشه رکوردهای آخرین اسکن به همان ترتیب FileRecordStore ذخیره می‌شوند (ستون seq همان اندیس
+# رکورد است)؛ تب با باز کردن دوباره پوشه بلافاصله از همین‌جا پر می‌شود و اسکن در پس‌زمینه فهرست را
+# به‌روز می‌کند. تغییرات پیگیری پوشه فقط ردیف‌های پوشه‌های تغییرکرده را حذف و درج می‌کنند. نام فایل‌ها با جدول FTS5 (توکن‌ساز trigram) نمایه می‌شوند تا جستجوی زیررشته بدون
+# پیمایش ردیف‌های جدول انجام شود.
+
+CATALOG_FILE = "file_catalog.db"
+# توکن‌ساز trigram فقط برای عبارت‌های حداقل سه نویسه‌ای قابل استفاده است
+MIN_INDEXED_QUERY = 3
+
+class FileCatalog:
+    def __init__(self, db_path=CATALOG_FILE):
+        self.db_path = db_path
+        # هر نخ نمونه جداگانه‌ای باز می‌کند؛ با WAL خواندن تب هم‌زمان با نوشتن اسکن پس‌زمینه ممکن است
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS roots (
+                path TEXT PRIMARY KEY, generation INTEGER, scanned_at REAL, file_count INTEGER
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                root TEXT, seq INTEGER, directory TEXT, name TEXT, size INTEGER, mtime REAL, inode INTEGER,
+                extension TEXT, category TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_root ON files (root, seq)")
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(name, tokenize='trigram')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite بدون FTS5 یا نسخه قدیمی‌تر از 3.34؛ جستجو با LIKE انجام می‌شود
+            self.fts = False
+        self.conn.commit()
+
+    def root_info(self, root):
+        """(نسل، زمان اسکن، تعداد فایل) آخرین فهرست ریشه یا None"""
+        return self.conn.execute(
+            "SELECT generation, scanned_at, file_count FROM roots WHERE path=?", (root,)
+        ).fetchone()
+
+    def load(self, root):
+        """
+        (رکوردهای ذخیره‌شده ریشه، نسل فهرست) یا None اگر ریشه قبلاً اسکن نشده باشد.
+        پس از apply_changes شماره‌های seq فاصله دارند؛ این‌جا دوباره از صفر شماره‌گذاری و نسل فهرست
+        افزایش داده می‌شود تا seq همان اندیس رکورد در مخزن برگشتی باشد. اگر نوشتن هم‌زمان مانع شود،
+        نسل 0 برمی‌گردد (جستجو بدون نمایه).
+        """
+        self.conn.execute("BEGIN")
+        try:
+            info = self.root_info(root)
+            if info is None:
+                return None
+            store = FileRecordStore()
+            renumber = []
+            for rowid, seq, *record in self.conn.execute(
+                    "SELECT rowid, seq, directory, name, size, mtime, inode FROM files WHERE root=? ORDER BY seq",
+                    (root,)):
+                if seq != len(store):
+                    renumber.append((len(store), rowid))
+                store.add(*record)
+            generation = info[0]
+            if renumber:
+                try:
+                    self.conn.executemany("UPDATE files SET seq=? WHERE rowid=?", renumber)
+                    generation += 1
+                    self.conn.execute("UPDATE roots SET generation=? WHERE path=?", (generation, root))
+                except sqlite3.OperationalError:
+                    return store, 0
+            self.conn.commit()
+            return store, generation
+        finally:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+
+    def replace(self, root, store, categorize=None):
+        """
+        جایگزینی فهرست ریشه با رکوردهای اسکن جدید؛ categorize(مسیر) دسته هر فایل را برمی‌گرداند.
+        اگر فهرست تغییری نکرده باشد فقط زمان اسکن به‌روز می‌شود. خروجی: نسل فهرست
+        """
+        info = self.root_info(root)
+        if info is not None:
+            old = self.load(root)[0]
+            if _same_records(old, store):
+                with self.conn:
+                    self.conn.execute("UPDATE roots SET scanned_at=? WHERE path=?", (time.time(), root))
+                return info[0]
+        generation = (info[0] if info else 0) + 1
+        with self.conn:
+            self._delete_rows(root)
+            self.conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  _rows(root, store, range(len(store)), categorize))
+            if self.fts:
+                self.conn.execute(
+                    "INSERT INTO files_fts (rowid, name) SELECT rowid, name FROM files WHERE root=?", (root,)
+                )
+            self.conn.execute("INSERT OR REPLACE INTO roots VALUES (?, ?, ?, ?)",
+                              (root, generation, time.time(), len(store)))
+        return generation
+
+    def apply_changes(self, root, generation, store, removed, added, categorize=None):
+        """
+        اعمال تغییرات LiveRecords بدون بازنویسی کل فهرست: فقط ردیف‌ها و نمایه رکوردهای removed حذف و
+        رکوردهای added از store با همان اندیس به عنوان seq افزوده می‌شوند. اگر نسل فهرست دیگر generation
+        نباشد (فهرست در این فاصله جایگزین شده) چیزی تغییر نمی‌کند و None برمی‌گردد. خروجی: نسل تازه
+        """
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            info = self.root_info(root)
+            if info is None or info[0] != generation:
+                return None
+            deleted = [(root, seq) for seq in removed]
+            if self.fts:
+                self.conn.executemany(
+                    "DELETE FROM files_fts WHERE rowid IN (SELECT rowid FROM files WHERE root=? AND seq=?)", deleted
+                )
+            self.conn.executemany("DELETE FROM files WHERE root=? AND seq=?", deleted)
+            self.conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  _rows(root, store, added, categorize))
+            if self.fts and len(added):
+                self.conn.execute(
+                    "INSERT INTO files_fts (rowid, name) SELECT rowid, name FROM files WHERE root=? AND seq BETWEEN ? AND ?",
+                    (root, added[0], added[-1])
+                )
+            generation += 1
+            self.conn.execute("UPDATE roots SET generation=?, file_count=? WHERE path=?",
+                              (generation, info[2] - len(deleted) + len(added), root))
+        return generation
+
+    def _delete_rows(self, root):
+        if self.fts:
+            self.conn.execute("DELETE FROM files_fts WHERE rowid IN (SELECT rowid FROM files WHERE root=?)", (root,))
+        self.conn.execute("DELETE FROM files WHERE root=?", (root,))
+
+    def search(self, root, text, generation):
+        """
+        اندیس رکوردهایی از ریشه که نامشان شامل text است (بدون توجه به حروف بزرگ و کوچک).
+        اگر فهرست از زمان بارگذاری (generation) عوض شده باشد None برمی‌گرداند.
+        """
+        try:
+            info = self.root_info(root)
+            if info is None or info[0] != generation:
+                return None
+            if self.fts and len(text) >= MIN_INDEXED_QUERY:
+                try:
+                    rows = self.conn.execute(
+                        "SELECT f.seq FROM files_fts JOIN files f ON f.rowid = files_fts.rowid "
+                        "WHERE files_fts MATCH ? AND f.root=?", ('"' + text.replace('"', '""') + '"', root)
+                    )
+                    return {row[0] for row in rows}
+                except sqlite3.OperationalError:
+                    pass
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self.conn.execute(
+                "SELECT seq FROM files WHERE root=? AND name LIKE ? ESCAPE '\\'", (root, pattern)
+            )
+            return {row[0] for row in rows}
+        except sqlite3.Error:
+            return None
+
+    def close(self):
+        self.conn.close()
+
+def _rows(root, store, indices, categorize):
+    for i in indices:
+        directory, name = store.directory(i), store.name(i)
+        category = categorize(os.path.join(directory, name)) if categorize else None
+        yield (root, i, directory, name, store.sizes[i], store.mtimes[i], store.inodes[i],
+               os.path.splitext(name)[1].lower(), category)
+
+def _same_records(a, b):
+    # شناسه پوشه‌ها به ترتیب اولین رکورد داده می‌شود، پس ستون‌ها مستقیم قابل مقایسه‌اند
+    return (a.sizes == b.sizes and a.mtimes == b.mtimes and a.inodes == b.inodes and a.dirs == b.dirs
+            and a.dir_column == b.dir_column and a.name_offsets == b.name_offsets and a.name_arena == b.name_arena)
@@ -0,0 +1,166 @@
+import os, json, time
+
+# send2trash برای انتقال به سطل بازیافت اختیاری است
+try:
+    from send2trash import send2trash
+except ImportError:
+    send2trash = None
+
+# حذف دسته‌ای فایل‌ها با دفترچه ثبت (بدون وابستگی به PyQt5)
+# پیش از هر دسته، مسیرهای آن به عنوان «در حال حذف» و پس از آن نتیجه دسته در دفترچه نوشته می‌شود؛
+# اگر برنامه وسط کار بسته شود، دسته‌های ناتمام با بررسی وجود فایل‌ها قابل بازسازی هستند.
+
+DELETION_JOURNAL_FILE = "deletion_journal.jsonl"
+# تعداد فایل‌های هر فراخوانی send2trash یا هر دسته حذف دائمی
+DELETE_BATCH_SIZE = 200
+# دفترچه‌ای که اجرای ناتمامی ندارد پس از این حجم در شروع اجرای بعدی از نو ساخته می‌شود
+JOURNAL_MAX_BYTES = 10 * 1024 * 1024
+
+def trash_available():
+    return send2trash is not None
+
+class DeletionJournal:
+    def __init__(self, path=DELETION_JOURNAL_FILE):
+        self.path = path
+        self.run_id = None
+
+    def _write(self, record):
+        # هر خط بلافاصله روی دیسک نوشته می‌شود تا پس از قطع برق یا خرابی برنامه از دست نرود
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def records(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # خط ناقص آخر در صورت قطع ناگهانی برنامه
+                        continue
+        except OSError:
+            return
+
+    def incomplete_runs(self):
+        """{شناسه اجرا: مسیرهای حذف‌شده} برای اجراهایی که پایان آن‌ها ثبت نشده است"""
+        runs = {}
+        pending = {}
+        for record in self.records():
+            run_id = record.get("run")
+            op = record.get("op")
+            if op == "begin":
+                runs[run_id] = []
+                pending[run_id] = []
+            elif run_id not in runs:
+                continue
+            elif op == "batch":
+                pending[run_id] = record["paths"]
+            elif op == "done":
+                runs[run_id].extend(record["deleted"])
+                pending[run_id] = []
+            elif op == "end":
+                del runs[run_id]
+                del pending[run_id]
+        for run_id, paths in pending.items():
+            # نتیجه دسته‌ای که وسط کار قطع شده از روی وجود فایل‌ها بازسازی می‌شود
+            runs[run_id].extend(p for p in paths if not os.path.lexists(p))
+        return runs
+
+    def recover(self):
+        """بستن اجراهای ناتمام قبلی در دفترچه؛ خروجی: تعداد فایل‌های حذف‌شده در آن‌ها"""
+        runs = self.incomplete_runs()
+        for run_id, deleted in runs.items():
+            self._write({"op": "end", "run": run_id, "time": time.time(), "deleted": len(deleted),
+                         "recovered": True})
+        return sum(len(deleted) for deleted in runs.values())
+
+    def begin(self, method, count, total_bytes):
+        try:
+            if os.path.getsize(self.path) > JOURNAL_MAX_BYTES and not self.incomplete_runs():
+                os.remove(self.path)
+        except OSError:
+            pass
+        self.run_id = f"{time.time():.6f}"
+        self._write({"op": "begin", "run": self.run_id, "time": time.time(), "method": method,
+                     "files": count, "bytes": total_bytes})
+
+    def batch(self, paths):
+        self._write({"op": "batch", "run": self.run_id, "paths": paths})
+
+    def done(self, deleted, failed, reclaimed):
+        self._write({"op": "done", "run": self.run_id, "deleted": deleted, "failed": failed, "bytes": reclaimed})
+
+    def end(self, deleted_count, reclaimed, cancelled=False):
+        self._write({"op": "end", "run": self.run_id, "time": time.time(), "deleted": deleted_count,
+                     "bytes": reclaimed, "cancelled": cancelled})
+
+def _delete_batch(paths, method):
+    """حذف یک دسته؛ خروجی: (مسیرهای حذف‌شده، [(مسیر، خطا)])"""
+    if method == "recycle_bin":
+        if send2trash is None:
+            return [], [(p, "کتابخانه send2trash نصب نیست.") for p in paths]
+        try:
+            send2trash([os.path.normpath(p) for p in paths])
+            return list(paths), []
+        except Exception:
+            # نسخه‌های قدیمی فهرست مسیر را نمی‌پذیرند یا یک فایل دسته را ناموفق کرده است؛
+            # بقیه دسته تک به تک منتقل می‌شوند
+            pass
+    deleted, failed = [], []
+    for file_path in paths:
+        normalized_path = os.path.normpath(file_path)
+        if method == "recycle_bin" and not os.path.lexists(normalized_path):
+            # پیش از خطای دسته به سطل بازیافت منتقل شده است
+            deleted.append(file_path)
+            continue
+        try:
+            if method == "recycle_bin":
+                send2trash(normalized_path)
+            else:
+                os.remove(normalized_path)
+            deleted.append(file_path)
+        except Exception as e:
+            failed.append((file_path, str(e)))
+    return deleted, failed
+
+def delete_files(paths, method="recycle_bin", journal=None, progress_callback=None, should_stop=None,
+                 batch_size=DELETE_BATCH_SIZE):
+    """
+    حذف دسته‌ای فایل‌ها (method: recycle_bin یا permanent) با ثبت در دفترچه.
+    progress_callback(بایت آزادشده، کل بایت‌ها، تعداد فایل‌های پردازش‌شده) پس از هر دسته فراخوانی می‌شود.
+    خروجی: (مسیرهای حذف‌شده، [(مسیر، خطا)]، بایت آزادشده، توقف توسط کاربر)
+    """
+    paths = list(paths)
+    sizes = {}
+    for file_path in paths:
+        try:
+            sizes[file_path] = os.lstat(os.path.normpath(file_path)).st_size
+        except OSError:
+            sizes[file_path] = 0
+    total_bytes = sum(sizes.values())
+    if journal:
+        journal.begin(method, len(paths), total_bytes)
+    deleted, failed = [], []
+    reclaimed = 0
+    cancelled = False
+    for start in range(0, len(paths), batch_size):
+        if should_stop and should_stop():
+            cancelled = True
+            break
+        batch = paths[start:start + batch_size]
+        if journal:
+            journal.batch(batch)
+        batch_deleted, batch_failed = _delete_batch(batch, method)
+        batch_bytes = sum(sizes[p] for p in batch_deleted)
+        if journal:
+            journal.done(batch_deleted, [p for p, _ in batch_failed], batch_bytes)
+        deleted.extend(batch_deleted)
+        failed.extend(batch_failed)
+        reclaimed += batch_bytes
+        if progress_callback:
+            progress_callback(reclaimed, total_bytes, start + len(batch))
+    if journal:
+        journal.end(len(deleted), reclaimed, cancelled)
+    return deleted, failed, reclaimed, cancelled
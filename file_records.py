@@ -0,0 +1,157 @@
+import os
+from array import array
+
+# مخزن ستونی رکوردهای فایل برای نتایج اسکن (بدون وابستگی به PyQt5)
+# به جای فهرست رشته‌ها و تاپل‌ها، نام پوشه‌ها یک بار در جدول پوشه‌ها و نام فایل‌ها به صورت
+# UTF-8 پشت سر هم در یک bytearray نگه داشته می‌شوند؛ اندازه، زمان تغییر و inode ستون‌های array هستند.
+
+class FileRecordStore:
+    def __init__(self):
+        self.dirs = []
+        self.dir_ids = {}
+        self.dir_column = array("i")
+        self.name_arena = bytearray()
+        self.name_offsets = array("q", [0])
+        self.sizes = array("q")
+        self.mtimes = array("d")
+        self.inodes = array("Q")
+
+    def dir_id(self, directory):
+        dir_id = self.dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = len(self.dirs)
+            self.dirs.append(directory)
+            self.dir_ids[directory] = dir_id
+        return dir_id
+
+    def add(self, directory, name, size, mtime=0.0, inode=0):
+        self.dir_column.append(self.dir_id(directory))
+        # surrogateescape برای نام‌هایی که UTF-8 معتبر نیستند
+        self.name_arena += name.encode("utf-8", "surrogateescape")
+        self.name_offsets.append(len(self.name_arena))
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.inodes.append(inode)
+
+    def append(self, file_path, size, mtime=0.0, inode=0):
+        directory, name = os.path.split(file_path)
+        self.add(directory, name, size, mtime, inode)
+
+    def extend(self, other):
+        """افزودن همه رکوردهای یک مخزن دیگر (مثلاً نتیجه پیمایش یک ریشه) به صورت ستونی"""
+        dir_map = [self.dir_id(directory) for directory in other.dirs]
+        self.dir_column.extend(array("i", (dir_map[d] for d in other.dir_column)))
+        base = len(self.name_arena)
+        self.name_arena += other.name_arena
+        self.name_offsets.extend(array("q", (base + offset for offset in other.name_offsets[1:])))
+        self.sizes.extend(other.sizes)
+        self.mtimes.extend(other.mtimes)
+        self.inodes.extend(other.inodes)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def name(self, i):
+        return self.name_arena[self.name_offsets[i]:self.name_offsets[i + 1]].decode("utf-8", "surrogateescape")
+
+    def directory(self, i):
+        return self.dirs[self.dir_column[i]]
+
+    def path(self, i):
+        return os.path.join(self.dirs[self.dir_column[i]], self.name(i))
+
+    def entry(self, i):
+        """(مسیر، اندازه، زمان تغییر)"""
+        return self.path(i), self.sizes[i], self.mtimes[i]
+
+    def __iter__(self):
+        # رکوردهای (مسیر، اندازه) مانند خروجی walk_filtered
+        for i in range(len(self.sizes)):
+            yield self.path(i), self.sizes[i]
+
+    def view(self, indices=None):
+        return FileRecordView(self, range(len(self.sizes)) if indices is None else indices)
+
+    def memory_usage(self):
+        """حجم تقریبی حافظه مخزن بر حسب بایت"""
+        total = len(self.name_arena)
+        for column in (self.dir_column, self.name_offsets, self.sizes, self.mtimes, self.inodes):
+            total += column.itemsize * len(column)
+        total += sum(len(d) * 2 + 100 for d in self.dirs)
+        return total
+
+    def memory_report(self):
+        usage = self.memory_usage()
+        text = f"حافظه رکوردهای اسکن: {usage / (1024 * 1024):.1f} MB برای {len(self)} فایل"
+        if len(self):
+            text += f" ({usage / len(self) * 1000000 / (1024 * 1024):.0f} MB برای هر میلیون فایل)"
+        return text
+
+    def to_state(self):
+        """نمایش قابل ذخیره در JSON (برای نقطه ادامه اسکن)"""
+        return {
+            "dirs": self.dirs,
+            "dir_column": self.dir_column.tolist(),
+            "names": self.name_arena.decode("utf-8", "surrogateescape"),
+            "name_offsets": self.name_offsets.tolist(),
+            "sizes": self.sizes.tolist(),
+            "mtimes": self.mtimes.tolist(),
+            "inodes": self.inodes.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        store = cls()
+        if not state:
+            return store
+        store.dirs = list(state["dirs"])
+        store.dir_ids = {d: i for i, d in enumerate(store.dirs)}
+        store.dir_column = array("i", state["dir_column"])
+        store.name_arena = bytearray(state["names"].encode("utf-8", "surrogateescape"))
+        store.name_offsets = array("q", state["name_offsets"])
+        store.sizes = array("q", state["sizes"])
+        store.mtimes = array("d", state["mtimes"])
+        store.inodes = array("Q", state["inodes"])
+        return store
+
+class FileRecordView:
+    """نمای سبک روی بخشی از مخزن یا ترتیبی دیگر از آن؛ فقط شماره رکوردها نگه داشته می‌شود"""
+
+    def __init__(self, store, indices):
+        self.store = store
+        self.indices = array("q", indices)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        store = self.store
+        for i in self.indices:
+            yield store.path(i), store.sizes[i]
+
+    def path(self, row):
+        return self.store.path(self.indices[row])
+
+    def name(self, row):
+        return self.store.name(self.indices[row])
+
+    def size(self, row):
+        return self.store.sizes[self.indices[row]]
+
+    def mtime(self, row):
+        return self.store.mtimes[self.indices[row]]
+
+    def entry(self, row):
+        return self.store.entry(self.indices[row])
+
+    def entries(self):
+        for i in self.indices:
+            yield self.store.entry(i)
+
+    def paths(self):
+        for i in self.indices:
+            yield self.store.path(i)
+
+    def sort(self, key, reverse=False):
+        """مرتب‌سازی درجا؛ key روی شماره رکورد در مخزن فراخوانی می‌شود"""
+        self.indices = array("q", sorted(self.indices, key=key, reverse=reverse))
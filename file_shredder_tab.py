@@ -10,6 +10,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 import secrets
+from file_walker import iter_files
 
 class FileShredderTab(QWidget):
     def __init__(self, update_status=None, update_progress=None, tray_icon=None):
@@ -204,17 +205,17 @@ class RecycleBinShredDialog(QDialog):
         except Exception as e:
             raise Exception(f"خطا در حذف امن فایل: {e}")
 
-    def shred_file(self, file_path, method):
+    def shred_file(self, file_path, method, file_size=None):
         if os.path.isdir(file_path):
-            for root, dirs, files in os.walk(file_path, topdown=False):
-                for name in files:
-                    file = os.path.join(root, name)
-                    self.shred_file(file, method)
-                for name in dirs:
-                    dir_path = os.path.join(root, name)
-                    os.rmdir(dir_path)
+            # پوشه‌ها پیش از زیرپوشه‌هایشان دیده می‌شوند؛ پس از حذف فایل‌ها به ترتیب معکوس حذف می‌شوند
+            dirs = []
+            for root, name, size, _, _ in iter_files(file_path, on_directory=dirs.append):
+                self.shred_file(os.path.join(root, name), method, size)
+            for dir_path in reversed(dirs[1:]):
+                os.rmdir(dir_path)
         else:
-            file_size = os.path.getsize(file_path)
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
             if "zero fill" in method:
                 with open(file_path, "wb") as f:
                     f.write(b'\0' * file_size)
@@ -441,17 +442,17 @@ class FileFolderShredDialog(QDialog):
         if self.tray_icon:
             self.tray_icon.showMessage("File Shredder", "فایل‌ها به‌طور امن حذف شدند.", 3000)
 
-    def shred_file(self, file_path, method):
+    def shred_file(self, file_path, method, file_size=None):
         if os.path.isdir(file_path):
-            for root, dirs, files in os.walk(file_path, topdown=False):
-                for name in files:
-                    file = os.path.join(root, name)
-                    self.shred_file(file, method)
-                for name in dirs:
-                    dir_path = os.path.join(root, name)
-                    os.rmdir(dir_path)
+            # پوشه‌ها پیش از زیرپوشه‌هایشان دیده می‌شوند؛ پس از حذف فایل‌ها به ترتیب معکوس حذف می‌شوند
+            dirs = []
+            for root, name, size, _, _ in iter_files(file_path, on_directory=dirs.append):
+                self.shred_file(os.path.join(root, name), method, size)
+            for dir_path in reversed(dirs[1:]):
+                os.rmdir(dir_path)
         else:
-            file_size = os.path.getsize(file_path)
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
             if "zero fill" in method:
                 with open(file_path, "wb") as f:
                     f.write(b'\0' * file_size)
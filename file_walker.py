@@ -0,0 +1,195 @@
+import os, time
+
+# پیمایش مشترک درخت پوشه‌ها با os.scandir برای همه تب‌ها (بدون وابستگی به PyQt5)
+# نوع هر ورودی و اطلاعات stat از همان DirEntry خوانده می‌شود؛ برخلاف os.walk و سپس
+# os.path.getsize/getmtime، برای هر فایل حداکثر یک stat انجام می‌شود (روی ویندوز هیچ).
+# خروجی رکوردهای (پوشه، نام، اندازه، زمان تغییر، inode) است که مستقیم به FileRecordStore.add داده می‌شوند.
+
+# سیاست پیوندهای نمادین
+SYMLINKS_SKIP = "skip"      # پیوندها نادیده گرفته می‌شوند
+SYMLINKS_FILES = "files"    # پیوند به فایل مانند فایل (با stat مقصد)؛ وارد پیوند به پوشه نمی‌شود (مانند os.walk)
+SYMLINKS_FOLLOW = "follow"  # وارد پیوند به پوشه هم می‌شود؛ هر پوشه فقط یک بار پیمایش می‌شود
+# تعداد رکوردهای هر دسته در iter_file_batches
+FILE_BATCH_SIZE = 1000
+
+def iter_files(root, accept_name=None, accept_size=None, exclude_dir=None, symlinks=SYMLINKS_FILES,
+               same_device=False, with_stat=True, should_stop=None, on_directory=None, stack=None,
+               snapshot=None, timings=None):
+    """
+    پیمایش عمقی درخت و تولید رکوردهای (پوشه، نام، اندازه، زمان تغییر، inode).
+    accept_name(نام) و accept_size(اندازه) فایل‌ها را و exclude_dir(مسیر) زیرپوشه‌ها را پیش از ورود رد می‌کنند؛
+    فایل‌های رد شده بر اساس نام stat نمی‌شوند.
+    same_device: از مرز سیستم‌فایل (نقطه اتصال) عبور نمی‌شود.
+    with_stat=False: بدون stat؛ اندازه، زمان تغییر و inode برابر None هستند (مثلاً برای شمارش سریع).
+    should_stop: بررسی توقف بین دو پوشه؛ stack (پوشه‌های باقی‌مانده) که می‌تواند از بیرون داده شود همان نقطه ادامه است.
+    on_directory(مسیر): پیش از پردازش هر پوشه؛ ترتیب پوشه‌ها طوری است که هر پوشه پیش از زیرپوشه‌هایش می‌آید.
+    snapshot (ScanSnapshot): پوشه‌هایی که زمان تغییرشان عوض نشده فهرست نمی‌شوند و نام‌ها از عکس قبلی
+    خوانده می‌شود (فهرست ذخیره‌شده با همین سیاست پیوند و مرز دستگاه ساخته شده است)؛ فایل‌ها همچنان stat
+    می‌شوند تا بازنویسی محتوای آن‌ها دیده شود.
+    timings (دیکشنری): زمان فهرست‌گیری پوشه‌ها و stat فایل‌ها در کلیدهای "list" و "stat" جمع می‌شود.
+    """
+    if stack is None:
+        if exclude_dir and exclude_dir(root):
+            return
+        stack = [root]
+    root_device = None
+    if same_device:
+        try:
+            root_device = os.stat(root).st_dev
+        except OSError:
+            return
+    # برای جلوگیری از حلقه هنگام دنبال کردن پیوند پوشه‌ها
+    visited = set() if symlinks == SYMLINKS_FOLLOW else None
+    while stack:
+        if should_stop and should_stop():
+            return
+        current = stack.pop()
+        if on_directory:
+            on_directory(current)
+        if visited is not None:
+            key = directory_key(current)
+            if key is None or key in visited:
+                continue
+            visited.add(key)
+        result = read_directory(current, accept_name, accept_size, exclude_dir, symlinks, root_device,
+                                with_stat, snapshot, timings)
+        if result is None:
+            continue
+        subdirs, records = result
+        stack.extend(subdirs)
+        yield from records
+
+def directory_key(path):
+    """(دستگاه، inode) پوشه برای تشخیص پوشه‌های تکراری هنگام دنبال کردن پیوندها؛ در صورت خطا None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+def read_directory(current, accept_name=None, accept_size=None, exclude_dir=None, symlinks=SYMLINKS_FILES,
+                   root_device=None, with_stat=True, snapshot=None, timings=None):
+    """
+    یک گام پیمایش: (مسیر زیرپوشه‌هایی که باید پیمایش شوند، رکوردهای فایل‌های پذیرفته‌شده) برای یک پوشه
+    یا None اگر پوشه خوانده نشود. پارامترها همان پارامترهای iter_files هستند؛ root_device شناسه
+    دستگاه ریشه وقتی از مرز سیستم‌فایل عبور نمی‌شود.
+    """
+    listing = None
+    if snapshot is not None:
+        # زمان تغییر پیش از فهرست‌گیری خوانده می‌شود تا تغییرات هم‌زمان در اسکن بعدی دیده شوند
+        try:
+            dir_mtime = os.stat(current).st_mtime_ns
+        except OSError:
+            return None
+        listing = snapshot.lookup(current, dir_mtime)
+    if listing is None:
+        started = time.perf_counter()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            return None
+        if timings is not None:
+            timings["list"] = timings.get("list", 0.0) + time.perf_counter() - started
+            started = time.perf_counter()
+        subdirs = []
+        files = []
+        for entry in entries:
+            try:
+                is_link = entry.is_symlink()
+                if is_link and symlinks == SYMLINKS_SKIP:
+                    continue
+                if entry.is_dir(follow_symlinks=symlinks == SYMLINKS_FOLLOW):
+                    if root_device is not None and entry.stat(follow_symlinks=False).st_dev != root_device:
+                        continue
+                    subdirs.append(entry.name)
+                    continue
+                if not entry.is_file():
+                    continue
+                # فایل‌های رد شده بر اساس نام stat نمی‌شوند؛ در عکس بدون داده stat می‌مانند تا اگر
+                # فیلتر اسکن بعدی آن‌ها را بپذیرد همان موقع stat شوند
+                if accept_name and not accept_name(entry.name):
+                    if snapshot is not None:
+                        files.append((entry.name, None, None, None))
+                    continue
+                if not with_stat:
+                    files.append((entry.name, None, None, None))
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.name, st.st_size, st.st_mtime, st.st_ino))
+        if timings is not None:
+            # زمان stat همه فایل‌های پوشه یکجا اندازه‌گیری می‌شود تا هزینه زمان‌سنجی هر فایل اضافه نشود
+            timings["stat"] = timings.get("stat", 0.0) + time.perf_counter() - started
+        if snapshot is not None and with_stat:
+            snapshot.store(current, dir_mtime, subdirs, files)
+    else:
+        subdirs, files = listing
+        files = _refresh_files(current, dir_mtime, subdirs, files, accept_name, with_stat, snapshot, timings)
+    sub_paths = []
+    for name in subdirs:
+        sub_path = os.path.join(current, name)
+        if not exclude_dir or not exclude_dir(sub_path):
+            sub_paths.append(sub_path)
+    records = []
+    for name, size, mtime, inode in files:
+        if accept_name and not accept_name(name):
+            continue
+        if accept_size and not accept_size(size):
+            continue
+        records.append((current, name, size, mtime, inode))
+    return sub_paths, records
+
+def _refresh_files(current, dir_mtime, subdirs, files, accept_name, with_stat, snapshot, timings):
+    """
+    فهرست ذخیره‌شده پوشه‌ای که زمان تغییرش عوض نشده: بازنویسی محتوای فایل زمان تغییر پوشه را عوض
+    نمی‌کند، پس اندازه و زمان تغییر هر فایل پذیرفته‌شده دوباره stat و با مقدار ذخیره‌شده مقایسه می‌شود.
+    فقط فهرست‌گیری پوشه حذف می‌شود؛ فایل‌های تغییرکرده در عکس هم به‌روز می‌شوند. فایلی که با فیلتر نام
+    اسکن قبلی رد و بدون داده stat ذخیره شده بود، اگر حالا پذیرفته شود همین‌جا stat می‌شود.
+    """
+    if not with_stat:
+        return files
+    started = time.perf_counter()
+    refreshed = []
+    changed = False
+    for record in files:
+        name = record[0]
+        if accept_name and not accept_name(name):
+            refreshed.append(record)
+            continue
+        try:
+            st = os.stat(os.path.join(current, name))
+        except OSError:
+            changed = True
+            continue
+        fresh = (name, st.st_size, st.st_mtime, st.st_ino)
+        if tuple(record) != fresh:
+            changed = True
+        refreshed.append(fresh)
+    if timings is not None:
+        timings["stat"] = timings.get("stat", 0.0) + time.perf_counter() - started
+    if changed:
+        snapshot.store(current, dir_mtime, subdirs, refreshed)
+    return refreshed
+
+def iter_file_batches(root, batch_size=FILE_BATCH_SIZE, **options):
+    """همان iter_files در قالب فهرست‌هایی با حداکثر batch_size رکورد (برای به‌روزرسانی دسته‌ای رابط کاربری)"""
+    batch = []
+    for record in iter_files(root, **options):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_paths(root, **options):
+    """مسیر کامل فایل‌ها؛ برای بخش‌هایی که فقط مسیر لازم دارند"""
+    for directory, name, _, _, _ in iter_files(root, **options):
+        yield os.path.join(directory, name)
+
+def count_files(root, **options):
+    """شمارش فایل‌ها بدون stat"""
+    options["with_stat"] = False
+    return sum(len(batch) for batch in iter_file_batches(root, **options))
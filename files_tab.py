@@ -1,6 +1,8 @@
 import os
 import math
+import threading
 import shutil
+import sqlite3
 import mimetypes
 from datetime import datetime
 from PyQt5.QtWidgets import (
@@ -9,14 +11,22 @@ from PyQt5.QtWidgets import (
     QStatusBar, QGridLayout, QDialog, QTextEdit, QMessageBox, QInputDialog,
     QDialogButtonBox, QFormLayout, QRadioButton, QCheckBox, QProgressBar
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QThread, QObject, QMutex
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QTimer, QThread, QObject, QMutex
 from PyQt5.QtGui import QFont
 from PyQt5.Qt import QApplication, QSystemTrayIcon, QDesktopServices, QUrl
-import time
+from file_records import FileRecordStore, FileRecordView
+from file_walker import iter_file_batches, count_files
+from file_catalog import FileCatalog
+from fs_watcher import SharedWatch, LiveRecords, read_changes
+from scan_cache import get_scan_cache
 
 def get_file_category(filename):
     if not filename or not os.path.exists(filename):
         return 'سایر'
+    return category_for_name(filename)
+
+def category_for_name(filename):
+    """دسته فایل فقط از روی نام (بدون دسترسی به دیسک)"""
     mime_type, _ = mimetypes.guess_type(filename, strict=False)
     extension = os.path.splitext(filename)[1].lower()
     if not mime_type:
@@ -95,64 +105,74 @@ def get_time_category(mod_time):
 
 class FileScanner(QObject):
     progress = pyqtSignal(int, int)  # جاری, کل
-    finished = pyqtSignal(list)
+    finished = pyqtSignal(object, int)  # FileRecordStore، نسل فهرست ذخیره‌شده (۰ در صورت خطا)
     message = pyqtSignal(str)
+    completed = pyqtSignal()  # پایان کار، چه کامل چه متوقف
 
-    def __init__(self):
+    def __init__(self, path=None, store=None):
         super().__init__()
         self.mutex = QMutex()
         self.stop_flag = False
+        self.path = path
+        # رکوردهای از پیش موجود (کش اسکن مشترک)؛ در این صورت پیمایش نمی‌شود و فقط فهرست دائمی نوشته می‌شود
+        self.store = store
 
-    def count_files(self, path):
-        total_files = 0
-        for root, _, files in os.walk(path):
-            total_files += len(files)
-            QApplication.processEvents()
-        return total_files
+    @pyqtSlot()
+    def run(self):
+        # شیء به نخ اسکن منتقل شده است؛ اتصال started به این متد آن را در همان نخ اجرا می‌کند
+        self.scan(self.path)
+
+    def is_stopped(self):
+        self.mutex.lock()
+        stopped = self.stop_flag
+        self.mutex.unlock()
+        return stopped
 
     def scan(self, path):
         self.mutex.lock()
         self.stop_flag = False
         self.mutex.unlock()
 
-        total_files = self.count_files(path)
-        self.message.emit(f"تعداد کل فایل‌ها: {total_files}")
-        file_list = []
-        scanned_files = 0
+        if self.store is not None:
+            file_list = self.store
+        else:
+            file_list = self.walk(path)
 
-        for root, _, files in os.walk(path):
-            self.mutex.lock()
-            if self.stop_flag:
-                self.mutex.unlock()
-                break
-            self.mutex.unlock()
-
-            for file in files:
-                self.mutex.lock()
-                if self.stop_flag:
-                    self.mutex.unlock()
-                    break
-                self.mutex.unlock()
-
-                full_path = os.path.join(root, file)
+        if not self.is_stopped():
+            # فهرست دائمی در همین نخ به‌روز می‌شود؛ اتصال SQLite مخصوص همین نخ است
+            generation = 0
+            try:
+                catalog = FileCatalog()
                 try:
-                    size = os.path.getsize(full_path)
-                    mod_time = os.path.getmtime(full_path)
-                    file_list.append((full_path, size, mod_time))
-                except Exception:
-                    continue
-                scanned_files += 1
-                self.progress.emit(scanned_files, total_files)
-                QApplication.processEvents()
-                time.sleep(0.001)
-
-        self.mutex.lock()
-        if not self.stop_flag:
-            self.finished.emit(file_list)
+                    generation = catalog.replace(path, file_list, category_for_name)
+                finally:
+                    catalog.close()
+            except sqlite3.Error as e:
+                self.message.emit(f"خطا در ذخیره فهرست فایل‌ها: {e}")
+            self.finished.emit(file_list, generation)
             self.message.emit("فهرست فایل‌ها به‌روزرسانی شد.")
         else:
             self.message.emit("اسکن متوقف شد.")
-        self.mutex.unlock()
+        self.completed.emit()
+
+    def walk(self, path):
+        # شمارش بدون stat؛ نوع ورودی‌ها از همان DirEntry خوانده می‌شود
+        total_files = count_files(path, should_stop=self.is_stopped)
+        self.message.emit(f"تعداد کل فایل‌ها: {total_files}")
+        file_list = FileRecordStore()
+        scanned_files = 0
+
+        # پیشرفت برای هر دسته رکورد گزارش می‌شود، نه برای هر فایل
+        for batch in iter_file_batches(path, should_stop=self.is_stopped):
+            for record in batch:
+                file_list.add(*record)
+            scanned_files += len(batch)
+            self.progress.emit(scanned_files, total_files)
+            QApplication.processEvents()
+        if not self.is_stopped():
+            # پیمایش بدون فیلتر است و تب‌های فایل‌های بزرگ و تکراری هم می‌توانند از آن استفاده کنند
+            get_scan_cache().put(path, file_list)
+        return file_list
 
     def stop(self):
         self.mutex.lock()
@@ -182,6 +202,7 @@ class OperationDialog(QDialog):
 
 class FilesTab(QWidget):
     updateCount = pyqtSignal(int)
+    watchChanges = pyqtSignal(str, object, object, object)  # پوشه پیگیری‌شده، پوشه‌ها و زیرشاخه‌های تغییرکرده، رکوردهای تازه آن‌ها
 
     def __init__(self, status_callback, progress_callback, tray):
         super().__init__()
@@ -189,10 +210,24 @@ class FilesTab(QWidget):
         self.progress_callback = progress_callback
         self.tray = tray
         self.current_path = ""
-        self.file_list = []
+        # نمای مرتب‌شدنی روی مخزن ستونی آخرین اسکن
+        self.file_list = FileRecordView(FileRecordStore(), [])
         self.sort_column = 0
         self.sort_order = Qt.AscendingOrder
         self.custom_categories = {}
+        # فهرست دائمی پوشه‌های اسکن‌شده و نسل فهرستی که جدول از آن پر شده است
+        self.catalog = FileCatalog()
+        self.catalog_generation = 0
+        self.background_thread = None
+        self.populate_timer = None
+        # پیگیری تغییرات پوشه جاری؛ تغییرات در نخ رابط کاربری درجا روی watch_live اعمال می‌شوند و
+        # watch_generation نسل فهرست دائمی هم‌خوان با آن است
+        self.watcher = None
+        self.watch_live = None
+        self.watch_generation = 0
+        # پوشه‌هایی که حین اسکن پس‌زمینه تغییر کرده‌اند (dirs، trees)؛ اسکن ممکن است آن‌ها را پیش از تغییر خوانده باشد
+        self.scan_changes = None
+        self.watchChanges.connect(self.on_watch_update)
         self.init_ui()
 
     def init_ui(self):
@@ -275,14 +310,43 @@ class FilesTab(QWidget):
                 self.current_path = path
                 self.start_scan(path)
 
-    def start_scan(self, path):
+    def start_scan(self, path, use_catalog=True):
+        """
+        پوشه‌ای که قبلاً اسکن شده بلافاصله از فهرست ذخیره‌شده نمایش داده می‌شود و در پس‌زمینه
+        دوباره اسکن می‌شود؛ پس از تغییر فایل‌ها توسط خود تب (use_catalog=False) اسکن با پنجره پیشرفت است.
+        """
+        self.stop_background_scan()
+        if not use_catalog:
+            get_scan_cache().invalidate(path)
+        else:
+            # پوشه‌ای که به تازگی در همین تب یا تب دیگری پیمایش شده دوباره پیمایش نمی‌شود
+            shared = get_scan_cache().get(path)
+            if shared is not None:
+                self.show_file_list(shared, 0)
+                self.on_scan_message(f"نتیجه اسکن اخیر {path} نمایش داده شد.")
+                self.start_background_scan(path, shared)
+                return
+        cached = None
+        if use_catalog:
+            try:
+                cached = self.catalog.load(path)
+            except sqlite3.Error as e:
+                self.status_callback(f"خطا در خواندن فهرست فایل‌ها: {e}")
+        if cached is not None:
+            self.show_file_list(*cached)
+            self.on_scan_message(f"فهرست ذخیره‌شده {path} نمایش داده شد؛ به‌روزرسانی در پس‌زمینه...")
+            self.start_background_scan(path)
+            return
         dialog = OperationDialog("اسکن پوشه", self)
         self.scanner = FileScanner()
         self.thread = QThread()
         self.scanner.moveToThread(self.thread)
         self.thread.started.connect(lambda: self.scanner.scan(path))
         self.scanner.progress.connect(dialog.update_progress)
-        self.scanner.finished.connect(lambda file_list: self.on_scan_finished(file_list, dialog))
+        # صف‌شده تا در نخ رابط و درون حلقه رویداد پنجره اجرا شود، حتی اگر اسکن پیش از نمایش آن تمام شود
+        self.scanner.finished.connect(
+            lambda file_list, generation: self.on_scan_finished(file_list, generation, dialog), Qt.QueuedConnection
+        )
         self.scanner.message.connect(self.on_scan_message)
         dialog.rejected.connect(self.scanner.stop)
         self.thread.start()
@@ -290,17 +354,123 @@ class FilesTab(QWidget):
         self.thread.quit()
         self.thread.wait()
 
-    def on_scan_finished(self, file_list, dialog):
-        self.file_list = file_list
+    def start_background_scan(self, path, store=None):
+        self.scan_changes = (set(), set())
+        self.background_scanner = FileScanner(path, store)
+        self.background_thread = QThread()
+        self.background_scanner.moveToThread(self.background_thread)
+        self.background_thread.started.connect(self.background_scanner.run)
+        self.background_scanner.finished.connect(self.on_background_scan_finished)
+        # quit در هر نخی قابل فراخوانی است؛ مستقیم تا به حلقه رویداد نخ رابط وابسته نباشد
+        self.background_scanner.completed.connect(self.background_thread.quit, Qt.DirectConnection)
+        self.background_thread.start()
+
+    def stop_background_scan(self):
+        if self.background_thread is not None and self.background_thread.isRunning():
+            self.background_scanner.stop()
+            self.background_thread.quit()
+            self.background_thread.wait()
+        self.scan_changes = None
+
+    def on_background_scan_finished(self, file_list, generation):
+        pending, self.scan_changes = self.scan_changes, None
+        if file_list is self.file_list.store:
+            # رکوردهای کش اسکن که از قبل نمایش داده شده‌اند (بدون تغییرات پیگیری) فقط در فهرست دائمی نوشته شدند
+            self.catalog_generation = generation
+            if self.watch_live is not None and self.watch_live.store is file_list:
+                self.watch_generation = generation
+            return
+        if generation and generation == self.catalog_generation:
+            self.on_scan_message("فهرست فایل‌ها بدون تغییر است.")
+            return
+        self.show_file_list(file_list, generation)
+        self.on_scan_message("فهرست فایل‌ها به‌روزرسانی شد.")
+        if pending is not None and (pending[0] or pending[1]):
+            # تغییرات اعمال‌شده روی فهرست قبلی دوباره روی نتیجه اسکن اعمال می‌شوند
+            threading.Thread(target=self.on_watch_changes, args=(self.current_path, *pending), daemon=True).start()
+
+    def on_scan_finished(self, file_list, generation, dialog):
+        self.show_file_list(file_list, generation)
+        dialog.accept()
+
+    def show_file_list(self, file_list, generation):
+        self.file_list = file_list.view()
+        self.catalog_generation = generation
+        self.status_callback(file_list.memory_report())
         self.populate_table_async()
         self.updateCount.emit(len(self.file_list))
-        dialog.accept()
+        self.watch_live = LiveRecords(file_list)
+        self.watch_generation = generation
+        self.watch_path(self.current_path)
+
+    def watch_path(self, path):
+        if not path or (self.watcher is not None and self.watcher.roots == [os.path.abspath(path)]):
+            return
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.watcher = SharedWatch([path], lambda dirs, trees: self.on_watch_changes(path, dirs, trees))
+        self.watcher.start()
+
+    def on_watch_changes(self, path, dirs, trees):
+        # در نخ پیگیری اجرا می‌شود: فقط پوشه‌های تغییرکرده خوانده می‌شوند؛ مخزن، فهرست دائمی و جدول
+        # در نخ رابط کاربری به‌روز می‌شوند
+        get_scan_cache().invalidate(path)
+        self.watchChanges.emit(path, dirs, trees, read_changes(dirs, trees))
+
+    def on_watch_update(self, path, dirs, trees, records):
+        live = self.watch_live
+        if live is None or path != self.current_path:
+            return
+        if self.scan_changes is not None:
+            self.scan_changes[0].update(dirs)
+            self.scan_changes[1].update(trees)
+        # فقط ردیف‌های پوشه‌های تغییرکرده در فهرست دائمی حذف و درج می‌شوند
+        removed, added = live.apply(dirs, trees, records)
+        generation = None
+        if not live.needs_compaction():
+            try:
+                generation = self.catalog.apply_changes(path, self.watch_generation, live.store, removed, added,
+                                                        category_for_name)
+            except sqlite3.Error:
+                generation = 0
+        if generation is None:
+            # فهرست با این رکوردها هم‌نسل نیست یا رکوردهای حذف‌شده زیاد شده‌اند
+            live = self.watch_live = LiveRecords(live.compacted(), shared=False)
+            removed, added = None, range(len(live.store))
+            try:
+                generation = self.catalog.replace(path, live.store, category_for_name)
+            except sqlite3.Error:
+                generation = 0
+        self.watch_generation = generation
+        if removed is None:
+            # مخزن فشرده شده و اندیس رکوردها عوض شده است
+            self.file_list = live.store.view(added)
+            self.populate_table_async()
+        else:
+            removed = set(removed)
+            indices = [i for i in self.file_list.indices if i not in removed]
+            if self.populate_timer is not None and self.populate_timer.isActive():
+                self.file_list = live.store.view(indices + list(added))
+                self.populate_table_async()
+            else:
+                for row in reversed(range(self.table.rowCount())):
+                    if self.file_list.indices[row] in removed:
+                        self.table.removeRow(row)
+                self.file_list = live.store.view(indices + list(added))
+                for row in range(len(indices), len(self.file_list)):
+                    self.add_table_row(row)
+                self.filter_table()
+        self.catalog_generation = generation
+        self.updateCount.emit(len(self.file_list))
+        self.on_scan_message(f"تغییرات پوشه اعمال شد؛ {len(self.file_list)} فایل.")
 
     def on_scan_message(self, msg):
         self.status_callback(msg)
         self.status_bar.showMessage(msg, 5000)
 
     def populate_table_async(self):
+        if self.populate_timer is not None:
+            self.populate_timer.stop()
         self.table.setRowCount(0)
         self.populate_timer = QTimer()
         self.populate_timer.setInterval(0)  # هر چه سریع‌تر
@@ -315,22 +485,29 @@ class FilesTab(QWidget):
                 self.populate_timer.stop()
                 self.filter_table()
                 return
-            file_path, size, mod_time = self.file_list[self.populate_index]
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            check_box = QCheckBox()
-            self.table.setCellWidget(row, 0, check_box)
-            self.table.setItem(row, 1, QTableWidgetItem(os.path.basename(file_path)))
-            self.table.setItem(row, 2, QTableWidgetItem(format_size(size)))
-            self.table.setItem(row, 3, QTableWidgetItem(get_file_category(file_path)))
-            self.table.item(row, 2).setData(Qt.UserRole, size)
-            self.table.item(row, 2).setData(Qt.UserRole + 1, mod_time)
+            self.add_table_row(self.populate_index)
             self.populate_index += 1
         QApplication.processEvents()
 
+    def add_table_row(self, index):
+        file_path, size, mod_time = self.file_list.entry(index)
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        check_box = QCheckBox()
+        self.table.setCellWidget(row, 0, check_box)
+        self.table.setItem(row, 1, QTableWidgetItem(os.path.basename(file_path)))
+        self.table.setItem(row, 2, QTableWidgetItem(format_size(size)))
+        self.table.setItem(row, 3, QTableWidgetItem(get_file_category(file_path)))
+        self.table.item(row, 2).setData(Qt.UserRole, size)
+        self.table.item(row, 2).setData(Qt.UserRole + 1, mod_time)
+
     def filter_table(self):
         text = self.search_bar.text().lower()
         category = self.categoryCombo.currentText()
+        # جستجوی نام با نمایه فهرست دائمی؛ اگر فهرست با جدول هم‌نسل نباشد با مقایسه ردیف‌ها
+        matches = None
+        if text and self.catalog_generation:
+            matches = self.catalog.search(self.current_path, text, self.catalog_generation)
         for row in range(self.table.rowCount()):
             name_item = self.table.item(row, 1)
             size_item = self.table.item(row, 2)
@@ -338,8 +515,11 @@ class FilesTab(QWidget):
             size = size_item.data(Qt.UserRole) if size_item else 0
             mod_time = size_item.data(Qt.UserRole + 1) if size_item else 0
             hidden = False
-            if text and name_item and text not in name_item.text().lower():
-                hidden = True
+            if text and name_item:
+                if matches is not None:
+                    hidden = self.file_list.indices[row] not in matches
+                elif text not in name_item.text().lower():
+                    hidden = True
             if category != "همه فایل‌ها":
                 if category == "فایل‌های صوتی" and category_item.text() != "صوتی":
                     hidden = True
@@ -364,7 +544,7 @@ class FilesTab(QWidget):
                 elif category == "قدیمی (>6 ماه)" and get_time_category(mod_time) != "قدیمی":
                     hidden = True
                 elif category in self.custom_categories:
-                    ext = os.path.splitext(self.file_list[row][0])[1].lower()
+                    ext = os.path.splitext(self.file_list.name(row))[1].lower()
                     if ext not in self.custom_categories[category]:
                         hidden = True
             self.table.setRowHidden(row, hidden)
@@ -400,12 +580,13 @@ class FilesTab(QWidget):
         else:
             self.sort_column = column
             self.sort_order = Qt.AscendingOrder
+        store = self.file_list.store
         if self.sort_column == 1:
-            self.file_list.sort(key=lambda x: os.path.basename(x[0]).lower(), reverse=self.sort_order == Qt.DescendingOrder)
+            self.file_list.sort(key=lambda i: store.name(i).lower(), reverse=self.sort_order == Qt.DescendingOrder)
         elif self.sort_column == 2:
-            self.file_list.sort(key=lambda x: x[1], reverse=self.sort_order == Qt.DescendingOrder)
+            self.file_list.sort(key=lambda i: store.sizes[i], reverse=self.sort_order == Qt.DescendingOrder)
         elif self.sort_column == 3:
-            self.file_list.sort(key=lambda x: get_file_category(x[0]), reverse=self.sort_order == Qt.DescendingOrder)
+            self.file_list.sort(key=lambda i: get_file_category(store.path(i)), reverse=self.sort_order == Qt.DescendingOrder)
         self.populate_table_async()
 
     def copy_files(self):
@@ -440,7 +621,7 @@ class FilesTab(QWidget):
         confirm = QMessageBox.question(self, "تأیید حذف", "آیا مطمئن هستید که می‌خواهید فایل‌های خالی را حذف کنید؟", QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.Yes:
             deleted = 0
-            for file_path, size, _ in self.file_list:
+            for file_path, size, _ in self.file_list.entries():
                 if size == 0:
                     try:
                         os.remove(file_path)
@@ -449,7 +630,7 @@ class FilesTab(QWidget):
                         continue
                     QApplication.processEvents()
             self.status_bar.showMessage(f"{deleted} فایل خالی حذف شد.", 5000)
-            self.start_scan(self.current_path)
+            self.start_scan(self.current_path, use_catalog=False)
 
     def organize_files(self):
         if not self.current_path:
@@ -462,7 +643,7 @@ class FilesTab(QWidget):
                 category_path = os.path.join(self.current_path, category)
                 if not os.path.exists(category_path):
                     os.makedirs(category_path)
-            for file_path, _, _ in self.file_list:
+            for file_path in self.file_list.paths():
                 category = get_file_category(file_path)
                 for custom_cat, exts in self.custom_categories.items():
                     if os.path.splitext(file_path)[1].lower() in exts:
@@ -475,7 +656,7 @@ class FilesTab(QWidget):
                     continue
                 QApplication.processEvents()
             self.status_bar.showMessage("فایل‌ها سازمان‌دهی شدند.", 5000)
-            self.start_scan(self.current_path)
+            self.start_scan(self.current_path, use_catalog=False)
 
     def copy_to_folder(self):
         self._copy_or_move_files(copy=True)
@@ -495,7 +676,7 @@ class FilesTab(QWidget):
         confirm = QMessageBox.question(self, f"تأیید {action}", f"آیا مطمئن هستید که می‌خواهید فایل‌ها را {action} کنید؟", QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.Yes:
             for row in selected_rows:
-                file_path = self.file_list[row][0]
+                file_path = self.file_list.path(row)
                 file_name = os.path.basename(file_path)
                 dest_file_path = os.path.join(dest_path, file_name)
                 try:
@@ -508,13 +689,13 @@ class FilesTab(QWidget):
                 QApplication.processEvents()
             self.status_bar.showMessage(f"فایل‌ها {action} شدند.", 5000)
             if not copy:
-                self.start_scan(self.current_path)
+                self.start_scan(self.current_path, use_catalog=False)
 
     def open_context_menu(self, position):
         index = self.table.indexAt(position)
         if not index.isValid():
             return
-        file_path = self.file_list[index.row()][0]
+        file_path = self.file_list.path(index.row())
         menu = QMenu()
         menu.addAction("باز کردن فایل", lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(file_path)))
         menu.addAction("تغییر نام", lambda: self.rename_file(file_path))
@@ -528,7 +709,7 @@ class FilesTab(QWidget):
             try:
                 os.rename(file_path, new_file_path)
                 self.status_bar.showMessage("نام فایل تغییر کرد.", 5000)
-                self.start_scan(self.current_path)
+                self.start_scan(self.current_path, use_catalog=False)
             except Exception as e:
                 self.status_bar.showMessage(f"خطا در تغییر نام: {e}", 5000)
 
@@ -0,0 +1,460 @@
+import os, time, errno, select, struct, threading, ctypes, ctypes.util
+from bisect import bisect_left
+from file_records import FileRecordStore
+from file_walker import iter_files, read_directory
+
+# inotify فقط روی لینوکس در دسترس است؛ در بقیه سیستم‌ها پوشه‌ها به صورت دوره‌ای بررسی می‌شوند
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    _libc.inotify_init1
+except (OSError, AttributeError):
+    _libc = None
+
+# پیگیری تغییرات پوشه‌های اسکن‌شده پس از اسکن (بدون وابستگی به PyQt5)
+# رویدادهای پشت سر هم جمع و یک‌جا گزارش می‌شوند تا تب‌ها به جای پیمایش دوباره کل درخت، فقط
+# پوشه‌های تغییرکرده را دوباره بخوانند (LiveRecords). تب‌ها با SharedWatch برای هر ریشه یک
+# DirectoryWatcher مشترک دارند. پیگیری با watch_changes در config.json خاموش و فاصله بررسی دوره‌ای
+# با watch_poll_interval تنظیم می‌شود.
+
+# پس از آخرین رویداد این مدت (ثانیه) صبر می‌شود تا رویدادهای هم‌زمان با هم گزارش شوند
+COALESCE_DELAY = 0.5
+# حداکثر تأخیر گزارش هنگام رویدادهای پیوسته
+COALESCE_MAX = 3.0
+# فاصله پیش‌فرض بررسی پوشه‌ها در حالت بدون inotify؛ هر بررسی کل درخت را فهرست می‌کند
+POLL_INTERVAL = 300.0
+# فاصله بررسی توقف نخ
+STOP_CHECK = 0.5
+# وقتی رکوردهای حذف‌شده LiveRecords از این تعداد و از رکوردهای زنده بیشتر شوند مخزن فشرده می‌شود
+COMPACT_MIN = 10000
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+              | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+def _no_files(name):
+    return False
+
+def _top_level(paths):
+    """حذف مسیرهایی که زیرشاخه مسیر دیگری از همین مجموعه هستند"""
+    return {path for path in paths
+            if not any(path.startswith(other.rstrip(os.sep) + os.sep) for other in paths)}
+
+class DirectoryWatcher:
+    """
+    پیگیری تغییرات درخت ریشه‌ها در نخ پس‌زمینه با inotify یا در صورت نبود آن (یا پر شدن سقف
+    max_user_watches) با بررسی دوره‌ای زمان تغییر پوشه‌ها. تغییرات هر دسته به callback(dirs, trees)
+    در همان نخ داده می‌شود: dirs پوشه‌هایی که فایل‌های مستقیمشان ایجاد، حذف، جابه‌جا یا بازنویسی
+    شده‌اند و trees پوشه‌هایی که کل زیرشاخه آن‌ها ایجاد، حذف یا جابه‌جا شده است.
+    در حالت بررسی دوره‌ای فقط ایجاد، حذف و تغییر نام فایل‌ها دیده می‌شود.
+    """
+
+    def __init__(self, roots, callback, exclude_dir=None, poll_interval=POLL_INTERVAL):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.callback = callback
+        self.exclude_dir = exclude_dir
+        self.poll_interval = poll_interval
+        self.mode = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.fd = None
+        self.watches = {}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def run(self):
+        if _libc is not None:
+            try:
+                self.run_inotify()
+                return
+            except OSError:
+                self.close_inotify()
+        self.run_polling()
+
+    def deliver(self, dirs, trees):
+        trees = _top_level(trees)
+        dirs = {d for d in dirs if d not in trees and not any(d.startswith(t + os.sep) for t in trees)}
+        if (dirs or trees) and not self.stop_event.is_set():
+            self.callback(dirs, trees)
+
+    # inotify
+
+    def run_inotify(self):
+        self.mode = "inotify"
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        for root in self.roots:
+            if self.stop_event.is_set():
+                break
+            self.watch_tree(root)
+        dirs, trees = set(), set()
+        first_event = None
+        try:
+            while not self.stop_event.is_set():
+                ready, _, _ = select.select([self.fd], [], [], STOP_CHECK if first_event is None else COALESCE_DELAY)
+                if ready:
+                    try:
+                        data = os.read(self.fd, 64 * 1024)
+                    except BlockingIOError:
+                        continue
+                    if first_event is None:
+                        first_event = time.monotonic()
+                    self.parse_events(data, dirs, trees)
+                    if time.monotonic() - first_event < COALESCE_MAX:
+                        continue
+                if first_event is not None:
+                    self.deliver(dirs, trees)
+                    dirs, trees = set(), set()
+                    first_event = None
+        finally:
+            self.close_inotify()
+
+    def close_inotify(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.watches = {}
+
+    def watch_tree(self, root):
+        """
+        افزودن پیگیری برای پوشه و همه زیرپوشه‌های آن؛ پر شدن سقف پیگیری‌ها OSError می‌دهد. پیمایش
+        درخت‌های بزرگ با stop متوقف می‌شود تا stop (که از نخ رابط کاربری صدا زده می‌شود) منتظر نماند.
+        """
+        for _ in iter_files(root, _no_files, exclude_dir=self.exclude_dir, with_stat=False,
+                            should_stop=self.stop_event.is_set, on_directory=self.add_watch):
+            pass
+
+    def add_watch(self, directory):
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(error, "سقف تعداد پوشه‌های قابل پیگیری inotify پر شده است")
+            # پوشه حذف شده یا دسترسی به آن نیست
+            return
+        self.watches[wd] = directory
+
+    def unwatch_tree(self, root):
+        prefix = root + os.sep
+        for wd, directory in list(self.watches.items()):
+            if directory == root or directory.startswith(prefix):
+                del self.watches[wd]
+                _libc.inotify_rm_watch(self.fd, wd)
+
+    def parse_events(self, data, dirs, trees):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].split(b"\0", 1)[0]
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # رویدادها از دست رفته‌اند؛ همه ریشه‌ها دوباره خوانده می‌شوند
+                trees.update(self.roots)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # حذف زیرپوشه‌ها در رویداد پوشه والد گزارش می‌شود؛ فقط ریشه‌ها والد پیگیری‌شده ندارند
+                if directory in self.roots:
+                    trees.add(directory)
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if not mask & IN_ISDIR:
+                dirs.add(directory)
+                continue
+            if self.exclude_dir and self.exclude_dir(path):
+                continue
+            if mask & IN_MOVED_FROM:
+                self.unwatch_tree(path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self.watch_tree(path)
+            trees.add(path)
+
+    # بررسی دوره‌ای
+
+    def run_polling(self):
+        self.mode = "poll"
+        state = self.poll_state()
+        while not self.stop_event.wait(self.poll_interval):
+            current = self.poll_state()
+            dirs = {d for d, mtime in current.items() if d in state and state[d] != mtime}
+            trees = {d for d in current if d not in state} | {d for d in state if d not in current}
+            state = current
+            self.deliver(dirs, trees)
+
+    def poll_state(self):
+        """زمان تغییر همه پوشه‌ها؛ ایجاد، حذف و تغییر نام فایل‌ها زمان تغییر پوشه را عوض می‌کند"""
+        state = {}
+
+        def on_directory(directory):
+            try:
+                state[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                pass
+
+        for root in self.roots:
+            if self.stop_event.is_set():
+                break
+            for _ in iter_files(root, _no_files, exclude_dir=self.exclude_dir, with_stat=False,
+                                should_stop=self.stop_event.is_set, on_directory=on_directory):
+                pass
+        return state
+
+def watch_settings():
+    """(پیگیری فعال است؟، فاصله بررسی دوره‌ای) از config.json"""
+    enabled, interval = True, POLL_INTERVAL
+    try:
+        from config import load_config
+        config = load_config()
+        enabled = bool(config.get("watch_changes", enabled))
+        interval = float(config.get("watch_poll_interval", interval))
+    except Exception:
+        pass
+    return enabled, interval
+
+# ریشه ← (DirectoryWatcher، مشترکان SharedWatch)
+_shared = {}
+_shared_lock = threading.Lock()
+
+def _dispatch(root, dirs, trees):
+    with _shared_lock:
+        entry = _shared.get(root)
+        subscribers = list(entry[1]) if entry is not None else []
+    for subscriber in subscribers:
+        subscriber.deliver(root, dirs, trees)
+
+def stop_all_watches():
+    """توقف همه پیگیری‌های مشترک (پس از خاموش کردن پیگیری در تنظیمات)"""
+    with _shared_lock:
+        watchers = [watcher for watcher, _ in _shared.values()]
+        _shared.clear()
+    for watcher in watchers:
+        watcher.stop()
+
+class SharedWatch:
+    """
+    پیگیری ریشه‌ها برای یک تب با همان رابط DirectoryWatcher، ولی برای هر ریشه فقط یک نخ پیگیری (و در
+    حالت بدون inotify یک فهرست‌کردن دوره‌ای) بین همه تب‌ها مشترک است. چون ریشه مشترک بدون پوشه‌های
+    مستثنا پیگیری می‌شود، تغییرات پوشه‌هایی که خودشان یا پوشه‌ای بالاتر تا ریشه برای این تب مستثنی
+    هستند کنار گذاشته می‌شوند. اگر پیگیری در تنظیمات خاموش باشد start کاری نمی‌کند.
+    """
+
+    def __init__(self, roots, callback, exclude_dir=None):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.callback = callback
+        self.exclude_dir = exclude_dir
+
+    @property
+    def mode(self):
+        with _shared_lock:
+            entry = _shared.get(self.roots[0]) if self.roots else None
+        return entry[0].mode if entry is not None else None
+
+    def start(self):
+        enabled, interval = watch_settings()
+        if not enabled:
+            return
+        with _shared_lock:
+            for root in self.roots:
+                entry = _shared.get(root)
+                if entry is None:
+                    watcher = DirectoryWatcher([root], lambda dirs, trees, root=root: _dispatch(root, dirs, trees),
+                                               poll_interval=interval)
+                    entry = _shared[root] = (watcher, [])
+                    watcher.start()
+                if self not in entry[1]:
+                    entry[1].append(self)
+
+    def stop(self):
+        unused = []
+        with _shared_lock:
+            for root in self.roots:
+                entry = _shared.get(root)
+                if entry is None or self not in entry[1]:
+                    continue
+                entry[1].remove(self)
+                if not entry[1]:
+                    del _shared[root]
+                    unused.append(entry[0])
+        for watcher in unused:
+            watcher.stop()
+
+    def deliver(self, root, dirs, trees):
+        if self.exclude_dir:
+            excluded = {}
+            dirs = {d for d in dirs if not self.excluded(root, d, excluded)}
+            trees = {t for t in trees if not self.excluded(root, t, excluded)}
+        if dirs or trees:
+            self.callback(dirs, trees)
+
+    def excluded(self, root, directory, cache):
+        if directory in cache:
+            return cache[directory]
+        if self.exclude_dir(directory):
+            result = True
+        elif directory == root or os.path.dirname(directory) == directory:
+            result = False
+        else:
+            result = self.excluded(root, os.path.dirname(directory), cache)
+        cache[directory] = result
+        return result
+
+def normalize_path(path):
+    """
+    شکل یکسان مسیر برای مقایسه: ریشه‌های پیگیری مطلق هستند ولی پوشه رکوردها همان رشته پیمایش‌شده
+    است (نسبی، C:/x، حروف بزرگ و کوچک متفاوت در ویندوز)
+    """
+    return os.path.normcase(os.path.abspath(path))
+
+def normalize_changes(dirs, trees):
+    return {normalize_path(d) for d in dirs}, {normalize_path(t) for t in trees}
+
+def changed_directory(directory, dirs, trees):
+    """
+    آیا فایل‌های مستقیم این پوشه در تغییرات dirs و trees ممکن است عوض شده باشند. dirs و trees باید
+    با normalize_changes یکسان شده باشند.
+    """
+    directory = normalize_path(directory)
+    return directory in dirs or any(directory == t or directory.startswith(t + os.sep) for t in trees)
+
+class WatchedPaths:
+    """
+    فایل‌های نتایج به تفکیک پوشه تا فایل‌های ازدست‌رفته پوشه‌های تغییرکرده بدون گذر از همه نتایج پیدا
+    شوند. missing در نخ پیگیری و discard در نخ رابط کاربری صدا زده می‌شود.
+    """
+
+    def __init__(self, paths):
+        self.lock = threading.Lock()
+        self.by_dir = {}
+        for path in paths:
+            self.by_dir.setdefault(normalize_path(os.path.dirname(path)), set()).add(path)
+        # فهرست مرتب پوشه‌ها؛ پوشه‌های زیر یک درخت پشت سر هم می‌آیند
+        self.dirs = sorted(self.by_dir)
+
+    def missing(self, dirs, trees):
+        """فایل‌هایی از پوشه‌های dirs و زیرشاخه‌های trees که دیگر وجود ندارند"""
+        dirs, trees = normalize_changes(dirs, trees)
+        with self.lock:
+            candidates = [path for directory in dirs for path in self.by_dir.get(directory, ())]
+            for tree in trees:
+                prefix = tree + os.sep
+                i = bisect_left(self.dirs, tree)
+                while i < len(self.dirs) and self.dirs[i].startswith(tree):
+                    directory = self.dirs[i]
+                    if directory == tree or directory.startswith(prefix):
+                        candidates.extend(self.by_dir[directory])
+                    i += 1
+        return [path for path in candidates if not os.path.exists(path)]
+
+    def discard(self, paths):
+        with self.lock:
+            for path in paths:
+                files = self.by_dir.get(normalize_path(os.path.dirname(path)))
+                if files is not None:
+                    files.discard(path)
+
+def read_changes(dirs, trees, **options):
+    """رکوردهای فعلی پوشه‌های dirs و زیرشاخه‌های trees؛ فقط فایل‌ها خوانده می‌شوند، نه مخزنی"""
+    records = []
+    for directory in dirs:
+        result = read_directory(directory, **options)
+        if result is not None:
+            records.extend(result[1])
+    for tree in trees:
+        records.extend(iter_files(tree, **options))
+    return records
+
+class LiveRecords:
+    """
+    رکوردهای پوشه پیگیری‌شده که تغییرات DirectoryWatcher درجا روی آن‌ها اعمال می‌شود: رکوردهای پوشه‌های
+    تغییرکرده فقط علامت حذف می‌خورند و رکوردهای تازه به انتهای مخزن افزوده می‌شوند، پس اندیس بقیه
+    رکوردها (و seq آن‌ها در FileCatalog) ثابت می‌ماند. مخزن اسکن ممکن است در کش اسکن مشترک باشد،
+    پس فقط پیش از اولین تغییر یک بار کپی می‌شود. apply باید فقط در نخی که مخزن را می‌خواند (نخ رابط
+    کاربری) صدا زده شود؛ پوشه‌ها را می‌توان پیش‌تر با read_changes در نخ پیگیری خواند.
+    """
+
+    def __init__(self, store, shared=True):
+        self.store = store
+        self.shared = shared
+        self.removed = set()
+        # شناسه پوشه ← اندیس رکوردهای زنده آن؛ با اولین تغییر ساخته می‌شود
+        self.by_dir = None
+        # مسیر یکسان‌شده هر پوشه مخزن به ترتیب شناسه
+        self.normalized_dirs = []
+
+    def __len__(self):
+        return len(self.store) - len(self.removed)
+
+    def indices(self):
+        removed = self.removed
+        return [i for i in range(len(self.store)) if i not in removed]
+
+    def needs_compaction(self):
+        return len(self.removed) > max(len(self), COMPACT_MIN)
+
+    def compacted(self):
+        """مخزن تازه فقط با رکوردهای زنده (اندیس‌ها عوض می‌شوند)"""
+        store = self.store
+        compact = FileRecordStore()
+        for i in self.indices():
+            compact.add(store.directory(i), store.name(i), store.sizes[i], store.mtimes[i], store.inodes[i])
+        return compact
+
+    def apply(self, dirs, trees, records=None, **options):
+        """
+        جایگزینی رکوردهای پوشه‌های dirs و زیرشاخه‌های trees با records (خروجی read_changes که می‌تواند
+        در نخ دیگری خوانده شده باشد) یا در صورت نبود آن خواندن دوباره همین پوشه‌ها. خروجی: (اندیس
+        رکوردهای حذف‌شده، range اندیس رکوردهای افزوده‌شده). options همان پارامترهای فیلتر iter_files هستند.
+        """
+        if records is None:
+            records = read_changes(dirs, trees, **options)
+        if self.shared:
+            private = FileRecordStore()
+            private.extend(self.store)
+            self.store, self.shared = private, False
+        store = self.store
+        if self.by_dir is None:
+            self.by_dir = {}
+            for i, dir_id in enumerate(store.dir_column):
+                if i not in self.removed:
+                    self.by_dir.setdefault(dir_id, []).append(i)
+        normalized = self.normalized_dirs
+        normalized.extend(normalize_path(directory) for directory in store.dirs[len(normalized):])
+        changed_dirs, changed_trees = normalize_changes(dirs, trees)
+        prefixes = tuple(tree + os.sep for tree in changed_trees)
+        stale = {dir_id for dir_id, directory in enumerate(normalized)
+                 if directory in changed_dirs or directory in changed_trees or directory.startswith(prefixes)}
+        removed = []
+        for dir_id in stale:
+            removed.extend(self.by_dir.pop(dir_id, ()))
+        self.removed.update(removed)
+        start = len(store)
+        for record in records:
+            store.add(*record)
+        for i in range(start, len(store)):
+            self.by_dir.setdefault(store.dir_column[i], []).append(i)
+        return removed, range(start, len(store))
@@ -0,0 +1,188 @@
+import os, sqlite3, threading, atexit, time
+
+# کش دائمی هش فایل‌ها، مشترک بین همه بخش‌هایی که هش محاسبه می‌کنند (بدون وابستگی به PyQt5)
+# کلید: (دستگاه، inode، اندازه، زمان تغییر بر حسب نانوثانیه) + نام الگوریتم
+# فراخوان‌ها فایل را یک بار پیش از هش کردن stat می‌کنند و همان را به lookup و store می‌دهند؛ store اگر
+# فایل در این فاصله تغییر کرده باشد هش را ذخیره نمی‌کند.
+
+HASH_CACHE_FILE = "hash_cache.db"
+DEFAULT_MAX_ENTRIES = 500000
+# سقف صفر یا منفی با _evict کل کش را پاک می‌کرد
+MIN_MAX_ENTRIES = 1
+# تعداد نوشتن‌ها پیش از commit و بررسی سقف اندازه
+COMMIT_EVERY = 500
+
+class HashCache:
+    def __init__(self, db_path=HASH_CACHE_FILE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max(max_entries, MIN_MAX_ENTRIES)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.pending_writes = 0
+        # زمان آخرین استفاده رکوردهای برخوردشده؛ دسته‌ای و پیش از حذف قدیمی‌ترها نوشته می‌شود
+        self.touched = {}
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,
+                algorithm TEXT, digest TEXT, last_used REAL,
+                PRIMARY KEY (dev, ino, size, mtime_ns, algorithm)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_hashes_last_used ON hashes(last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(file_path, st=None):
+        if st is None:
+            st = os.stat(file_path)
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def lookup(self, file_path, algorithm, st=None):
+        try:
+            key = self.make_key(file_path, st)
+        except Exception:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT digest FROM hashes WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND algorithm=?",
+                key + (algorithm,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.touched[key + (algorithm,)] = time.time()
+            if len(self.touched) >= COMMIT_EVERY:
+                self._write_touched()
+                self.conn.commit()
+            return row[0]
+
+    def store(self, file_path, algorithm, digest, st=None):
+        """
+        st: stat گرفته‌شده پیش از هش کردن؛ اگر stat دوباره با آن فرق کند (فایل حین هش کردن تغییر کرده)
+        هش ذخیره نمی‌شود تا هش محتوای قدیمی زیر کلید محتوای تازه نرود.
+        """
+        try:
+            key = self.make_key(file_path)
+            if st is not None and self.make_key(file_path, st) != key:
+                return
+        except Exception:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (algorithm, digest, time.time())
+            )
+            self._after_write()
+
+    def _write_touched(self):
+        if self.touched:
+            self.conn.executemany(
+                "UPDATE hashes SET last_used=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND algorithm=?",
+                [(used,) + key for key, used in self.touched.items()]
+            )
+            self.touched = {}
+
+    def _after_write(self):
+        self.pending_writes += 1
+        if self.pending_writes >= COMMIT_EVERY:
+            self._write_touched()
+            self._evict()
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def _evict(self):
+        # حذف قدیمی‌ترین ردیف‌های استفاده‌شده وقتی تعداد از سقف بیشتر شود
+        count = self.conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM hashes WHERE rowid IN (SELECT rowid FROM hashes ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def set_max_entries(self, max_entries):
+        with self.lock:
+            self.max_entries = max(max_entries, MIN_MAX_ENTRIES)
+            self._write_touched()
+            self._evict()
+            self.conn.commit()
+
+    def flush(self):
+        with self.lock:
+            self._write_touched()
+            self._evict()
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM hashes")
+            self.touched = {}
+            self.conn.commit()
+            self.conn.execute("VACUUM")
+            self.pending_writes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def entry_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def stats(self):
+        return self.hits, self.misses
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_hash_cache():
+    """نمونه مشترک کش در کل برنامه"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            max_entries = DEFAULT_MAX_ENTRIES
+            try:
+                from config import load_config
+                max_entries = max(int(load_config().get("hash_cache_max_entries", DEFAULT_MAX_ENTRIES)), MIN_MAX_ENTRIES)
+            except Exception:
+                pass
+            _cache = HashCache(HASH_CACHE_FILE, max_entries)
+            atexit.register(_cache.flush)
+        return _cache
+
+def set_hash_cache_file(db_path):
+    """مسیر دیگری برای فایل کش (مثلاً پوشه وضعیت خط فرمان)؛ پیش از اولین استفاده از کش"""
+    global HASH_CACHE_FILE
+    with _cache_lock:
+        if _cache is not None:
+            raise RuntimeError("کش هش پیش‌تر باز شده است")
+        HASH_CACHE_FILE = db_path
+
+def cache_stat(file_path):
+    """stat پیش از هش کردن برای کلید کش؛ در صورت خطا None (هش بدون کش محاسبه می‌شود)"""
+    try:
+        return os.stat(file_path)
+    except OSError:
+        return None
+
+def cached_file_hash(file_path, algorithm, compute, st=None):
+    """
+    بازگرداندن هش از کش در صورت تغییر نکردن فایل؛ در غیر این صورت compute(file_path)
+    اجرا و نتیجه ذخیره می‌شود.
+    """
+    try:
+        if st is None:
+            st = os.stat(file_path)
+        cache = get_hash_cache()
+    except Exception:
+        return compute(file_path)
+    digest = cache.lookup(file_path, algorithm, st)
+    if digest is not None:
+        return digest
+    digest = compute(file_path)
+    if digest:
+        cache.store(file_path, algorithm, digest, st)
+    return digest
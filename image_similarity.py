@@ -0,0 +1,190 @@
+import os, time
+from duplicate_engine import run_per_device, new_stage_stats
+from hash_cache import get_hash_cache, cache_stat
+
+# NumPy و Pillow فقط برای معیار شباهت تصویری لازم هستند
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# تشخیص تصاویر تقریباً تکراری (تغییر اندازه، فشرده‌سازی مجدد JPEG) با هش ادراکی dHash
+# و نمایه BK-tree برای جستجوی فاصله همینگ (بدون وابستگی به PyQt5)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+# نام الگوریتم در کش دائمی هش‌ها
+DHASH_ALGORITHM = "dhash64"
+# حداکثر فاصله همینگ (از ۶۴ بیت) برای مشابه دانستن دو تصویر
+DEFAULT_SIMILARITY_THRESHOLD = 10
+# تعداد تصاویر کوچک‌شده‌ای که با هم و به صورت برداری هش می‌شوند
+DHASH_BATCH_SIZE = 256
+
+def image_similarity_available():
+    return np is not None and Image is not None
+
+def is_image_file(file_path):
+    return os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS
+
+def load_thumbnail(file_path, hash_size=8):
+    """تصویر خاکستری (hash_size+1)×hash_size برای dHash؛ در صورت خطا None"""
+    try:
+        with Image.open(file_path) as img:
+            # برای JPEG رمزگشایی مستقیم با مقیاس کوچک‌تر بسیار سریع‌تر است
+            img.draft("L", (hash_size * 8, hash_size * 8))
+            img = img.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+            return np.asarray(img, dtype=np.int16)
+    except Exception:
+        return None
+
+def dhash_batch(thumbnails):
+    """هش ۶۴ بیتی dHash برای دسته‌ای از تصاویر کوچک‌شده با یک عملیات برداری NumPy"""
+    if not thumbnails:
+        return []
+    pixels = np.stack(thumbnails)
+    bits = (pixels[:, :, 1:] > pixels[:, :, :-1]).reshape(len(thumbnails), -1)
+    packed = np.packbits(bits, axis=1)
+    return [int.from_bytes(row.tobytes(), "big") for row in packed]
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+class BKTree:
+    """درخت BK روی فاصله همینگ؛ جستجوی شعاعی بدون مقایسه همه جفت‌ها"""
+
+    def __init__(self):
+        # هر گره: [هش، مقادیر با همین هش، فرزندان بر اساس فاصله]
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def query(self, value, radius):
+        """همه آیتم‌هایی که فاصله هش آن‌ها تا value حداکثر radius است"""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= radius:
+                found.extend(node[1])
+            # طبق نامساوی مثلث فقط زیردرخت‌های با فاصله در بازه [d-r, d+r] ممکن است جواب داشته باشند
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return found
+
+def _cached_image_hash(cache, file_path):
+    """(هش ذخیره‌شده در کش یا None، تصویر کوچک‌شده برای هش‌کردن دسته‌ای، stat پیش از خواندن تصویر)"""
+    st = cache_stat(file_path) if cache else None
+    digest = cache.lookup(file_path, DHASH_ALGORITHM, st) if st else None
+    if digest is not None:
+        return int(digest, 16), None, st
+    return None, load_thumbnail(file_path), st
+
+def find_similar_images(records, threshold=DEFAULT_SIMILARITY_THRESHOLD, progress_callback=None, use_cache=True,
+                        device_workers=None, group_callback=None, should_stop=None):
+    """
+    گروه‌بندی تصاویر مشابه: dHash هر تصویر (با کش دائمی) سپس جستجوی BK-tree با شعاع threshold.
+    تصاویری که زنجیره‌ای از جفت‌های مشابه بین آن‌ها وجود دارد در یک گروه قرار می‌گیرند.
+    progress_callback(stage, done, total) مانند find_hash_duplicates فراخوانی می‌شود.
+    با should_stop هش‌کردن متوقف می‌شود؛ هش‌های محاسبه‌شده در کش می‌مانند و گروهی برگردانده نمی‌شود.
+    خروجی: (گروه‌ها بر اساس اولین مسیر، آمار مراحل)
+    """
+    if not image_similarity_available():
+        raise RuntimeError("برای مقایسه تصویری نصب numpy و Pillow لازم است.")
+    cache = get_hash_cache() if use_cache else None
+    images = [(file_path, size) for file_path, size in records if is_image_file(file_path)]
+    hash_stats = new_stage_stats("image_hash")
+    group_stats = new_stage_stats("similarity")
+    hash_stats["files"] = len(images)
+    hashes = {}
+    batch_paths, batch_thumbs, batch_stats = [], [], []
+
+    def flush_batch():
+        for file_path, value, st in zip(batch_paths, dhash_batch(batch_thumbs), batch_stats):
+            hashes[file_path] = value
+            if st:
+                cache.store(file_path, DHASH_ALGORITHM, f"{value:016x}", st)
+        batch_paths.clear()
+        batch_thumbs.clear()
+        batch_stats.clear()
+
+    started = time.perf_counter()
+    done = 0
+    for (file_path, size), (value, thumbnail, st) in run_per_device(
+            images, lambda item: _cached_image_hash(cache, item[0]), device_workers):
+        done += 1
+        if value is not None:
+            hashes[file_path] = value
+        elif thumbnail is not None:
+            hash_stats["bytes_read"] += size
+            batch_paths.append(file_path)
+            batch_thumbs.append(thumbnail)
+            batch_stats.append(st)
+            if len(batch_thumbs) >= DHASH_BATCH_SIZE:
+                flush_batch()
+        if progress_callback:
+            progress_callback(1, done, len(images))
+        if should_stop and should_stop():
+            break
+    flush_batch()
+    hash_stats["candidates"] = len(hashes)
+    hash_stats["seconds"] = time.perf_counter() - started
+    if should_stop and should_stop():
+        return {}, [hash_stats, group_stats]
+
+    started = time.perf_counter()
+    group_stats["files"] = len(hashes)
+    parent = {}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    tree = BKTree()
+    for done, (file_path, value) in enumerate(hashes.items(), 1):
+        parent[file_path] = file_path
+        for other in tree.query(value, threshold):
+            root_a, root_b = find(file_path), find(other)
+            if root_a != root_b:
+                parent[root_b] = root_a
+        tree.add(value, file_path)
+        if progress_callback and done % 1000 == 0:
+            progress_callback(2, done, len(hashes))
+    components = {}
+    for file_path in hashes:
+        components.setdefault(find(file_path), []).append(file_path)
+    groups = {}
+    for files in components.values():
+        if len(files) > 1:
+            groups[files[0]] = files
+            group_stats["candidates"] += len(files)
+    group_stats["seconds"] = time.perf_counter() - started
+    if progress_callback:
+        progress_callback(2, len(hashes), len(hashes))
+    if group_callback:
+        if groups:
+            group_callback(groups)
+        groups = {}
+    return groups, [hash_stats, group_stats]
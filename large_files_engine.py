@@ -0,0 +1,165 @@
+import os, time, heapq, itertools
+from duplicate_engine import ScanFilter
+from file_walker import iter_files, read_directory
+from fs_watcher import changed_directory, normalize_changes
+from parallel_walker import walk_roots
+from scan_cache import get_scan_cache
+
+# یافتن بزرگ‌ترین فایل‌ها به صورت جریانی (بدون وابستگی به PyQt5)
+# به جای نگه داشتن همه فایل‌های درایو، فقط N فایل بزرگ‌تر در کل و K فایل بزرگ‌تر هر پسوند در
+# هرم‌های کمینه با اندازه ثابت نگه داشته می‌شوند؛ حافظه به تعداد فایل‌های درایو بستگی ندارد.
+# فیلترهای اندازه و پسوند تنظیمات حین پیمایش اعمال می‌شوند (پسوند پیش از stat).
+
+DEFAULT_TOP_FILES = 1000
+DEFAULT_TOP_PER_EXTENSION = 100
+# فاصله حداقل بین دو گزارش پیشرفت و دو نتیجه میانی (ثانیه)؛ ساختن گروه‌ها و پر کردن دیالوگ گران‌تر است
+PROGRESS_INTERVAL = 0.5
+PARTIAL_INTERVAL = 2.0
+
+def scan_filter_from_settings(settings):
+    """فیلترهای ذخیره‌شده تب: حداقل اندازه (مگابایت)، پسوندهای مجاز و پوشه‌های حالت امن"""
+    excludes = settings.get("safe_directories", []) if settings.get("safe_mode") else []
+    return ScanFilter(excludes, settings.get("allowed_extensions"), None, settings.get("only_scan_larger_than"))
+
+class TopFiles:
+    """
+    بزرگ‌ترین فایل‌ها: هر فایلی که جزو limit فایل بزرگ کل یا per_extension فایل بزرگ پسوند خودش
+    باشد نگه داشته می‌شود. add همان امضای FileRecordStore.add را دارد تا رکوردهای پیمایش مستقیم داده شوند.
+    """
+
+    def __init__(self, limit=DEFAULT_TOP_FILES, per_extension=DEFAULT_TOP_PER_EXTENSION):
+        self.limit = limit
+        self.per_extension = per_extension
+        # رکوردها (اندازه، شماره، پوشه، نام، پسوند)؛ شماره یکتا است تا مقایسه به رشته‌ها نرسد
+        self.largest = []
+        self.by_extension = {}
+        self.counter = itertools.count()
+        self.files_seen = 0
+        self.bytes_seen = 0
+        # با هر تغییر نتیجه افزایش می‌یابد تا نتیجه میانی تکراری ارسال نشود
+        self.version = 0
+
+    def add(self, directory, name, size, mtime=0.0, inode=0):
+        self.files_seen += 1
+        self.bytes_seen += size
+        ext = os.path.splitext(name)[1].lower()
+        entry = (size, next(self.counter), directory, name, ext)
+        kept = _push(self.largest, entry, self.limit)
+        if _push(self.by_extension.setdefault(ext, []), entry, self.per_extension) or kept:
+            self.version += 1
+
+    def entries(self):
+        retained = {entry[1]: entry for heap in (self.largest, *self.by_extension.values()) for entry in heap}
+        return sorted(retained.values(), reverse=True)
+
+    def __len__(self):
+        return len(self.entries())
+
+    def groups(self):
+        """{پسوند: [(مسیر، اندازه)]} به ترتیب نزولی اندازه، برای FileGroupDialog"""
+        groups = {}
+        for size, _, directory, name, ext in self.entries():
+            groups.setdefault(ext, []).append((os.path.join(directory, name), size))
+        return groups
+
+    def updated(self, dirs, trees, **options):
+        """
+        نتیجه تازه برای تغییرات DirectoryWatcher: فایل‌های پوشه‌های تغییرکرده کنار گذاشته و دوباره
+        خوانده می‌شوند. فایل‌هایی که پیش‌تر از هرم‌ها بیرون رفته‌اند جای فایل‌های حذف‌شده را نمی‌گیرند
+        تا اسکن بعدی. options همان پارامترهای فیلتر iter_files هستند.
+        """
+        top = TopFiles(self.limit, self.per_extension)
+        changed_dirs, changed_trees = normalize_changes(dirs, trees)
+        for size, _, directory, name, _ in reversed(self.entries()):
+            if not changed_directory(directory, changed_dirs, changed_trees):
+                top.add(directory, name, size)
+        for directory in dirs:
+            result = read_directory(directory, **options)
+            if result is not None:
+                for record in result[1]:
+                    top.add(*record)
+        for tree in trees:
+            for record in iter_files(tree, **options):
+                top.add(*record)
+        top.files_seen, top.bytes_seen = self.files_seen, self.bytes_seen
+        return top
+
+def _push(heap, entry, limit):
+    if len(heap) < limit:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+    else:
+        return False
+    return True
+
+class _Reporter:
+    """گزارش محدودشده پیشرفت و نتایج میانی حین پیمایش"""
+
+    def __init__(self, top, progress_callback, partial_callback):
+        self.top = top
+        self.progress_callback = progress_callback
+        self.partial_callback = partial_callback
+        self.started = time.monotonic()
+        self.last_progress = 0.0
+        self.last_partial = self.started
+        self.partial_version = 0
+
+    def update(self, directory, final=False):
+        now = time.monotonic()
+        if self.progress_callback and (final or now - self.last_progress >= PROGRESS_INTERVAL):
+            self.last_progress = now
+            elapsed = now - self.started
+            self.progress_callback({
+                "files": self.top.files_seen,
+                "bytes": self.top.bytes_seen,
+                "files_per_second": self.top.files_seen / elapsed if elapsed > 0 else 0.0,
+                "directory": directory,
+                "elapsed": elapsed,
+            })
+        if (self.partial_callback and not final and self.top.version != self.partial_version
+                and now - self.last_partial >= PARTIAL_INTERVAL):
+            self.last_partial = now
+            self.partial_version = self.top.version
+            self.partial_callback(self.top.groups())
+
+def find_largest_files(roots, scan_filter=None, limit=DEFAULT_TOP_FILES, per_extension=DEFAULT_TOP_PER_EXTENSION,
+                       device_workers=None, should_stop=None, root_callback=None, progress_callback=None,
+                       partial_callback=None):
+    """
+    پیمایش هم‌زمان ریشه‌ها و نگه داشتن بزرگ‌ترین فایل‌ها در TopFiles.
+    ریشه‌هایی که نتیجه تازه‌شان در کش اسکن مشترک هست پیمایش نمی‌شوند.
+    root_callback(ریشه، تعداد فایل‌های پذیرفته‌شده، از کش؟) پس از پایان هر ریشه.
+    progress_callback(دیکشنری files، bytes، files_per_second، directory و elapsed) حداکثر هر
+    PROGRESS_INTERVAL ثانیه و partial_callback(گروه‌های میانی مانند TopFiles.groups) حداکثر هر
+    PARTIAL_INTERVAL ثانیه. should_stop بین پوشه‌ها بررسی می‌شود؛ پس از توقف نتیجه تا همان لحظه برمی‌گردد.
+    """
+    scan_filter = scan_filter or ScanFilter()
+    root_callback = root_callback or (lambda *args: None)
+    top = TopFiles(limit, per_extension)
+    reporter = _Reporter(top, progress_callback, partial_callback)
+    pending = []
+    for root in roots:
+        if should_stop and should_stop():
+            return top
+        cached = get_scan_cache().get(root, scan_filter)
+        if cached is None:
+            pending.append(root)
+            continue
+        for i in range(len(cached)):
+            top.add(cached.directory(i), cached.name(i), cached.sizes[i])
+        root_callback(root, len(cached), True)
+        reporter.update(root)
+    counts = dict.fromkeys(pending, 0)
+    for root, batch in walk_roots(pending, device_workers, should_stop=should_stop,
+                                  accept_name=scan_filter.accepts_name, accept_size=scan_filter.accepts_size,
+                                  exclude_dir=scan_filter.is_excluded_dir):
+        if batch is None:
+            root_callback(root, counts[root], False)
+            continue
+        for record in batch:
+            top.add(*record)
+        counts[root] += len(batch)
+        reporter.update(batch[-1][0])
+    reporter.update(None, final=True)
+    return top
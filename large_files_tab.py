@@ -4,9 +4,12 @@ from PyQt5.QtWidgets import (
     QCheckBox, QLabel, QListWidget, QListWidgetItem, QSlider, QTabWidget, QGroupBox,
     QRadioButton, QDialog, QTreeWidget, QTreeWidgetItem, QScrollArea
 )
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QThread
 from PyQt5.QtGui import QFont
 from PyQt5.Qt import QSystemTrayIcon
+from fs_watcher import SharedWatch
+from scan_cache import get_scan_cache
+from large_files_engine import find_largest_files, scan_filter_from_settings
 
 # در صورت استفاده از حذف به سطل بازیافت، کتابخانه send2trash را در نظر می‌گیریم.
 try:
@@ -39,6 +42,14 @@ if not os.path.exists(CONFIG_FILE):
     except Exception as e:
         print(f"خطا در مخفی‌سازی فایل پیکربندی: {e}")
 
+def load_settings():
+    """تنظیمات ذخیره‌شده صفحه تنظیمات تب"""
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
 def format_size(size_bytes):
     try:
         if size_bytes == 0:
@@ -51,6 +62,32 @@ def format_size(size_bytes):
     except Exception:
         return f"{size_bytes} بایت"
 
+# رشته پس‌زمینه اسکن فایل‌های بزرگ؛ روند اسکن در large_files_engine (بدون Qt) است
+class LargeFileScanWorker(QThread):
+    progress_changed = pyqtSignal(dict)  # {"files", "bytes", "files_per_second", "directory", "elapsed"}
+    partial_results = pyqtSignal(dict)  # گروه‌های میانی {پسوند: [(مسیر، اندازه)]}
+    root_scanned = pyqtSignal(str, int, bool)  # ریشه، تعداد فایل‌ها، از کش اسکن؟
+    result = pyqtSignal(object, bool)  # TopFiles، توقف توسط کاربر
+
+    def __init__(self, paths, scan_filter):
+        super().__init__()
+        self.paths = paths
+        self.scan_filter = scan_filter
+        self.stop_requested = False
+
+    def request_stop(self):
+        self.stop_requested = True
+
+    def is_stopped(self):
+        return self.stop_requested
+
+    def run(self):
+        top = find_largest_files(
+            self.paths, self.scan_filter, should_stop=self.is_stopped, root_callback=self.root_scanned.emit,
+            progress_callback=self.progress_changed.emit, partial_callback=self.partial_results.emit
+        )
+        self.result.emit(top, self.stop_requested)
+
 class FileGroupDialog(QDialog):
     def __init__(self, file_groups, deletion_method, status_callback, tray):
         super().__init__()
@@ -82,23 +119,9 @@ class FileGroupDialog(QDialog):
         self.tree.header().setDefaultSectionSize(350)
         font = QFont("Tahoma", 10)
         self.tree.setFont(font)
-        
-        # اضافه کردن گروه‌ها به درخت
-        for ext, files in self.file_groups.items():
-            group_name = ext if ext else "بدون پسوند"
-            group_item = QTreeWidgetItem(self.tree, [f"گروه {group_name} ({len(files)} فایل)", ""])
-            group_item.setFlags(group_item.flags() | Qt.ItemIsUserCheckable)
-            group_item.setCheckState(0, Qt.Unchecked)
-            for file_path in files:
-                try:
-                    size = os.path.getsize(file_path)
-                except Exception:
-                    size = 0
-                file_item = QTreeWidgetItem(group_item, [file_path, format_size(size)])
-                file_item.setFlags(file_item.flags() | Qt.ItemIsUserCheckable)
-                file_item.setCheckState(0, Qt.Unchecked)
-        self.tree.expandAll()
+        self.populate_tree()
         layout.addWidget(self.tree)
+        self.scan_running = False
         
         # دکمه‌های تایید و انصراف
         btn_layout = QHBoxLayout()
@@ -112,6 +135,42 @@ class FileGroupDialog(QDialog):
         layout.addLayout(btn_layout)
         self.setLayout(layout)
     
+    def populate_tree(self, checked=()):
+        # اضافه کردن گروه‌ها به درخت
+        for ext, files in self.file_groups.items():
+            group_name = ext if ext else "بدون پسوند"
+            group_item = QTreeWidgetItem(self.tree, [f"گروه {group_name} ({len(files)} فایل)", ""])
+            group_item.setFlags(group_item.flags() | Qt.ItemIsUserCheckable)
+            group_item.setCheckState(0, Qt.Unchecked)
+            # اندازه از رکوردهای اسکن خوانده می‌شود و نیازی به stat دوباره نیست
+            for file_path, size in files:
+                file_item = QTreeWidgetItem(group_item, [file_path, format_size(size)])
+                file_item.setFlags(file_item.flags() | Qt.ItemIsUserCheckable)
+                file_item.setCheckState(0, Qt.Checked if file_path in checked else Qt.Unchecked)
+        self.tree.expandAll()
+
+    def set_groups(self, file_groups):
+        """جایگزینی گروه‌ها پس از تغییر پوشه‌ها؛ انتخاب فایل‌هایی که هنوز وجود دارند حفظ می‌شود"""
+        checked = set()
+        root = self.tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            group_item = root.child(i)
+            for j in range(group_item.childCount()):
+                if group_item.child(j).checkState(0) == Qt.Checked:
+                    checked.add(group_item.child(j).text(0))
+        self.file_groups = file_groups
+        self.tree.clear()
+        self.populate_tree(checked)
+
+    def set_scan_running(self, running):
+        # تا پایان اسکن گروه‌ها کامل نیستند و حذف غیرفعال است
+        self.scan_running = running
+        self.deleteButton.setEnabled(not running)
+        if running:
+            self.setWindowTitle("نتایج اسکن (اسکن در حال انجام...) - انتخاب فایل‌ها برای حذف")
+        else:
+            self.setWindowTitle("نتایج اسکن - انتخاب فایل‌ها برای حذف")
+
     def select_all(self):
         root = self.tree.invisibleRootItem()
         for i in range(root.childCount()):
@@ -175,6 +234,7 @@ class FileGroupDialog(QDialog):
 
 class LargeFilesMainPage(QWidget):
     drivesScanned = pyqtSignal(list)
+    storeChanged = pyqtSignal(object, object)  # نتیجه قبلی، نتیجه به‌روزشده (TopFiles) پس از تغییر پوشه‌ها
     
     def __init__(self, status_callback, tray):
         super().__init__()
@@ -182,6 +242,15 @@ class LargeFilesMainPage(QWidget):
         self.tray = tray
         self.selected_paths = []
         self.deletion_method = "recycle_bin"
+        self.settings = load_settings()
+        self.scan_paths = []
+        # بزرگ‌ترین فایل‌های آخرین اسکن، فیلترهای آن، پیگیری تغییرات مسیرها و دیالوگ نتایج باز
+        self.top = None
+        self.scan_filter = None
+        self.worker = None
+        self.watcher = None
+        self.dialog = None
+        self.storeChanged.connect(self.on_store_changed)
         self.init_ui()
         
     def init_ui(self):
@@ -201,6 +270,16 @@ class LargeFilesMainPage(QWidget):
         self.startScanButton = QPushButton("شروع اسکن عمیق")
         self.startScanButton.clicked.connect(self.start_deep_scan)
         layout.addWidget(self.startScanButton)
+
+        self.stopScanButton = QPushButton("توقف اسکن")
+        self.stopScanButton.setEnabled(False)
+        self.stopScanButton.clicked.connect(self.stop_scan)
+        layout.addWidget(self.stopScanButton)
+
+        # پیشرفت اسکن در حال اجرا: تعداد و حجم فایل‌ها، سرعت و پوشه جاری
+        self.progressLabel = QLabel()
+        self.progressLabel.setWordWrap(True)
+        layout.addWidget(self.progressLabel)
         
         self.setLayout(layout)
     
@@ -260,29 +339,111 @@ class LargeFilesMainPage(QWidget):
             self.status_callback("هیچ مسیر انتخاب نشده است!")
             return
         
-        all_found_files = {}
-        for path in selected_paths:
-            self.status_callback(f"شروع اسکن عمیق در مسیر: {path}")
-            found_files = self.deep_scan_path(path)
-            for file_path in found_files:
-                ext = os.path.splitext(file_path)[1].lower()
-                all_found_files.setdefault(ext, []).append(file_path)
-            self.status_callback(f"پایان اسکن مسیر {path}؛ تعداد فایل‌های یافت‌شده: {len(found_files)}")
-            self.tray.showMessage("اسکن عمیق", f"مسیر {path}؛ فایل‌ها: {len(found_files)}", QSystemTrayIcon.Information, 3000)
-        
-        if all_found_files:
-            dlg = FileGroupDialog(all_found_files, self.deletion_method, self.status_callback, self.tray)
-            dlg.exec_()
+        if self.worker is not None and self.worker.isRunning():
+            return
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self.dialog is not None:
+            self.dialog.close()
+            self.dialog = None
+        self.top = None
+        self.scan_paths = selected_paths
+        self.scanButton.setEnabled(False)
+        self.addFolderButton.setEnabled(False)
+        self.startScanButton.setEnabled(False)
+        self.stopScanButton.setEnabled(True)
+        self.progressLabel.clear()
+        # فقط بزرگ‌ترین فایل‌ها نگه داشته می‌شوند؛ درایوهای مختلف هم‌زمان و در پس‌زمینه پیمایش می‌شوند و
+        # مسیرهایی که به تازگی در همین تب یا تب دیگری پیمایش شده‌اند از کش اسکن مشترک خوانده می‌شوند
+        self.scan_filter = scan_filter_from_settings(self.settings)
+        self.status_callback("شروع اسکن عمیق در مسیرها: " + "، ".join(selected_paths))
+        self.worker = LargeFileScanWorker(selected_paths, self.scan_filter)
+        self.worker.progress_changed.connect(self.show_progress)
+        self.worker.partial_results.connect(self.show_partial_results)
+        self.worker.root_scanned.connect(self.on_root_scanned)
+        self.worker.result.connect(self.handle_scan_result)
+        self.worker.start()
+
+    def stop_scan(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.request_stop()
+            self.stopScanButton.setEnabled(False)
+            self.status_callback("در حال توقف اسکن...")
+
+    def show_progress(self, progress):
+        text = (f"{progress['files']} فایل مطابق فیلترها | {format_size(progress['bytes'])} | "
+                f"{progress['files_per_second']:.0f} فایل در ثانیه")
+        if progress["directory"]:
+            text += f"\nپوشه جاری: {progress['directory']}"
+        self.progressLabel.setText(text)
+
+    def show_partial_results(self, groups):
+        # دیالوگ نتایج با اولین نتیجه میانی باز می‌شود و تا پایان اسکن به‌روز می‌شود
+        if self.dialog is None:
+            self.dialog = FileGroupDialog(groups, self.deletion_method, self.status_callback, self.tray)
+            self.dialog.set_scan_running(True)
+            self.dialog.show()
         else:
+            self.dialog.set_groups(groups)
+
+    def handle_scan_result(self, top, cancelled):
+        self.scanButton.setEnabled(True)
+        self.addFolderButton.setEnabled(True)
+        self.startScanButton.setEnabled(True)
+        self.stopScanButton.setEnabled(False)
+        self.worker = None
+        all_found_files = top.groups()
+        if cancelled:
+            self.status_callback(f"اسکن متوقف شد؛ {len(top)} فایل بزرگ تا این لحظه یافت شد.")
+        else:
+            self.status_callback(f"{top.files_seen} فایل مطابق فیلترها بررسی شد؛ {len(top)} فایل بزرگ نگه داشته شد.")
+            # تغییرات بعدی مسیرها بدون پیمایش دوباره روی همین نتیجه اعمال می‌شود؛ نتیجه ناقص پیگیری نمی‌شود
+            self.top = top
+            self.watch_paths(self.scan_paths)
+        if not all_found_files:
+            if self.dialog is not None:
+                self.dialog.close()
+                self.dialog = None
             self.status_callback("هیچ فایل مناسبی یافت نشد.")
-    
-    def deep_scan_path(self, path):
-        found_files = []
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                full_path = os.path.join(root, file)
-                found_files.append(full_path)
-        return found_files
+            return
+        if self.dialog is None:
+            self.dialog = FileGroupDialog(all_found_files, self.deletion_method, self.status_callback, self.tray)
+        else:
+            self.dialog.set_groups(all_found_files)
+        self.dialog.set_scan_running(False)
+        self.dialog.show()
+
+    def on_root_scanned(self, path, found_count, cached):
+        source = "از نتیجه اسکن اخیر" if cached else "پایان اسکن"
+        self.status_callback(f"{source} مسیر {path}؛ تعداد فایل‌های یافت‌شده: {found_count}")
+        self.tray.showMessage("اسکن عمیق", f"مسیر {path}؛ فایل‌ها: {found_count}", QSystemTrayIcon.Information, 3000)
+
+    def watch_paths(self, paths):
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.watcher = SharedWatch(paths, self.on_watch_changes, self.scan_filter.is_excluded_dir)
+        self.watcher.start()
+
+    def on_watch_changes(self, dirs, trees):
+        # در نخ پیگیری اجرا می‌شود
+        cache = get_scan_cache()
+        for path in dirs | trees:
+            cache.invalidate(path)
+        base, scan_filter = self.top, self.scan_filter
+        if base is not None:
+            self.storeChanged.emit(base, base.updated(
+                dirs, trees, accept_name=scan_filter.accepts_name, accept_size=scan_filter.accepts_size,
+                exclude_dir=scan_filter.is_excluded_dir
+            ))
+
+    def on_store_changed(self, base, updated):
+        if self.top is not base:
+            return
+        self.top = updated
+        if self.dialog is not None:
+            self.dialog.set_groups(updated.groups())
+        self.status_callback(f"تغییرات مسیرهای اسکن‌شده اعمال شد؛ {len(updated)} فایل بزرگ.")
 
 class LargeFilesSettingsPage(QWidget):
     settingsSaved = pyqtSignal(dict)
@@ -474,4 +635,5 @@ class LargeFilesTab(QWidget):
     
     def update_settings(self, settings):
         self.main_page.deletion_method = settings.get("delete_method", "recycle_bin")
-        self.status_callback("تنظیمات حذف به‌روزرسانی شدند.")
\ No newline at end of file
+        self.main_page.settings = settings
+        self.status_callback("تنظیمات حذف و فیلترهای اسکن به‌روزرسانی شدند.")
\ No newline at end of file
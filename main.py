@@ -1,8 +1,9 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QProgressBar, QSystemTrayIcon, QDesktopWidget
-from PyQt5.QtCore import QPropertyAnimation
+from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QProgressBar, QSystemTrayIcon, QDesktopWidget, QLabel
+from PyQt5.QtCore import QPropertyAnimation, QTimer
 from PyQt5.QtGui import QFont, QIcon
 from config import load_config
+from hash_cache import get_hash_cache
 from folders_tab import FoldersTab
 from files_tab import FilesTab
 from shuffle_tab import ShuffleTab
@@ -42,6 +43,13 @@ class MainWindow(QMainWindow):
         self.progress_bar = QProgressBar()
         self.progress_bar.setTextVisible(True)
         self.status_bar.addPermanentWidget(self.progress_bar)
+        # نمایش آمار کش هش (برخورد/عدم برخورد) در نوار وضعیت
+        self.hash_cache_label = QLabel()
+        self.status_bar.addPermanentWidget(self.hash_cache_label)
+        self.hash_cache_timer = QTimer(self)
+        self.hash_cache_timer.timeout.connect(self.update_hash_cache_stats)
+        self.hash_cache_timer.start(2000)
+        self.update_hash_cache_stats()
         self.tray_icon = QSystemTrayIcon(QIcon("icons/app.png"), self)
         self.tray_icon.show()
 
@@ -118,6 +126,13 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(current)
         QApplication.processEvents()
 
+    def update_hash_cache_stats(self):
+        try:
+            hits, misses = get_hash_cache().stats()
+            self.hash_cache_label.setText(f"کش هش: {hits} برخورد / {misses} عدم برخورد")
+        except Exception as e:
+            self.hash_cache_label.setText(f"کش هش: خطا ({e})")
+
     def update_tab_description(self, index):
         tab_name = self.tabs.tabText(index)
         description = self.tab_descriptions.get(tab_name, "توضیحی برای این تب موجود نیست.")
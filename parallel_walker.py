@@ -0,0 +1,201 @@
+import os, queue, threading
+from collections import deque
+from file_walker import read_directory, directory_key, SYMLINKS_FILES, SYMLINKS_FOLLOW, FILE_BATCH_SIZE
+from duplicate_engine import get_mount_devices, device_for_path, workers_for_device
+
+# پیمایش هم‌زمان چند ریشه (چند درایو) بدون وابستگی به PyQt5
+# ریشه‌های هر دستگاه فیزیکی در گروه نخ جداگانه پیمایش می‌شوند؛ زمان کل نزدیک به زمان کندترین
+# دستگاه است، نه مجموع آن‌ها. تعداد نخ هر دستگاه همان workers_for_device است: روی SSD چند نخ
+# زیرپوشه‌ها را بین خود تقسیم می‌کنند و روی دیسک چرخان یک نخ تا جابه‌جایی هد زیاد نشود.
+
+# حداکثر دسته‌های در انتظار مصرف‌کننده؛ پیمایش‌گرها بیش از این از مصرف‌کننده جلو نمی‌افتند
+RESULT_QUEUE_SIZE = 16
+# حداکثر پوشه‌های صف هر نخ؛ زیرپوشه‌هایی که جا نمی‌شوند همان نخ فوراً و عمقی پیمایش می‌کند تا حافظه
+# صف‌ها در درخت‌های بسیار پهن به عمق درخت وابسته بماند، نه به تعداد کل پوشه‌ها
+LOCAL_QUEUE_SIZE = 4096
+# فاصله بررسی توقف و پایان کار نخ‌های بیکار (ثانیه)
+IDLE_WAIT = 0.05
+
+class _RootState:
+    """پوشه‌های باقی‌مانده و رکوردهای ارسال‌نشده یک ریشه"""
+
+    def __init__(self, root, root_device):
+        self.root = root
+        self.root_device = root_device
+        self.pending = 1
+        self.buffer = []
+        self.lock = threading.Lock()
+
+class _DeviceWalk:
+    """
+    پیمایش ریشه‌های یک دستگاه با چند نخ: هر نخ پوشه‌های صف خودش را از انتها (عمقی) برمی‌دارد و
+    وقتی صفش خالی شد قدیمی‌ترین پوشه صف نخ دیگری را برمی‌دارد (work stealing)؛ این پوشه‌ها معمولاً
+    بالاتر در درخت و بزرگ‌تر هستند، پس کار بین نخ‌ها متعادل می‌ماند. صف هر نخ حداکثر LOCAL_QUEUE_SIZE
+    پوشه دارد.
+    """
+
+    def __init__(self, states, workers, walker):
+        self.walker = walker
+        self.queues = [deque() for _ in range(workers)]
+        for i, state in enumerate(states):
+            self.queues[i % workers].append((state, state.root))
+        self.outstanding = len(states)
+        self.cond = threading.Condition()
+
+    def next_task(self, index):
+        try:
+            return self.queues[index].pop()
+        except IndexError:
+            pass
+        for offset in range(1, len(self.queues)):
+            try:
+                return self.queues[(index + offset) % len(self.queues)].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def work(self, index):
+        walker = self.walker
+        timings = {} if walker.timings is not None else None
+        while not walker.stop.is_set():
+            task = self.next_task(index)
+            if task is None:
+                with self.cond:
+                    if not self.outstanding:
+                        break
+                    self.cond.wait(IDLE_WAIT)
+                continue
+            if walker.stopped():
+                break
+            self.process(index, *task, timings)
+        walker.merge_timings(timings)
+
+    def process(self, index, state, current, timings):
+        walker = self.walker
+        local = self.queues[index]
+        # پوشه‌هایی که در صف این نخ جا نشده‌اند
+        inline = []
+        while True:
+            subdirs, records = [], []
+            if walker.first_visit(current):
+                result = read_directory(current, root_device=state.root_device, timings=timings, **walker.options)
+                if result is not None:
+                    subdirs, records = result
+            # شمارنده‌ها پیش از قرار دادن زیرپوشه‌ها در صف افزایش می‌یابند تا پایان کار زودتر از موعد تشخیص داده نشود
+            with self.cond:
+                self.outstanding += len(subdirs)
+            with state.lock:
+                state.pending += len(subdirs)
+            room = max(LOCAL_QUEUE_SIZE - len(local), 0)
+            local.extend((state, sub_path) for sub_path in subdirs[:room])
+            inline.extend(subdirs[room:])
+            with state.lock:
+                state.pending -= 1
+                state.buffer.extend(records)
+                done = not state.pending
+                if done or len(state.buffer) >= walker.batch_size:
+                    batch, state.buffer = state.buffer, []
+                    # زیر قفل ریشه ارسال می‌شود تا پایان ریشه همیشه پس از آخرین دسته آن برسد
+                    if batch:
+                        walker.put((state.root, batch))
+                    if done:
+                        walker.put((state.root, None))
+            with self.cond:
+                self.outstanding -= 1
+                if not self.outstanding:
+                    self.cond.notify_all()
+            if not inline or walker.stopped():
+                return
+            current = inline.pop()
+
+class _ParallelWalker:
+    def __init__(self, should_stop, batch_size, timings, options):
+        self.should_stop = should_stop
+        self.batch_size = batch_size
+        self.timings = timings
+        self.options = options
+        self.stop = threading.Event()
+        self.output = queue.Queue(RESULT_QUEUE_SIZE)
+        self.lock = threading.Lock()
+        self.visited = set() if options.get("symlinks") == SYMLINKS_FOLLOW else None
+
+    def stopped(self):
+        if self.should_stop and self.should_stop():
+            self.stop.set()
+        return self.stop.is_set()
+
+    def put(self, item):
+        while not self.stop.is_set():
+            try:
+                self.output.put(item, timeout=IDLE_WAIT)
+                return
+            except queue.Full:
+                continue
+
+    def first_visit(self, path):
+        if self.visited is None:
+            return True
+        key = directory_key(path)
+        with self.lock:
+            if key is None or key in self.visited:
+                return False
+            self.visited.add(key)
+        return True
+
+    def merge_timings(self, timings):
+        if not timings:
+            return
+        with self.lock:
+            for name, seconds in timings.items():
+                self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+def walk_roots(roots, device_workers=None, mounts=None, should_stop=None, batch_size=FILE_BATCH_SIZE,
+               timings=None, accept_name=None, accept_size=None, exclude_dir=None, symlinks=SYMLINKS_FILES,
+               same_device=False, with_stat=True, snapshot=None):
+    """
+    پیمایش هم‌زمان چند ریشه با یک گروه نخ برای هر دستگاه.
+    خروجی: (ریشه، دسته رکوردهای iter_files) و پس از آخرین دسته هر ریشه (ریشه، None).
+    ترتیب رکوردها و ریشه‌ها مشخص نیست. پارامترهای فیلتر، پیوند، مرز دستگاه و عکس‌برداری همان
+    پارامترهای iter_files هستند؛ should_stop بین پوشه‌ها بررسی می‌شود و پس از توقف ریشه‌های
+    نیمه‌کاره پایان نمی‌یابند. timings مجموع زمان نخ‌ها است، نه زمان واقعی.
+    """
+    walker = _ParallelWalker(should_stop, batch_size, timings, {
+        "accept_name": accept_name, "accept_size": accept_size, "exclude_dir": exclude_dir,
+        "symlinks": symlinks, "with_stat": with_stat, "snapshot": snapshot,
+    })
+    mounts = mounts if mounts is not None else get_mount_devices()
+    by_device = {}
+    for root in roots:
+        if exclude_dir and exclude_dir(root):
+            yield root, None
+            continue
+        root_device = None
+        if same_device:
+            try:
+                root_device = os.stat(root).st_dev
+            except OSError:
+                yield root, None
+                continue
+        by_device.setdefault(device_for_path(root, mounts), []).append(_RootState(root, root_device))
+    threads = []
+    for device, states in by_device.items():
+        walk = _DeviceWalk(states, workers_for_device(device, device_workers), walker)
+        threads.extend(threading.Thread(target=walk.work, args=(i,), daemon=True) for i in range(len(walk.queues)))
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            try:
+                item = walker.output.get(timeout=IDLE_WAIT)
+            except queue.Empty:
+                if should_stop and should_stop():
+                    walker.stop.set()
+                # همه نخ‌ها تمام شده‌اند و پس از آن چیزی در صف نمانده است
+                if not any(thread.is_alive() for thread in threads) and walker.output.empty():
+                    break
+                continue
+            yield item
+    finally:
+        walker.stop.set()
+        for thread in threads:
+            thread.join()
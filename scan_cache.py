@@ -0,0 +1,160 @@
+import os, json, time, threading
+from collections import OrderedDict
+from file_records import FileRecordStore
+
+# کش نتایج پیمایش در حافظه، مشترک بین تب‌های فایل‌ها، فایل‌های بزرگ و فایل‌های تکراری (بدون وابستگی به PyQt5)
+# کلید هر عکس مسیر ریشه و امضای فیلترها است؛ عکس بدون فیلتر یک ریشه (مانند اسکن تب فایل‌ها)
+# برای زیرپوشه‌های آن و برای هر فیلتر دیگری بدون پیمایش دوباره برش داده می‌شود.
+# ریشه‌ها همان رشته‌ای هستند که پیمایش شده‌اند، چون پوشه رکوردها با همان شروع می‌شود.
+# عکس‌ها پس از SCAN_CACHE_TTL ثانیه کهنه حساب می‌شوند و در صورت عبور از سقف حافظه،
+# عکس‌هایی که دیرتر استفاده شده‌اند کامل کنار گذاشته می‌شوند.
+
+DEFAULT_SCAN_CACHE_TTL = 300
+DEFAULT_SCAN_CACHE_MB = 512
+
+def filter_signature(scan_filter=None):
+    """امضای متنی فیلترها؛ رشته خالی یعنی بدون فیلتر"""
+    if scan_filter is None:
+        return ""
+    signature = scan_filter.signature()
+    if not any(signature.values()):
+        return ""
+    return json.dumps(signature, sort_keys=True)
+
+def _under(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+def slice_records(store, root, scan_filter=None):
+    """
+    رکوردهای زیر root از یک عکس بزرگ‌تر یا بدون فیلتر، با اعمال فیلترها همان‌طور که پیمایش اعمال می‌کرد:
+    پوشه‌ای که خودش یا یکی از پوشه‌های بالاترش تا root مستثنی است کنار گذاشته می‌شود.
+    """
+    excluded = {}
+
+    def directory_excluded(directory):
+        if directory in excluded:
+            return excluded[directory]
+        if not _under(directory, root):
+            result = True
+        elif scan_filter is not None and scan_filter.is_excluded_dir(directory):
+            result = True
+        elif directory == root:
+            result = False
+        else:
+            result = directory_excluded(os.path.dirname(directory))
+        excluded[directory] = result
+        return result
+
+    skip = [directory_excluded(directory) for directory in store.dirs]
+    sliced = FileRecordStore()
+    for i in range(len(store)):
+        if skip[store.dir_column[i]]:
+            continue
+        name, size = store.name(i), store.sizes[i]
+        if scan_filter is not None and not (scan_filter.accepts_name(name) and scan_filter.accepts_size(size)):
+            continue
+        sliced.add(store.directory(i), name, size, store.mtimes[i], store.inodes[i])
+    return sliced
+
+class ScanResultCache:
+    def __init__(self, ttl=DEFAULT_SCAN_CACHE_TTL, memory_budget=DEFAULT_SCAN_CACHE_MB * 1024 * 1024):
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+        self.lock = threading.Lock()
+        # (ریشه، امضای فیلتر) ← (مخزن، زمان اسکن، حافظه)؛ ترتیب همان ترتیب آخرین استفاده است
+        self.entries = OrderedDict()
+        self.memory = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, root, scan_filter=None):
+        """
+        رکوردهای تازه ریشه با این فیلترها یا None. اگر عکس دقیق نباشد، از عکس بدون فیلتر همین ریشه
+        یا یکی از پوشه‌های بالاتر آن برش داده و نگه داشته می‌شود.
+        """
+        signature = filter_signature(scan_filter)
+        with self.lock:
+            self.expire()
+            entry = self.entries.get((root, signature))
+            if entry is not None:
+                self.entries.move_to_end((root, signature))
+                self.hits += 1
+                return entry[0]
+            source = None
+            for (cached_root, cached_signature), cached in reversed(self.entries.items()):
+                if cached_signature == "" and _under(root, cached_root):
+                    source = (cached_root, cached)
+                    break
+            if source is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((source[0], ""))
+            self.hits += 1
+        # برش بیرون از قفل انجام می‌شود؛ زمان اسکن همان زمان عکس اصلی است
+        store = slice_records(source[1][0], root, scan_filter)
+        self.put(root, store, scan_filter, source[1][1])
+        return store
+
+    def put(self, root, store, scan_filter=None, scanned_at=None):
+        key = (root, filter_signature(scan_filter))
+        memory = store.memory_usage()
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.memory -= old[2]
+            if memory > self.memory_budget:
+                return
+            self.entries[key] = (store, scanned_at if scanned_at is not None else time.time(), memory)
+            self.memory += memory
+            while self.memory > self.memory_budget:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.memory -= evicted
+
+    def invalidate(self, path):
+        """کنار گذاشتن همه عکس‌هایی که path را شامل می‌شوند یا زیر آن هستند (پس از تغییر فایل‌ها)"""
+        with self.lock:
+            for key in [key for key in self.entries if _under(path, key[0]) or _under(key[0], path)]:
+                self.memory -= self.entries.pop(key)[2]
+
+    def set_limits(self, ttl, memory_budget):
+        with self.lock:
+            self.ttl = ttl
+            self.memory_budget = memory_budget
+            self.expire()
+            while self.memory > self.memory_budget:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.memory -= evicted
+
+    def stats(self):
+        """(برخورد، عدم برخورد، تعداد عکس‌ها، حافظه بر حسب بایت)"""
+        with self.lock:
+            return self.hits, self.misses, len(self.entries), self.memory
+
+    def expire(self):
+        now = time.time()
+        for key in [key for key, entry in self.entries.items() if now - entry[1] > self.ttl]:
+            self.memory -= self.entries.pop(key)[2]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.memory = 0
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_scan_cache():
+    """نمونه مشترک کش در کل برنامه"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            ttl, budget_mb = DEFAULT_SCAN_CACHE_TTL, DEFAULT_SCAN_CACHE_MB
+            try:
+                from config import load_config
+                config = load_config()
+                ttl = float(config.get("scan_cache_ttl", ttl))
+                budget_mb = float(config.get("scan_cache_memory_mb", budget_mb))
+            except Exception:
+                pass
+            _cache = ScanResultCache(ttl, int(budget_mb * 1024 * 1024))
+        return _cache
@@ -0,0 +1,130 @@
+import os, json, time
+from file_records import FileRecordStore
+
+# ذخیره نقطه ادامه اسکن‌های طولانی فایل‌های تکراری (بدون وابستگی به PyQt5)
+# هش‌های محاسبه‌شده در کش دائمی هش ذخیره می‌شوند؛ این فایل فقط مرز پیمایش، مرحله اسکن و طول معتبر
+# فایل رکوردها را نگه می‌دارد. رکوردهای پیمایش و سطل‌های اندازه کامل‌شده در هر ذخیره فقط به فایل
+# رکوردها افزوده می‌شوند (هر خط یک رکورد یا یک اندازه) و گروه‌های تأییدشده در یک فایل جداگانه
+# (هر خط یک گروه) افزوده می‌شوند.
+
+CHECKPOINT_FILE = "duplicate_scan_checkpoint.json"
+CHECKPOINT_GROUPS_FILE = "duplicate_scan_checkpoint.groups.jsonl"
+CHECKPOINT_JOURNAL_FILE = "duplicate_scan_checkpoint.records.jsonl"
+# فاصله زمانی ذخیره خودکار نقطه ادامه بر حسب ثانیه
+CHECKPOINT_INTERVAL = 30
+
+def scan_signature(paths, criteria, settings):
+    """شناسه اسکن؛ نقطه ادامه فقط برای همان مسیرها، معیار و تنظیمات قابل استفاده است"""
+    return {
+        "paths": sorted(os.path.normcase(os.path.abspath(p)) for p in paths),
+        "criteria": criteria,
+        "settings": settings,
+    }
+
+class ScanCheckpoint:
+    def __init__(self, signature, path=CHECKPOINT_FILE, groups_path=CHECKPOINT_GROUPS_FILE,
+                 journal_path=CHECKPOINT_JOURNAL_FILE):
+        self.signature = signature
+        self.path = path
+        self.groups_path = groups_path
+        self.journal_path = journal_path
+        # طول بخشی از فایل رکوردها که آخرین وضعیت ذخیره‌شده به آن اشاره می‌کند
+        self.journal_offset = 0
+        self.last_save = time.monotonic()
+
+    def load(self):
+        """
+        وضعیت ذخیره‌شده در صورت تطابق با همین اسکن؛ در غیر این صورت None. رکوردهای فایل رکوردها در
+        record_store و اندازه‌های کامل‌شده در completed_sizes وضعیت برگردانده می‌شوند.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("signature") != self.signature:
+            return None
+        if "journal_offset" in state:
+            journal = self.load_journal(state["journal_offset"])
+            if journal is None:
+                return None
+            state["record_store"], state["completed_sizes"] = journal
+        return state
+
+    def save(self, state):
+        # نوشتن در فایل موقت و جایگزینی اتمیک تا قطع برق یا خرابی فایل را نیمه‌کاره نگذارد
+        state = dict(state, signature=self.signature, saved_at=time.time())
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.journal_offset = state.get("journal_offset", self.journal_offset)
+        self.last_save = time.monotonic()
+
+    def due(self, interval=CHECKPOINT_INTERVAL):
+        return time.monotonic() - self.last_save >= interval
+
+    def append_journal(self, store, start, end, sizes):
+        """
+        افزودن رکوردهای start تا end مخزن store و اندازه‌های کامل‌شده sizes به فایل رکوردها، پس از بخش
+        معتبر آن (آنچه پس از آخرین ذخیره نوشته شده کنار گذاشته می‌شود). خروجی: journal_offset برای save
+        """
+        lines = [json.dumps([store.directory(i), store.name(i), store.sizes[i], store.mtimes[i], store.inodes[i]])
+                 for i in range(start, end)]
+        lines.extend(json.dumps(size) for size in sizes)
+        with open(self.journal_path, "r+b" if os.path.exists(self.journal_path) else "wb") as f:
+            f.seek(self.journal_offset)
+            f.truncate()
+            f.write("".join(line + "\n" for line in lines).encode("utf-8"))
+            return f.tell()
+
+    def load_journal(self, offset):
+        """(رکوردها، اندازه‌های کامل‌شده) تا موقعیت offset فایل رکوردها؛ None اگر فایل ناقص باشد"""
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read(offset)
+        except OSError:
+            data = b""
+        if len(data) < offset:
+            return None
+        store, sizes = FileRecordStore(), []
+        try:
+            for line in data.splitlines():
+                item = json.loads(line)
+                if isinstance(item, list):
+                    store.add(*item)
+                else:
+                    sizes.append(item)
+        except (ValueError, TypeError):
+            return None
+        self.journal_offset = offset
+        return store, sizes
+
+    def append_groups(self, groups):
+        with open(self.groups_path, "a", encoding="utf-8") as f:
+            for key, files in groups.items():
+                f.write(json.dumps({"key": key, "files": files}, ensure_ascii=False) + "\n")
+
+    def load_groups(self):
+        """گروه‌های ذخیره‌شده؛ گروه‌های تکراری (با کلید یکسان) فقط یک بار برگردانده می‌شوند"""
+        groups = {}
+        try:
+            with open(self.groups_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        # خط ناقص آخر در صورت قطع ناگهانی برنامه
+                        continue
+                    groups[item["key"]] = item["files"]
+        except OSError:
+            pass
+        return groups
+
+    def clear(self):
+        self.journal_offset = 0
+        for path in (self.path, self.path + ".tmp", self.groups_path, self.journal_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
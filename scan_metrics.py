@@ -0,0 +1,153 @@
+import sys, json, time, logging, psutil
+from duplicate_engine import format_size, STAGE_TITLES
+
+# resource فقط روی سیستم‌های یونیکسی وجود دارد
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# اندازه‌گیری زمان مراحل، سرعت، نرخ برخورد کش و بیشینه حافظه اسکن‌ها (بدون وابستگی به PyQt5)
+# خلاصه هر اسکن به صورت یک رکورد JSON در app.log افزوده می‌شود تا اسکن‌ها در نسخه‌های مختلف مقایسه شوند.
+
+METRICS_LOG_FILE = "app.log"
+
+PHASE_TITLES = {
+    "walk": "پیمایش",
+    "list": "فهرست پوشه‌ها",
+    "stat": "stat فایل‌ها",
+    "group": "گروه‌بندی",
+}
+
+_loggers = {}
+
+def metrics_logger(log_file=METRICS_LOG_FILE):
+    """logger جداگانه با همان قالب app.log؛ بدون انتشار به logger اصلی تا رکورد دو بار نوشته نشود"""
+    logger = _loggers.get(log_file)
+    if logger is None:
+        logger = logging.getLogger("scan_metrics." + log_file)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = logging.FileHandler(log_file, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        logger.addHandler(handler)
+        _loggers[log_file] = logger
+    return logger
+
+def peak_rss():
+    """بیشینه حافظه مقیم فرایند بر حسب بایت؛ در صورت نامشخص بودن، حافظه فعلی"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # لینوکس کیلوبایت و macOS بایت برمی‌گرداند
+        return peak if sys.platform == "darwin" else peak * 1024
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss)
+
+def _rate(amount, seconds):
+    return round(amount / seconds, 1) if seconds > 0 else 0.0
+
+class ScanMetrics:
+    def __init__(self, criteria, roots, settings=None, cache=None):
+        self.criteria = criteria
+        self.roots = list(roots)
+        self.settings = settings or {}
+        self.cache = cache
+        self.phases = {}
+        self.walk_timings = {}
+        self.stage_stats = []
+        self.files = 0
+        self.bytes_scanned = 0
+        self.started = time.perf_counter()
+        self.phase_started = {}
+        self.cache_start = cache.stats() if cache else (0, 0)
+
+    def start(self, phase):
+        self.phase_started[phase] = time.perf_counter()
+
+    def stop(self, phase):
+        started = self.phase_started.pop(phase, None)
+        if started is not None:
+            self.phases[phase] = self.phases.get(phase, 0.0) + time.perf_counter() - started
+
+    def add_stages(self, stage_stats):
+        self.stage_stats.extend(stage_stats)
+
+    def record(self, groups=0, duplicate_files=0, cancelled=False, snapshot=None):
+        """رکورد ساخت‌یافته خلاصه اسکن"""
+        for phase in list(self.phase_started):
+            self.stop(phase)
+        wall = time.perf_counter() - self.started
+        phases = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+        phases.update({name: round(seconds, 3) for name, seconds in self.walk_timings.items()})
+        stages = {}
+        bytes_read = 0
+        for stats in self.stage_stats:
+            bytes_read += stats["bytes_read"]
+            stages[stats["stage"]] = {
+                "seconds": round(stats["seconds"], 3),
+                "files": stats["files"],
+                "candidates": stats["candidates"],
+                "bytes_read": stats["bytes_read"],
+                "mb_per_s": _rate(stats["bytes_read"] / (1024 * 1024), stats["seconds"]),
+                "files_per_s": _rate(stats["files"], stats["seconds"]),
+            }
+        hits, misses = (0, 0)
+        if self.cache:
+            hits, misses = (a - b for a, b in zip(self.cache.stats(), self.cache_start))
+        group_seconds = self.phases.get("group", 0.0)
+        record = {
+            "event": "duplicate_scan",
+            "criteria": self.criteria,
+            "roots": self.roots,
+            "cancelled": cancelled,
+            "wall_seconds": round(wall, 3),
+            "files": self.files,
+            "bytes_scanned": self.bytes_scanned,
+            "walk_files_per_s": _rate(self.files, self.phases.get("walk", 0.0)),
+            "bytes_read": bytes_read,
+            "read_mb_per_s": _rate(bytes_read / (1024 * 1024), group_seconds),
+            "phases": phases,
+            "stages": stages,
+            "hash_cache": {"hits": hits, "misses": misses,
+                           "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None},
+            "peak_rss_bytes": peak_rss(),
+            "groups": groups,
+            "duplicate_files": duplicate_files,
+            "settings": self.settings,
+        }
+        if snapshot is not None:
+            record["snapshot"] = {"reused_dirs": snapshot.reused_dirs, "listed_dirs": snapshot.listed_dirs}
+        return record
+
+def log_metrics(record, log_file=METRICS_LOG_FILE):
+    try:
+        metrics_logger(log_file).info("scan_metrics " + json.dumps(record))
+    except OSError:
+        pass
+
+def format_metrics(record):
+    """متن چندخطی خلاصه عملکرد برای نمایش"""
+    lines = [f"زمان کل: {record['wall_seconds']:.2f} s، {record['files']} فایل "
+             f"({format_size(record['bytes_scanned'])})، بیشینه حافظه: {format_size(record['peak_rss_bytes'])}"]
+    phases = record["phases"]
+    if "walk" in phases:
+        text = f"{PHASE_TITLES['walk']}: {phases['walk']:.2f} s ({record['walk_files_per_s']} فایل در ثانیه)"
+        details = [f"{PHASE_TITLES[name]}: {phases[name]:.2f} s" for name in ("list", "stat") if name in phases]
+        if details:
+            text += " — " + "، ".join(details)
+        lines.append(text)
+    for name, stage in record["stages"].items():
+        lines.append(f"{STAGE_TITLES.get(name, name)}: {stage['seconds']:.2f} s، {stage['files']} فایل "
+                     f"({stage['files_per_s']} فایل در ثانیه، {stage['mb_per_s']} MB/s)")
+    if "group" in phases:
+        lines.append(f"{PHASE_TITLES['group']}: {phases['group']:.2f} s، خوانده‌شده: "
+                     f"{format_size(record['bytes_read'])} ({record['read_mb_per_s']} MB/s)")
+    cache = record["hash_cache"]
+    if cache["hit_rate"] is not None:
+        lines.append(f"کش هش: {cache['hits']} برخورد، {cache['misses']} عدم برخورد "
+                     f"(نرخ برخورد {cache['hit_rate'] * 100:.0f}%)")
+    snapshot = record.get("snapshot")
+    if snapshot and snapshot["reused_dirs"] + snapshot["listed_dirs"]:
+        lines.append(f"پوشه‌های بدون تغییر: {snapshot['reused_dirs']} از "
+                     f"{snapshot['reused_dirs'] + snapshot['listed_dirs']}")
+    return "\n".join(lines)
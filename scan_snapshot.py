@@ -0,0 +1,87 @@
+import os, json, sqlite3, threading
+
+# عکس‌برداری از درخت پیمایش‌شده برای اسکن مجدد افزایشی (بدون وابستگی به PyQt5)
+# برای هر پوشه زمان تغییر (نانوثانیه)، نام زیرپوشه‌ها و (نام، اندازه، زمان تغییر، inode) فایل‌ها ذخیره می‌شود.
+# فایل‌هایی که فیلتر نام رد کرده بدون stat و با اندازه، زمان تغییر و inode برابر None ذخیره می‌شوند.
+# اگر زمان تغییر پوشه عوض نشده باشد فهرست آن از همین‌جا خوانده می‌شود و پوشه دوباره فهرست نمی‌شود؛
+# فایل‌ها همچنان stat می‌شوند، چون بازنویسی محتوای یک فایل زمان تغییر پوشه را عوض نمی‌کند.
+# هش فایل‌ها در کش دائمی هش (با کلید inode، اندازه و زمان تغییر) نگه داشته می‌شود.
+
+SNAPSHOT_FILE = "scan_snapshot.db"
+# تعداد پوشه‌های نوشته‌شده پیش از commit
+COMMIT_EVERY = 500
+
+class ScanSnapshot:
+    def __init__(self, db_path=SNAPSHOT_FILE):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.pending_writes = 0
+        self.reused_dirs = 0
+        self.listed_dirs = 0
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY, mtime_ns INTEGER, subdirs TEXT, files TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def lookup(self, directory, mtime_ns):
+        """(زیرپوشه‌ها، فایل‌ها) در صورت تغییر نکردن پوشه؛ در غیر این صورت None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT subdirs, files FROM dirs WHERE path=? AND mtime_ns=?", (directory, mtime_ns)
+            ).fetchone()
+            # پیمایش موازی چند نخ هم‌زمان از یک عکس می‌خواند
+            if row is None:
+                self.listed_dirs += 1
+            else:
+                self.reused_dirs += 1
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1])
+
+    def store(self, directory, mtime_ns, subdirs, files):
+        """subdirs: نام زیرپوشه‌ها؛ files: فهرست (نام، اندازه، زمان تغییر، inode)"""
+        with self.lock:
+            old = self.conn.execute("SELECT subdirs FROM dirs WHERE path=?", (directory,)).fetchone()
+            if old is not None:
+                # زیرپوشه‌های حذف‌شده و همه زیرشاخه‌های آن‌ها از عکس حذف می‌شوند
+                for name in set(json.loads(old[0])) - set(subdirs):
+                    removed = os.path.join(directory, name)
+                    self.conn.execute(
+                        "DELETE FROM dirs WHERE path=? OR substr(path, 1, ?)=?",
+                        (removed, len(removed) + 1, removed + os.sep)
+                    )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                (directory, mtime_ns, json.dumps(subdirs, ensure_ascii=False), json.dumps(files, ensure_ascii=False))
+            )
+            self.pending_writes += 1
+            if self.pending_writes >= COMMIT_EVERY:
+                self.conn.commit()
+                self.pending_writes = 0
+
+    def flush(self):
+        with self.lock:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM dirs")
+            self.conn.commit()
+            self.conn.execute("VACUUM")
+            self.pending_writes = 0
+
+    def report(self):
+        total = self.reused_dirs + self.listed_dirs
+        if not total:
+            return ""
+        return f"پوشه‌های بدون تغییر: {self.reused_dirs} از {total} (بدون فهرست‌گیری دوباره)"
+
+    def close(self):
+        self.flush()
+        self.conn.close()
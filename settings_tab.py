@@ -1,6 +1,9 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QFormLayout, QLineEdit, QComboBox, QPushButton, QGroupBox, QMessageBox, QColorDialog, QLabel
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QFormLayout, QLineEdit, QComboBox, QPushButton, QGroupBox, QMessageBox, QColorDialog, QLabel, QCheckBox
 from PyQt5.QtCore import pyqtSignal , Qt
 from config import load_config, save_config
+from hash_cache import get_hash_cache, DEFAULT_MAX_ENTRIES, MIN_MAX_ENTRIES
+from scan_cache import get_scan_cache, DEFAULT_SCAN_CACHE_TTL, DEFAULT_SCAN_CACHE_MB
+from fs_watcher import POLL_INTERVAL, stop_all_watches
 
 class SettingsTab(QWidget):
     configChanged = pyqtSignal(dict)
@@ -29,6 +32,41 @@ class SettingsTab(QWidget):
         form_layout.addRow("رنگ اصلی:", self.colorButton)
         form_group.setLayout(form_layout)
         layout.addWidget(form_group)
+        cache_group = QGroupBox("کش هش فایل‌ها")
+        cache_group.setStyleSheet("QGroupBox { font-size: 18px; font-weight: bold; color: #34495e; padding: 10px; }")
+        cache_layout = QFormLayout()
+        self.cacheMaxEntriesInput = QLineEdit()
+        self.cacheMaxEntriesInput.setStyleSheet("padding: 8px; border-radius: 5px;")
+        cache_layout.addRow("حداکثر تعداد رکورد:", self.cacheMaxEntriesInput)
+        self.clearCacheButton = QPushButton("پاک کردن کش هش")
+        self.clearCacheButton.clicked.connect(self.clear_hash_cache)
+        cache_layout.addRow("", self.clearCacheButton)
+        cache_group.setLayout(cache_layout)
+        layout.addWidget(cache_group)
+        scan_cache_group = QGroupBox("کش مشترک نتایج اسکن")
+        scan_cache_group.setStyleSheet("QGroupBox { font-size: 18px; font-weight: bold; color: #34495e; padding: 10px; }")
+        scan_cache_layout = QFormLayout()
+        self.scanCacheTtlInput = QLineEdit()
+        self.scanCacheTtlInput.setStyleSheet("padding: 8px; border-radius: 5px;")
+        scan_cache_layout.addRow("مدت اعتبار (ثانیه):", self.scanCacheTtlInput)
+        self.scanCacheMemoryInput = QLineEdit()
+        self.scanCacheMemoryInput.setStyleSheet("padding: 8px; border-radius: 5px;")
+        scan_cache_layout.addRow("سقف حافظه (MB):", self.scanCacheMemoryInput)
+        self.clearScanCacheButton = QPushButton("پاک کردن کش اسکن")
+        self.clearScanCacheButton.clicked.connect(self.clear_scan_cache)
+        scan_cache_layout.addRow("", self.clearScanCacheButton)
+        scan_cache_group.setLayout(scan_cache_layout)
+        layout.addWidget(scan_cache_group)
+        watch_group = QGroupBox("پیگیری تغییرات پوشه‌ها")
+        watch_group.setStyleSheet("QGroupBox { font-size: 18px; font-weight: bold; color: #34495e; padding: 10px; }")
+        watch_layout = QFormLayout()
+        self.watchChangesCheck = QCheckBox("به‌روزرسانی نتایج پس از تغییر فایل‌ها")
+        watch_layout.addRow("", self.watchChangesCheck)
+        self.watchPollIntervalInput = QLineEdit()
+        self.watchPollIntervalInput.setStyleSheet("padding: 8px; border-radius: 5px;")
+        watch_layout.addRow("فاصله بررسی بدون inotify (ثانیه):", self.watchPollIntervalInput)
+        watch_group.setLayout(watch_layout)
+        layout.addWidget(watch_group)
         self.saveButton = QPushButton("ذخیره تنظیمات")
         self.saveButton.setStyleSheet("font-size: 16px; font-weight: bold; padding: 10px; border-radius: 5px;")
         self.saveButton.clicked.connect(self.save_settings)
@@ -47,6 +85,11 @@ class SettingsTab(QWidget):
         index = self.themeCombo.findText(theme)
         if index != -1:
             self.themeCombo.setCurrentIndex(index)
+        self.cacheMaxEntriesInput.setText(str(config.get("hash_cache_max_entries", DEFAULT_MAX_ENTRIES)))
+        self.scanCacheTtlInput.setText(str(config.get("scan_cache_ttl", DEFAULT_SCAN_CACHE_TTL)))
+        self.scanCacheMemoryInput.setText(str(config.get("scan_cache_memory_mb", DEFAULT_SCAN_CACHE_MB)))
+        self.watchChangesCheck.setChecked(config.get("watch_changes", True))
+        self.watchPollIntervalInput.setText(str(config.get("watch_poll_interval", int(POLL_INTERVAL))))
         self.selectedColor = config.get("main_color", "#3498db")
         self.colorButton.setStyleSheet(f"background-color: {self.selectedColor}; color: white; padding: 8px; border-radius: 5px;")
     def save_settings(self):
@@ -54,11 +97,44 @@ class SettingsTab(QWidget):
             font_size = int(self.fontSizeInput.text())
         except:
             font_size = 16
+        try:
+            cache_max_entries = max(int(self.cacheMaxEntriesInput.text()), MIN_MAX_ENTRIES)
+        except:
+            cache_max_entries = DEFAULT_MAX_ENTRIES
+        try:
+            scan_cache_ttl = int(self.scanCacheTtlInput.text())
+        except:
+            scan_cache_ttl = DEFAULT_SCAN_CACHE_TTL
+        try:
+            scan_cache_memory_mb = int(self.scanCacheMemoryInput.text())
+        except:
+            scan_cache_memory_mb = DEFAULT_SCAN_CACHE_MB
+        try:
+            watch_poll_interval = max(int(self.watchPollIntervalInput.text()), 1)
+        except:
+            watch_poll_interval = int(POLL_INTERVAL)
         new_config = {
             "font_size": font_size,
             "theme": self.themeCombo.currentText(),
-            "main_color": self.selectedColor
+            "main_color": self.selectedColor,
+            "hash_cache_max_entries": cache_max_entries,
+            "scan_cache_ttl": scan_cache_ttl,
+            "scan_cache_memory_mb": scan_cache_memory_mb,
+            "watch_changes": self.watchChangesCheck.isChecked(),
+            "watch_poll_interval": watch_poll_interval
         }
         save_config(new_config)
+        get_hash_cache().set_max_entries(cache_max_entries)
+        get_scan_cache().set_limits(scan_cache_ttl, scan_cache_memory_mb * 1024 * 1024)
+        if not new_config["watch_changes"]:
+            stop_all_watches()
         self.configChanged.emit(new_config)
         QMessageBox.information(self, "تنظیمات", "تنظیمات ذخیره و اعمال شدند.")
+    def clear_hash_cache(self):
+        confirm = QMessageBox.question(self, "پاک کردن کش", "آیا از پاک کردن کش هش فایل‌ها مطمئن هستید؟", QMessageBox.Yes | QMessageBox.No)
+        if confirm == QMessageBox.Yes:
+            get_hash_cache().clear()
+            QMessageBox.information(self, "کش هش", "کش هش فایل‌ها پاک شد.")
+    def clear_scan_cache(self):
+        get_scan_cache().clear()
+        QMessageBox.information(self, "کش اسکن", "نتایج اسکن نگه‌داشته‌شده در حافظه پاک شد.")
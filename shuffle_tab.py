@@ -2,6 +2,8 @@ import os, shutil, random
 from PyQt5.QtWidgets import QWidget, QLineEdit, QHBoxLayout, QVBoxLayout, QPushButton, QFileDialog, QMessageBox, QTableWidget, QTableWidgetItem, QMenu, QComboBox, QCheckBox
 from PyQt5.QtGui import QIcon
 from PyQt5.Qt import QApplication, QSystemTrayIcon, QDesktopServices, QUrl
+from hash_cache import cached_file_hash
+from file_walker import iter_paths
 
 def get_singer(filename):
     base = os.path.basename(filename)
@@ -12,17 +14,19 @@ def is_audio_file(filename):
     audio_extensions = {'.mp3','.wav','.flac','.aac','.ogg','.wma','.m4a'}
     return os.path.splitext(filename)[1].lower() in audio_extensions
 
-def compute_md5(file_path, chunk_size=4096):
-    import hashlib
-    hash_md5 = hashlib.md5()
-    try:
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                hash_md5.update(chunk)
-    except Exception as e:
-        print(f"Error computing MD5 for {file_path}: {e}")
-        return None
-    return hash_md5.hexdigest()
+def compute_md5(file_path, chunk_size=65536):
+    def _md5(path):
+        import hashlib
+        hash_md5 = hashlib.md5()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    hash_md5.update(chunk)
+        except Exception as e:
+            print(f"Error computing MD5 for {path}: {e}")
+            return None
+        return hash_md5.hexdigest()
+    return cached_file_hash(file_path, "md5", _md5)
 
 def check_free_space(dest_folder, required_space):
     import shutil
@@ -84,11 +88,8 @@ class ShuffleTab(QWidget):
             self.list_source_files(path)
     def list_source_files(self, path):
         self.source_files_full = []
-        for root, _, files in os.walk(path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if is_audio_file(file_path):
-                    self.source_files_full.append(file_path)
+        for file_path in iter_paths(path, accept_name=is_audio_file, with_stat=False):
+            self.source_files_full.append(file_path)
         self.table.setRowCount(0)
         for f in self.source_files_full:
             row = self.table.rowCount()
@@ -0,0 +1,4 @@
+import os, sys
+
+# ماژول‌های برنامه در ریشه مخزن هستند
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,110 @@
+import os
+import pytest
+import hash_cache
+from duplicate_engine import find_hash_duplicates, group_files_by_byte_to_byte, PARTIAL_HASH_SIZE
+
+@pytest.fixture(autouse=True)
+def isolated_hash_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(hash_cache, "_cache", hash_cache.HashCache(str(tmp_path / "hash_cache.db")))
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+def make_files(root):
+    """فایل‌های هم‌اندازه با ابتدای یکسان و انتها یا میانه متفاوت، فایل‌های خالی و هاردلینک"""
+    head, tail = b"h" * 64, b"t" * 64
+    paths = [
+        write(root / "same1", head + b"m" * 100 + tail),
+        write(root / "sub" / "same2", head + b"m" * 100 + tail),
+        write(root / "middle", head + b"x" * 100 + tail),
+        write(root / "tail", head + b"m" * 100 + b"u" * 64),
+        write(root / "tail_copy", head + b"m" * 100 + b"u" * 64),
+        write(root / "empty1", b""),
+        write(root / "sub" / "empty2", b""),
+        write(root / "unique", b"only one of this size"),
+        write(root / "small1", b"abc"),
+        write(root / "small2", b"abd"),
+    ]
+    link = str(root / "sub" / "same1_link")
+    os.link(paths[0], link)
+    paths.append(link)
+    return paths
+
+def content_groups(paths):
+    """گروه‌های فایل‌های هم‌محتوا؛ از هاردلینک‌های یک فایل فقط اولین مسیر شمرده می‌شود"""
+    by_content, seen = {}, set()
+    for path in paths:
+        st = os.stat(path)
+        if (st.st_dev, st.st_ino) in seen:
+            continue
+        seen.add((st.st_dev, st.st_ino))
+        with open(path, "rb") as f:
+            by_content.setdefault(f.read(), []).append(path)
+    return sorted(sorted(group) for group in by_content.values() if len(group) > 1)
+
+def records(paths):
+    return [(path, os.path.getsize(path)) for path in paths]
+
+# گروه‌های موتور هش با گروه‌بندی بر اساس محتوای کامل فایل‌ها یکی است
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_groups_match_content_oracle(tmp_path, use_cache):
+    paths = make_files(tmp_path)
+    expected = content_groups(paths)
+    assert [str(tmp_path / "empty1"), str(tmp_path / "sub" / "empty2")] in expected
+    for _ in range(2):
+        # بار دوم هش‌ها از کش خوانده می‌شوند
+        groups, stats = find_hash_duplicates(records(paths), partial_size=16, use_cache=use_cache)
+        assert sorted(sorted(group) for group in groups.values()) == expected
+    assert stats[0]["hardlinks"] == 1
+
+def test_group_callback_receives_same_groups(tmp_path):
+    paths = make_files(tmp_path)
+    received, buckets = [], []
+    groups, _ = find_hash_duplicates(records(paths), partial_size=16, group_callback=received.append,
+                                     bucket_callback=buckets.append)
+    assert not groups
+    assert sorted(sorted(g) for batch in received for g in batch.values()) == content_groups(paths)
+    sizes = [os.path.getsize(path) for path in paths]
+    assert sorted(buckets) == sorted({size for size in sizes if sizes.count(size) > 1})
+
+# پس از توقف فقط گروه‌های کامل تأییدشده برمی‌گردند
+
+def test_should_stop(tmp_path):
+    paths = make_files(tmp_path)
+    groups, _ = find_hash_duplicates(records(paths), should_stop=lambda: True)
+    assert groups == {}
+
+    calls = []
+    def stop_later():
+        calls.append(True)
+        return len(calls) > 3
+    groups, _ = find_hash_duplicates(records(paths), partial_size=16, should_stop=stop_later)
+    expected = content_groups(paths)
+    assert all(sorted(group) in expected for group in groups.values())
+
+# مقایسه بایت به بایت گروه‌های بزرگ‌تر از سقف فایل‌های باز (شکستن نوبتی) با همان گروه‌بندی محتوا
+
+@pytest.mark.parametrize("max_open_files", [2, 3, 64])
+def test_byte_to_byte_matches_content_oracle(tmp_path, max_open_files):
+    size = 3 * PARTIAL_HASH_SIZE + 100
+    base = bytes(i % 251 for i in range(size))
+    variants = {"base": base}
+    for name, offset in (("first", 10), ("second", PARTIAL_HASH_SIZE + 5), ("last", size - 1)):
+        data = bytearray(base)
+        data[offset] ^= 0xFF
+        variants[name] = bytes(data)
+    paths = []
+    for copy in range(3):
+        for name, data in variants.items():
+            paths.append(write(tmp_path / f"{name}_{copy}", data))
+    paths.append(write(tmp_path / "single", bytes(reversed(base))))
+    stats = {"bytes_read": 0}
+    groups = group_files_by_byte_to_byte(paths, block_size=PARTIAL_HASH_SIZE, max_open_files=max_open_files,
+                                         stats=stats)
+    assert sorted(sorted(group) for group in groups.values()) == content_groups(paths)
+    assert all(group[0] == key for key, group in groups.items())
+    # هر فایل حداکثر یک بار خوانده می‌شود
+    assert stats["bytes_read"] <= len(paths) * size
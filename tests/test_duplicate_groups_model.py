@@ -0,0 +1,41 @@
+import os
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QAbstractItemModelTester
+from duplicate_files_tab import DuplicateGroupsModel
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+def check(model, file_path):
+    model.checked[model.paths.index(file_path)] = 1
+
+# حذف فایل‌ها از نتایج انتخاب‌های دستی بقیه فایل‌ها را نگه می‌دارد و مدل را بازنشانی نمی‌کند
+
+def test_remove_paths_keeps_checks_and_removes_only_affected_rows(app):
+    model = DuplicateGroupsModel()
+    tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    model.append_groups({"k1": ["/a", "/b", "/c"], "k2": ["/d", "/e"], "k3": ["/f", "/g", "/h"]})
+    check(model, "/b")
+    check(model, "/h")
+    model.group_checked[2] = 1
+    resets, removed = [], []
+    model.modelReset.connect(lambda: resets.append(True))
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+
+    changed = model.remove_paths(["/a", "/d"])
+
+    assert not resets
+    assert removed == [(4, 6), (1, 1)]
+    assert model.rowCount() == 7 and model.group_keys == ["k1", "k3"]
+    assert changed == [0]
+    selected = {model.paths[i] for i in range(len(model.paths)) if model.checked[i]}
+    assert selected == {"/b", "/h"}
+    assert list(model.group_checked) == [0, 1]
+    rows = [model.data(model.index(row, 0)) for row in range(model.rowCount())]
+    assert rows == ["گروه: k1 (2 فایل)", "/b", "/c", "گروه: k3 (3 فایل)", "/f", "/g", "/h"]
+    assert model.data(model.index(6, 0), Qt.CheckStateRole) == Qt.Checked
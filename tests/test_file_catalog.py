@@ -0,0 +1,49 @@
+from file_catalog import FileCatalog
+from file_walker import iter_files
+from file_records import FileRecordStore
+from fs_watcher import LiveRecords
+
+def scan(root):
+    store = FileRecordStore()
+    for record in iter_files(str(root)):
+        store.add(*record)
+    return store
+
+# تغییرات پیگیری پوشه فقط ردیف‌های پوشه‌های تغییرکرده را در فهرست دائمی عوض می‌کنند
+
+def test_watch_changes_update_catalog_in_place(tmp_path):
+    root = tmp_path / "root"
+    for directory in ("a", "b"):
+        (root / directory).mkdir(parents=True)
+        for i in range(3):
+            (root / directory / f"{directory}_report_{i}.txt").write_text("x")
+    catalog = FileCatalog(str(tmp_path / "catalog.db"))
+    store = scan(root)
+    generation = catalog.replace(str(root), store)
+    untouched = catalog.conn.execute(
+        "SELECT rowid FROM files WHERE directory=?", (str(root / "b"),)).fetchall()
+
+    (root / "a" / "a_report_0.txt").unlink()
+    (root / "a" / "a_fresh.txt").write_text("x")
+    live = LiveRecords(store)
+    removed, added = live.apply({str(root / "a")}, set())
+    assert live.store is not store and len(store) == 6
+    generation = catalog.apply_changes(str(root), generation, live.store, removed, added)
+    assert generation is not None
+    # ردیف‌های پوشه b دست نخورده‌اند
+    assert catalog.conn.execute(
+        "SELECT rowid FROM files WHERE directory=?", (str(root / "b"),)).fetchall() == untouched
+    assert {live.store.name(i) for i in catalog.search(str(root), "fresh", generation)} == {"a_fresh.txt"}
+    assert not catalog.search(str(root), "a_report_0", generation)
+    counts = [catalog.conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0] for table in ("files", "files_fts")]
+    assert counts == [6, 6]
+    # نسل قدیمی دیگر اعمال نمی‌شود
+    assert catalog.apply_changes(str(root), generation - 1, live.store, [], range(0)) is None
+
+    # بارگذاری دوباره seq ها را به اندیس مخزن برگشتی برمی‌گرداند
+    loaded, loaded_generation = catalog.load(str(root))
+    assert loaded_generation == generation + 1
+    assert sorted(loaded.name(i) for i in range(len(loaded))) == sorted(
+        live.store.name(i) for i in live.indices())
+    assert [loaded.name(i) for i in catalog.search(str(root), "fresh", loaded_generation)] == ["a_fresh.txt"]
+    catalog.close()
@@ -0,0 +1,52 @@
+import os, time
+from hash_cache import HashCache
+
+def last_used(cache):
+    return cache.conn.execute("SELECT last_used FROM hashes").fetchone()[0]
+
+# هش فایلی که حین هش کردن تغییر کرده زیر کلید محتوای تازه ذخیره نمی‌شود
+
+def test_file_changed_while_hashing_is_not_cached(tmp_path):
+    cache = HashCache(str(tmp_path / "hash_cache.db"))
+    path = tmp_path / "file"
+    path.write_text("old")
+    st = os.stat(path)
+    path.write_text("new content")
+    cache.store(str(path), "md5", "digest-of-old", st)
+    assert cache.lookup(str(path), "md5") is None
+
+    st = os.stat(path)
+    cache.store(str(path), "md5", "digest-of-new", st)
+    assert cache.lookup(str(path), "md5", st) == "digest-of-new"
+    cache.conn.close()
+
+# زمان آخرین استفاده برخوردها دسته‌ای نوشته می‌شود، نه با هر lookup
+
+def test_lookup_defers_last_used_update(tmp_path):
+    cache = HashCache(str(tmp_path / "hash_cache.db"))
+    path = tmp_path / "file"
+    path.write_text("data")
+    st = os.stat(path)
+    cache.store(str(path), "md5", "digest", st)
+    cache.flush()
+    stored = last_used(cache)
+    time.sleep(0.01)
+    assert cache.lookup(str(path), "md5", st) == "digest"
+    assert last_used(cache) == stored
+    cache.flush()
+    assert last_used(cache) > stored
+    cache.conn.close()
+
+# سقف صفر یا منفی کش را خالی نمی‌کند
+
+def test_max_entries_has_lower_bound(tmp_path):
+    cache = HashCache(str(tmp_path / "hash_cache.db"), max_entries=0)
+    path = tmp_path / "file"
+    path.write_text("data")
+    st = os.stat(path)
+    cache.store(str(path), "md5", "digest", st)
+    cache.flush()
+    cache.set_max_entries(-5)
+    assert cache.entry_count() == 1
+    assert cache.lookup(str(path), "md5", st) == "digest"
+    cache.conn.close()
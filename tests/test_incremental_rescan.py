@@ -0,0 +1,60 @@
+import os, sys, subprocess
+import duplicate_cli
+from file_walker import iter_files
+from scan_snapshot import ScanSnapshot
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "duplicate_cli.py")
+
+def run_cli(cwd, *args):
+    # هر اجرا فرایند جداگانه است، مانند اجرای زمان‌بندی‌شده با cron
+    return subprocess.run([sys.executable, CLI, *args], cwd=cwd, capture_output=True, text=True)
+
+# اسکن افزایشی نباید اندازه و زمان تغییر قدیمی فایل‌هایی را که در جای خود بازنویسی شده‌اند به کار ببرد
+
+def test_file_edited_in_place_is_rescanned(tmp_path):
+    data = tmp_path / "data" / "d"
+    data.mkdir(parents=True)
+    (data / "one").write_text("AAAA")
+    (data / "two").write_text("BBBBBBBB")
+    args = ("data", "--criteria", "md5", "-q", "--state-dir", str(tmp_path / "state"))
+    assert run_cli(tmp_path, *args).returncode == duplicate_cli.EXIT_NO_DUPLICATES
+
+    # بازنویسی محتوا زمان تغییر پوشه را عوض نمی‌کند
+    dir_mtime = data.stat().st_mtime_ns
+    (data / "one").write_text("BBBBBBBB")
+    assert data.stat().st_mtime_ns == dir_mtime
+    result = run_cli(tmp_path, *args)
+    assert result.returncode == duplicate_cli.EXIT_DUPLICATES_FOUND
+    assert "one" in result.stdout and "two" in result.stdout
+
+# فایل‌های وضعیت خط فرمان نباید در پوشه جاری نوشته یا اسکن شوند
+
+def test_state_files_stay_out_of_scanned_root(tmp_path):
+    (tmp_path / "a").write_text("same")
+    (tmp_path / "b").write_text("same")
+    state = tmp_path / "state"
+    outputs = [run_cli(tmp_path, ".", "--state-dir", str(state), "-q").stdout for _ in range(2)]
+    assert outputs[0] == outputs[1] and outputs[0].count('"group"') == 1
+    assert sorted(os.listdir(tmp_path)) == ["a", "b", "state"]
+    assert "app.log" not in os.listdir(state)
+    run_cli(tmp_path, ".", "--state-dir", str(state))
+    assert "app.log" in os.listdir(state)
+
+# فایل‌هایی که فیلتر نام رد می‌کند با عکس‌برداری هم stat نمی‌شوند و در صورت پذیرش بعدی همان موقع stat می‌شوند
+
+def test_rejected_names_are_stored_without_stat(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "keep.txt").write_text("AAAA")
+    (data / "skip.log").write_text("BBBBBBBB")
+    snapshot = ScanSnapshot(str(tmp_path / "snapshot.db"))
+    only_txt = lambda name: name.endswith(".txt")
+    assert [r[1:3] for r in iter_files(str(data), only_txt, snapshot=snapshot)] == [("keep.txt", 4)]
+    _, files = snapshot.lookup(str(data), data.stat().st_mtime_ns)
+    assert sorted(map(tuple, files))[1] == ("skip.log", None, None, None)
+
+    records = sorted(r[1:3] for r in iter_files(str(data), snapshot=snapshot))
+    assert records == [("keep.txt", 4), ("skip.log", 8)]
+    _, files = snapshot.lookup(str(data), data.stat().st_mtime_ns)
+    assert sorted(f[:2] for f in files) == [["keep.txt", 4], ["skip.log", 8]]
+    snapshot.conn.close()
@@ -0,0 +1,27 @@
+import parallel_walker
+from parallel_walker import walk_roots
+from file_walker import iter_files
+
+def make_tree(root, width, depth):
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "file.txt").write_text(str(root))
+    if depth:
+        for i in range(width):
+            make_tree(root / f"d{i}", width, depth - 1)
+
+# زیرپوشه‌هایی که در صف محدود هر نخ جا نمی‌شوند همان‌جا پیمایش می‌شوند و رکوردی از دست نمی‌رود
+
+def test_bounded_queues_walk_every_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel_walker, "LOCAL_QUEUE_SIZE", 2)
+    roots = [tmp_path / "a", tmp_path / "b"]
+    for root in roots:
+        make_tree(root, 4, 3)
+    expected = sorted(record[:3] for root in roots for record in iter_files(str(root)))
+    seen, finished = [], []
+    for root, batch in walk_roots([str(root) for root in roots], device_workers={"ssd": 4, "hdd": 4, "unknown": 4}, batch_size=7):
+        if batch is None:
+            finished.append(root)
+        else:
+            seen.extend(record[:3] for record in batch)
+    assert sorted(seen) == expected
+    assert sorted(finished) == sorted(str(root) for root in roots)
@@ -0,0 +1,122 @@
+import os, time, shutil
+from duplicate_engine import ScanFilter
+from file_records import FileRecordStore
+from file_walker import iter_files
+from large_files_engine import TopFiles
+from scan_cache import ScanResultCache
+
+def make_tree(root):
+    files = {
+        "a/report.txt": 10, "a/photo.jpg": 20, "a/deep/notes.txt": 30,
+        "b/movie.mp4": 40, "b/skip/hidden.txt": 50, "c.txt": 60,
+    }
+    for name, size in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+
+def walk(root, scan_filter=None):
+    store = FileRecordStore()
+    options = {}
+    if scan_filter is not None:
+        options = {"accept_name": scan_filter.accepts_name, "accept_size": scan_filter.accepts_size,
+                   "exclude_dir": scan_filter.is_excluded_dir}
+    for record in iter_files(str(root), **options):
+        store.add(*record)
+    return store
+
+def contents(store):
+    return sorted((store.path(i), store.sizes[i]) for i in range(len(store)))
+
+# برش از عکس بدون فیلتر یک پوشه بالاتر همان نتیجه پیمایش مستقیم را می‌دهد
+
+def test_subdirectory_slice_of_cached_parent(tmp_path):
+    make_tree(tmp_path)
+    # پوشه‌ای که فقط پیشوند نامش یکی است جزو برش نیست
+    (tmp_path / "ab").mkdir()
+    (tmp_path / "ab" / "other.txt").write_text("x")
+    cache = ScanResultCache()
+    cache.put(str(tmp_path), walk(tmp_path))
+    sliced = cache.get(str(tmp_path / "a"))
+    assert contents(sliced) == contents(walk(tmp_path / "a"))
+    assert len(sliced) == 3
+    assert cache.stats()[:3] == (1, 0, 2)
+
+def test_filters_applied_to_cached_unfiltered_scan(tmp_path):
+    make_tree(tmp_path)
+    cache = ScanResultCache()
+    cache.put(str(tmp_path), walk(tmp_path))
+    scan_filter = ScanFilter([str(tmp_path / "b" / "skip")], ["*.txt"])
+    sliced = cache.get(str(tmp_path), scan_filter)
+    assert contents(sliced) == contents(walk(tmp_path, scan_filter))
+    assert {os.path.basename(path) for path, _ in contents(sliced)} == {"report.txt", "notes.txt", "c.txt"}
+    # عکس برش‌خورده با امضای همین فیلتر نگه داشته شده است
+    assert cache.get(str(tmp_path), scan_filter) is sliced
+
+# تغییر یک پوشه (گزارش پیگیری) عکس‌های شامل آن را کنار می‌گذارد ولی عکس ریشه‌های دیگر می‌ماند
+
+def test_invalidate_after_watch_change(tmp_path):
+    make_tree(tmp_path)
+    cache = ScanResultCache()
+    cache.put(str(tmp_path), walk(tmp_path))
+    cache.put(str(tmp_path / "a" / "deep"), walk(tmp_path / "a" / "deep"))
+    other = tmp_path.parent / (tmp_path.name + "_other")
+    other.mkdir(exist_ok=True)
+    cache.put(str(other), walk(other))
+    (tmp_path / "a" / "new.txt").write_text("x")
+    cache.invalidate(str(tmp_path / "a"))
+    assert cache.get(str(tmp_path)) is None
+    assert cache.get(str(tmp_path / "a" / "deep")) is None
+    assert cache.get(str(other)) is not None
+    cache.put(str(tmp_path), walk(tmp_path))
+    assert str(tmp_path / "a" / "new.txt") in dict(contents(cache.get(str(tmp_path / "a"))))
+
+# عکس‌های کهنه‌تر از ttl و با عبور از سقف حافظه عکس‌هایی که دیرتر استفاده شده‌اند کنار گذاشته می‌شوند
+
+def test_ttl_and_lru_eviction(tmp_path):
+    roots = []
+    for name in ("one", "two", "three"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "file.txt").write_text("x")
+        roots.append(str(tmp_path / name))
+    stores = [walk(root) for root in roots]
+    cache = ScanResultCache(ttl=60)
+    cache.put(roots[0], stores[0], scanned_at=time.time() - 120)
+    assert cache.get(roots[0]) is None and cache.stats()[2:] == (0, 0)
+
+    cache = ScanResultCache(ttl=60, memory_budget=max(store.memory_usage() for store in stores) * 2 + 1)
+    cache.put(roots[0], stores[0])
+    cache.put(roots[1], stores[1])
+    assert cache.get(roots[0]) is stores[0]
+    cache.put(roots[2], stores[2])
+    assert cache.get(roots[1]) is None
+    assert cache.get(roots[0]) is stores[0] and cache.get(roots[2]) is stores[2]
+    assert cache.stats()[3] == stores[0].memory_usage() + stores[2].memory_usage()
+    # عکسی که به تنهایی از سقف بزرگ‌تر است نگه داشته نمی‌شود
+    cache.set_limits(60, 1)
+    assert cache.stats()[2:] == (0, 0)
+
+# نتیجه تازه فایل‌های بزرگ پس از تغییر پوشه‌ها با پیمایش دوباره کل درخت یکی است (وقتی فایلی از هرم‌ها
+# بیرون نرفته باشد؛ فایل‌های بیرون‌رفته تا اسکن بعدی برنمی‌گردند)
+
+def top_files(root, limit, per_extension):
+    top = TopFiles(limit, per_extension)
+    for record in iter_files(str(root)):
+        top.add(*record)
+    return top
+
+def entries(top):
+    return [(size, directory, name) for size, _, directory, name, _ in top.entries()]
+
+def test_top_files_updated_matches_fresh_walk(tmp_path):
+    make_tree(tmp_path)
+    tops = [top_files(tmp_path, 10, 10), top_files(tmp_path, 3, 1)]
+    (tmp_path / "b" / "movie.mp4").unlink()
+    (tmp_path / "a" / "huge.bin").write_bytes(b"x" * 100)
+    shutil.rmtree(tmp_path / "b" / "skip")
+    dirs, trees = {str(tmp_path / "a"), str(tmp_path / "b")}, {str(tmp_path / "b" / "skip")}
+    updated = tops[0].updated(dirs, trees)
+    assert entries(updated) == entries(top_files(tmp_path, 10, 10))
+    updated = tops[1].updated(dirs, trees)
+    assert set(entries(updated)) <= set(entries(top_files(tmp_path, 10, 10)))
+    assert entries(updated)[0] == (100, str(tmp_path / "a"), "huge.bin")
@@ -0,0 +1,52 @@
+import json
+import pytest
+import hash_cache
+from duplicate_scan import DuplicateScan
+from scan_checkpoint import ScanCheckpoint
+
+@pytest.fixture(autouse=True)
+def isolated_hash_cache(tmp_path, monkeypatch):
+    # ذخیره نقطه ادامه کش هش را هم flush می‌کند؛ کش مشترک نباید در پوشه جاری ساخته شود
+    monkeypatch.setattr(hash_cache, "_cache", hash_cache.HashCache(str(tmp_path / "hash_cache.db")))
+
+def make_checkpoint(tmp_path):
+    return ScanCheckpoint({"paths": ["root"]}, str(tmp_path / "checkpoint.json"),
+                          str(tmp_path / "groups.jsonl"), str(tmp_path / "records.jsonl"))
+
+# هر ذخیره نقطه ادامه فقط رکوردها و اندازه‌های تازه را به فایل رکوردها می‌افزاید
+
+def test_checkpoint_appends_only_new_records(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    scan = DuplicateScan(["root"], "md5", checkpoint=checkpoint)
+    scan.records.append("/root/a", 10, 1.0, 1)
+    scan.save_checkpoint("walk", "root", ["/root/sub"])
+    first = (tmp_path / "records.jsonl").read_bytes()
+    scan.records.append("/root/sub/b", 20, 2.0, 2)
+    scan.on_bucket_done(10)
+    scan.save_checkpoint("group")
+    journal = (tmp_path / "records.jsonl").read_bytes()
+    assert journal.startswith(first) and journal.count(b"\n") == 3
+    state = json.loads((tmp_path / "checkpoint.json").read_text())
+    assert "records" not in state and state["journal_offset"] == len(journal)
+
+    # رکوردهایی که پس از آخرین ذخیره نوشته شده‌اند (مثلاً پیش از قطع برنامه) کنار گذاشته می‌شوند
+    with open(tmp_path / "records.jsonl", "ab") as f:
+        f.write(b'["/root/sub", "partial", 1')
+    resumed = make_checkpoint(tmp_path)
+    state = resumed.load()
+    scan = DuplicateScan(["root"], "md5", checkpoint=resumed, resume_state=state)
+    scan.restore_checkpoint()
+    assert list(scan.records) == [("/root/a", 10), ("/root/sub/b", 20)]
+    assert scan.completed_sizes == {10}
+    scan.records.append("/root/c", 30, 3.0, 3)
+    scan.save_checkpoint("group")
+    assert (tmp_path / "records.jsonl").read_bytes().count(b"\n") == 4
+    assert [path for path, _ in resumed.load()["record_store"]] == ["/root/a", "/root/sub/b", "/root/c"]
+
+def test_checkpoint_with_truncated_journal_is_ignored(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    scan = DuplicateScan(["root"], "md5", checkpoint=checkpoint)
+    scan.records.append("/root/a", 10, 1.0, 1)
+    scan.save_checkpoint("group")
+    (tmp_path / "records.jsonl").write_bytes(b"")
+    assert make_checkpoint(tmp_path).load() is None
@@ -0,0 +1,94 @@
+import os, json, time, threading
+import pytest
+import fs_watcher
+from fs_watcher import SharedWatch, LiveRecords
+from file_records import FileRecordStore
+from file_walker import iter_files
+
+def wait_for(events, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not events.is_set():
+        events.wait(0.1)
+    return events.is_set()
+
+# تب‌هایی که یک ریشه را پیگیری می‌کنند یک نخ پیگیری مشترک دارند و پوشه‌های مستثنای هر تب جداگانه کنار گذاشته می‌شوند
+
+def test_tabs_share_one_watcher_per_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "root"
+    (root / "keep").mkdir(parents=True)
+    (root / "skip" / "deep").mkdir(parents=True)
+    changes = {"all": [], "filtered": []}
+    done = threading.Event()
+
+    def collect(name):
+        def callback(dirs, trees):
+            changes[name].append(dirs | trees)
+            if name == "all" and any(d.endswith("keep") for d in dirs):
+                done.set()
+        return callback
+
+    first = SharedWatch([str(root)], collect("all"))
+    second = SharedWatch([str(root)], collect("filtered"), lambda d: os.path.basename(d) == "skip")
+    first.start()
+    second.start()
+    try:
+        assert len(fs_watcher._shared) == 1
+        time.sleep(0.5)
+        (root / "skip" / "deep" / "x").write_text("x")
+        (root / "keep" / "y").write_text("y")
+        assert wait_for(done)
+        time.sleep(1)
+        seen_all = set().union(*changes["all"])
+        seen_filtered = set().union(*changes["filtered"])
+        assert str(root / "skip" / "deep") in seen_all
+        assert str(root / "keep") in seen_filtered
+        assert not any("skip" in d for d in seen_filtered)
+    finally:
+        first.stop()
+        second.stop()
+    assert not fs_watcher._shared
+
+def test_watching_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config.json").write_text(json.dumps({"watch_changes": False}))
+    watch = SharedWatch([str(tmp_path)], lambda dirs, trees: None)
+    watch.start()
+    assert not fs_watcher._shared and watch.mode is None
+    watch.stop()
+
+# پوشه رکوردهایی که با مسیر نسبی پیمایش شده‌اند با مسیرهای مطلق گزارش‌شده پیگیری مقایسه می‌شوند
+
+def test_live_records_match_relative_scan_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "root" / "a").mkdir(parents=True)
+    (tmp_path / "root" / "a" / "old.txt").write_text("x")
+    store = FileRecordStore()
+    for record in iter_files(os.path.join("root", "a")):
+        store.add(*record)
+    (tmp_path / "root" / "a" / "old.txt").unlink()
+    (tmp_path / "root" / "a" / "new.txt").write_text("x")
+    live = LiveRecords(store)
+    removed, added = live.apply({str(tmp_path / "root" / "a")}, set())
+    assert removed == [0]
+    assert [live.store.name(i) for i in live.indices()] == ["new.txt"]
+    removed, added = live.apply(set(), {str(tmp_path / "root")})
+    assert [live.store.name(i) for i in live.indices()] == ["new.txt"] and len(removed) == 1
+
+# stop افزودن پیگیری پوشه‌های درخت بزرگ را نیمه‌کاره رها می‌کند تا نخ رابط کاربری منتظر نماند
+
+def test_stop_interrupts_initial_walk(tmp_path, monkeypatch):
+    if fs_watcher._libc is None:
+        pytest.skip("inotify در دسترس نیست")
+    for i in range(20):
+        (tmp_path / f"d{i}" / "sub").mkdir(parents=True)
+    watcher = fs_watcher.DirectoryWatcher([str(tmp_path)], lambda dirs, trees: None)
+    visited = []
+
+    def add_watch(directory):
+        visited.append(directory)
+        watcher.stop_event.set()
+
+    monkeypatch.setattr(watcher, "add_watch", add_watch)
+    watcher.run_inotify()
+    assert len(visited) == 1
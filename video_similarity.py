@@ -0,0 +1,169 @@
+import os, time
+from duplicate_engine import run_per_device, new_stage_stats
+from hash_cache import get_hash_cache, cache_stat
+from image_similarity import dhash_batch, hamming_distance, DEFAULT_SIMILARITY_THRESHOLD
+
+# OpenCV و NumPy فقط برای معیار شباهت ویدیویی لازم هستند
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# تشخیص ویدیوهای تقریباً تکراری (ظرف، کدک یا نرخ بیت متفاوت) از روی هش dHash چند فریم نمونه
+# (بدون وابستگی به PyQt5). فقط فریم‌های نمونه با جستجو (seek) رمزگشایی می‌شوند، نه کل فایل.
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm", ".m4v", ".mpg", ".mpeg", ".3gp", ".ts"}
+# تعداد فریم‌های نمونه هر ویدیو؛ در موقعیت‌های نسبی یکسان از مدت ویدیو برداشته می‌شوند
+VIDEO_FRAME_SAMPLES = 8
+# ابتدا و انتهای ویدیو (تیتراژ، فریم سیاه) نمونه‌برداری نمی‌شود
+SAMPLE_START = 0.05
+SAMPLE_END = 0.95
+# نام الگوریتم در کش دائمی هش‌ها
+VIDEO_ALGORITHM = f"vdhash{VIDEO_FRAME_SAMPLES}"
+# حداکثر اختلاف مدت دو ویدیو (ثانیه)
+DURATION_TOLERANCE = 1.0
+# پهنای سطل‌های مدت (ثانیه)؛ چون از DURATION_TOLERANCE کمتر نیست، هر ویدیو فقط با سطل خود و سطل مجاور مقایسه می‌شود
+DURATION_BUCKET = 2.0
+# حداقل نسبت فریم‌هایی که فاصله همینگ آن‌ها در آستانه است
+VIDEO_MATCH_RATIO = 0.75
+
+def video_similarity_available():
+    return cv2 is not None and np is not None
+
+def is_video_file(file_path):
+    return os.path.splitext(file_path)[1].lower() in VIDEO_EXTENSIONS
+
+def sample_thumbnails(file_path, samples=VIDEO_FRAME_SAMPLES, hash_size=8):
+    """(مدت بر حسب ثانیه، تصاویر خاکستری کوچک‌شده فریم‌های نمونه) یا None در صورت خطا"""
+    cap = cv2.VideoCapture(file_path)
+    try:
+        if not cap.isOpened():
+            return None
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if frame_count <= 0 or not fps or fps <= 0:
+            return None
+        duration = frame_count / fps
+        thumbnails = []
+        step = (SAMPLE_END - SAMPLE_START) / max(samples - 1, 1)
+        for i in range(samples):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int((SAMPLE_START + i * step) * (frame_count - 1)))
+            ok, frame = cap.read()
+            if not ok:
+                return None
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            thumbnails.append(cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+                              .astype(np.int16))
+        return duration, thumbnails
+    except cv2.error:
+        return None
+    finally:
+        cap.release()
+
+def encode_signature(duration, hashes):
+    return f"{duration:.3f}:" + ",".join(f"{value:016x}" for value in hashes)
+
+def decode_signature(digest):
+    duration, hashes = digest.split(":", 1)
+    return float(duration), [int(value, 16) for value in hashes.split(",")]
+
+def video_signature(cache, file_path):
+    """(مدت، هش فریم‌ها) از کش دائمی یا با نمونه‌برداری فریم‌ها؛ در صورت خطا None"""
+    st = cache_stat(file_path) if cache else None
+    digest = cache.lookup(file_path, VIDEO_ALGORITHM, st) if st else None
+    if digest is not None:
+        return decode_signature(digest)
+    sampled = sample_thumbnails(file_path)
+    if sampled is None:
+        return None
+    duration, thumbnails = sampled
+    signature = (duration, dhash_batch(thumbnails))
+    if st:
+        cache.store(file_path, VIDEO_ALGORITHM, encode_signature(*signature), st)
+    return signature
+
+def signatures_match(a, b, threshold):
+    """مقایسه دنباله هش فریم‌های هم‌موقعیت دو ویدیو"""
+    matched = sum(1 for x, y in zip(a, b) if hamming_distance(x, y) <= threshold)
+    return matched >= VIDEO_MATCH_RATIO * min(len(a), len(b))
+
+def find_similar_videos(records, threshold=DEFAULT_SIMILARITY_THRESHOLD, progress_callback=None, use_cache=True,
+                        device_workers=None, group_callback=None, should_stop=None):
+    """
+    گروه‌بندی ویدیوهای مشابه: امضای هر ویدیو (مدت و dHash فریم‌های نمونه، با کش دائمی) سپس
+    مقایسه فقط بین ویدیوهای هم‌سطل از نظر مدت. ویدیوهایی که زنجیره‌ای از جفت‌های مشابه بین آن‌ها
+    وجود دارد در یک گروه قرار می‌گیرند. رابط فراخوانی‌ها مانند find_similar_images است.
+    خروجی: (گروه‌ها بر اساس اولین مسیر، آمار مراحل)
+    """
+    if not video_similarity_available():
+        raise RuntimeError("برای مقایسه ویدیویی نصب opencv-python و numpy لازم است.")
+    cache = get_hash_cache() if use_cache else None
+    videos = [(file_path, size) for file_path, size in records if is_video_file(file_path)]
+    hash_stats = new_stage_stats("video_hash")
+    group_stats = new_stage_stats("video_match")
+    hash_stats["files"] = len(videos)
+    signatures = {}
+
+    started = time.perf_counter()
+    done = 0
+    for (file_path, size), signature in run_per_device(
+            videos, lambda item: video_signature(cache, item[0]), device_workers):
+        done += 1
+        if signature is not None:
+            signatures[file_path] = signature
+        if progress_callback:
+            progress_callback(1, done, len(videos))
+        if should_stop and should_stop():
+            break
+    hash_stats["candidates"] = len(signatures)
+    hash_stats["seconds"] = time.perf_counter() - started
+    if should_stop and should_stop():
+        return {}, [hash_stats, group_stats]
+
+    started = time.perf_counter()
+    group_stats["files"] = len(signatures)
+    buckets = {}
+    for file_path, (duration, _) in signatures.items():
+        buckets.setdefault(int(duration // DURATION_BUCKET), []).append(file_path)
+    parent = {file_path: file_path for file_path in signatures}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    done = 0
+    for bucket, files in buckets.items():
+        # سطل بعدی هم بررسی می‌شود تا ویدیوهای نزدیک مرز سطل از دست نروند؛ سطل قبلی خودش این سطل را می‌بیند
+        neighbours = buckets.get(bucket + 1, [])
+        for i, file_path in enumerate(files):
+            duration, hashes = signatures[file_path]
+            for other in files[i + 1:] + neighbours:
+                other_duration, other_hashes = signatures[other]
+                if abs(duration - other_duration) > DURATION_TOLERANCE:
+                    continue
+                root_a, root_b = find(file_path), find(other)
+                if root_a != root_b and signatures_match(hashes, other_hashes, threshold):
+                    parent[root_b] = root_a
+        done += len(files)
+        if progress_callback:
+            progress_callback(2, done, len(signatures))
+    components = {}
+    for file_path in signatures:
+        components.setdefault(find(file_path), []).append(file_path)
+    groups = {}
+    for files in components.values():
+        if len(files) > 1:
+            groups[files[0]] = files
+            group_stats["candidates"] += len(files)
+    group_stats["seconds"] = time.perf_counter() - started
+    if group_callback:
+        if groups:
+            group_callback(groups)
+        groups = {}
+    return groups, [hash_stats, group_stats]